@@ -0,0 +1,39 @@
+"""Compares the JSON decoders of log_decoders on the bundled log.json scaled up"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from log_decoders import DECODERS, available_decoders, select_decoder  # noqa: E402
+from log_parser import parse_buffer  # noqa: E402
+
+FILE_LOG = Path(__file__).resolve().parents[1] / "log.json"
+
+
+def main(rows: int, repeat: int) -> None:
+    lines = [line for line in FILE_LOG.read_bytes().splitlines(keepends=True) if line.strip()]
+    data = b"".join(lines * (rows // len(lines) + 1))
+    data = b"".join(data.splitlines(keepends=True)[:rows])
+    print(f"rows: {rows:,}, {len(data) / 2**20:.1f} MB, auto selects '{select_decoder('auto')}'")
+    for decoder in DECODERS:
+        if decoder not in available_decoders():
+            print(f"{decoder:<8} not installed")
+            continue
+        seconds = min(
+            timeit.repeat(lambda: parse_buffer(data, decoder=decoder), number=1, repeat=repeat)
+        )
+        print(
+            f"{decoder:<8} {seconds:>8.3f} s  {rows / seconds:>12,.0f} rows/s  "
+            f"{len(data) / 2**20 / seconds:>8.1f} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(rows=args.rows, repeat=args.repeat)
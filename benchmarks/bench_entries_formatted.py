@@ -0,0 +1,72 @@
+"""Compares the vectorized LogFile.entries_formatted with the former iterrows loop"""
+
+import argparse
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+from rich.text import Text
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from generate_log import generate_log  # noqa: E402
+from log_file import LogFile  # noqa: E402
+
+LEVEL_COLORS = {
+    "DEBUG": "grey62",
+    "INFO": "steel_blue3",
+    "WARNING": "dark_orange",
+    "ERROR": "red",
+}
+
+
+def entries_formatted_iterrows(log_file: LogFile, level_colors: dict) -> list:
+    """The implementation of entries_formatted before it was vectorized"""
+    lst_entries = []
+    df_selected = log_file.take(log_file.selection())
+    lst_columns = list(df_selected.columns)
+    for _, row in df_selected.iterrows():
+        entry = ()
+        for col in lst_columns:
+            if col == "levelname":
+                levelname = Text(row[col])
+                levelname.style = f"bold {level_colors[row[col]]}"
+                entry = entry + (levelname,)
+            else:
+                entry = entry + (row[col],)
+        lst_entries.append(entry)
+    return lst_entries
+
+
+def main(rows: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as dir_temp:
+        file_log = str(Path(dir_temp) / "log.json")
+        generate_log(file=file_log, rows=rows)
+        log_file = LogFile(file_log=file_log)
+        time_old = min(
+            timeit.repeat(
+                lambda: entries_formatted_iterrows(log_file, LEVEL_COLORS),
+                number=1,
+                repeat=repeat,
+            )
+        )
+        time_new = min(
+            timeit.repeat(
+                lambda: log_file.entries_formatted(level_colors=LEVEL_COLORS),
+                number=1,
+                repeat=repeat,
+            )
+        )
+    print(f"rows:       {rows:>12,}")
+    print(f"iterrows:   {time_old:>12.3f} s  {rows / time_old:>12,.0f} rows/s")
+    print(f"vectorized: {time_new:>12.3f} s  {rows / time_new:>12,.0f} rows/s")
+    print(f"speedup:    {time_old / time_new:>12.1f} x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(rows=args.rows, repeat=args.repeat)
@@ -0,0 +1,42 @@
+"""Compares the export writers of log_export on a synthetic log"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from generate_log import generate_log  # noqa: E402
+from log_export import WRITERS  # noqa: E402
+from log_file import LogFile  # noqa: E402
+
+
+def main(rows: int, formats: list) -> None:
+    with tempfile.TemporaryDirectory() as dir_temp:
+        file_log = Path(dir_temp) / "log.json"
+        generate_log(file=str(file_log), rows=rows)
+        log_file = LogFile(str(file_log), workers=1)
+        options = {"level_excludes": [], "col_excludes": []}
+        selection = log_file.selection(options=options)
+        print(f"rows: {rows:,}, log: {file_log.stat().st_size / 2**20:.1f} MB")
+        for export in formats:
+            file_export = Path(dir_temp) / f"export.{export}"
+            start = time.perf_counter()
+            log_file.export(file=str(file_export), options=options, selection=selection)
+            seconds = time.perf_counter() - start
+            print(
+                f"{export:<8} {seconds:>8.2f} s  {rows / seconds:>12,.0f} rows/s  "
+                f"{file_export.stat().st_size / 2**20:>8.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument(
+        "--formats", nargs="+", choices=list(WRITERS), default=list(WRITERS), help="The writers to compare"
+    )
+    args = parser.parse_args()
+    main(rows=args.rows, formats=args.formats)
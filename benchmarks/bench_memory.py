@@ -0,0 +1,35 @@
+"""Compares the memory footprint of a log parsed with object columns and with normalized dtypes"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from generate_log import generate_log  # noqa: E402
+from log_parser import normalize_dtypes  # noqa: E402
+
+
+def main(rows: int) -> None:
+    with tempfile.TemporaryDirectory() as dir_temp:
+        file_log = Path(dir_temp) / "log.json"
+        generate_log(file=str(file_log), rows=rows)
+        size_file = file_log.stat().st_size
+        df_log = pd.read_json(file_log, orient="records", lines=True)
+    usage_before = df_log.memory_usage(deep=True)
+    df_log = normalize_dtypes(df_log)
+    usage_after = df_log.memory_usage(deep=True)
+    df_usage = pd.DataFrame({"before": usage_before, "after": usage_after}) / 2**20
+    print(f"rows: {rows:,}, file: {size_file / 2**20:.1f} MB")
+    print(df_usage.round(1).to_string())
+    print(f"total: {usage_before.sum() / 2**20:.1f} MB -> {usage_after.sum() / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+    main(rows=args.rows)
@@ -0,0 +1,78 @@
+"""Compares the peak memory of reading a log as a whole with reading it in chunks from a memory map
+
+Each way of reading runs in its own process, which reports its peak resident set size.
+"""
+
+import argparse
+import io
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from generate_log import generate_log  # noqa: E402
+from log_file import LogFile  # noqa: E402
+from log_parser import normalize_dtypes  # noqa: E402
+
+# Bytes per generated entry, for generating a log of about the requested size
+BYTES_PER_ROW = 200
+
+
+def read_whole(file_log: str) -> int:
+    """The way a file was read before: all lines in memory, joined and parsed at once"""
+    with open(file_log, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+    df_log = pd.read_json(io.BytesIO(b"".join(lines)), orient="records", lines=True)
+    return normalize_dtypes(df_log).shape[0]
+
+
+def read_mapped(file_log: str) -> int:
+    log_file = LogFile(file_log=file_log, workers=1)
+    return log_file.row_count
+
+
+def measure(method: str, file_log: str) -> None:
+    """Reads the log and prints the rows, seconds and peak RSS in MB"""
+    time_start = time.perf_counter()
+    rows = {"whole": read_whole, "mapped": read_mapped}[method](file_log)
+    seconds = time.perf_counter() - time_start
+    # ru_maxrss is in kB on Linux
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{rows} {seconds} {rss_peak}")
+
+
+def main(size_mb: int) -> None:
+    with tempfile.TemporaryDirectory() as dir_temp:
+        file_log = str(Path(dir_temp) / "log.json")
+        generate_log(file=file_log, rows=size_mb * 2**20 // BYTES_PER_ROW)
+        size_file = Path(file_log).stat().st_size
+        print(f"file: {size_file / 2**20:.0f} MB")
+        for method in ["whole", "mapped"]:
+            result = subprocess.run(
+                [sys.executable, __file__, "--measure", method, file_log],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            rows, seconds, rss_peak = result.stdout.split()[-3:]
+            print(
+                f"{method:<7} {int(rows):>12,} rows  {float(seconds):>8.2f} s  "
+                f"peak RSS {float(rss_peak):>8.0f} MB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--measure", nargs=2, metavar=("METHOD", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(*args.measure)
+    else:
+        main(size_mb=args.size_mb)
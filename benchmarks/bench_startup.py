@@ -0,0 +1,108 @@
+"""Times the start of the viewer, from launching Python to the first frame and to the loaded log
+
+Each start runs in a new interpreter, so the imports are timed as a user sees them.
+The viewer runs headless on a synthetic log with the cache disabled. The time to the
+first frame is compared with a target, the median of the starts above it fails the run.
+
+Example:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --rows 1000000 --target 0.5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DIR_SRC = Path(__file__).resolve().parents[1] / "src"
+# The median time to the first frame in seconds that fails the run
+TARGET_FIRST_FRAME = 0.35
+# Modules that are only needed once a log is loaded or a dialog is opened
+DEFERRED_MODULES = ["pandas", "pyarrow", "openpyxl", "log_file", "log_cache", "dialog_export_log"]
+
+
+def probe(file_config: str, started: float) -> None:
+    """Starts the viewer, prints the times since the interpreter was launched as JSON and exits"""
+    sys.path.insert(0, str(DIR_SRC))
+    dict_times = {}
+    from config import ConfigFile
+    from log_viewer import LogViewer
+
+    dict_times["import"] = time.time() - started
+
+    class StartupProbe(LogViewer):
+        def on_ready(self) -> None:
+            dict_times["first_frame"] = time.time() - started
+            dict_times["deferred_loaded"] = [
+                module for module in DEFERRED_MODULES if module in sys.modules
+            ]
+
+        def _show_loaded(self, log_file) -> None:
+            super()._show_loaded(log_file)
+            dict_times["loaded"] = time.time() - started
+            self.exit()
+
+    app = StartupProbe(config_file=ConfigFile(file_config=file_config))
+    app.run(headless=True, size=(160, 50))
+    print(json.dumps(dict_times))
+
+
+def start(file_config: Path) -> dict:
+    """Launches a probe in a new interpreter in the directory of the config"""
+    started = time.time()
+    result = subprocess.run(
+        [sys.executable, __file__, "--probe", str(file_config), "--started", repr(started)],
+        cwd=file_config.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(args: argparse.Namespace) -> int:
+    sys.path.insert(0, str(DIR_SRC))
+    from generate_log import generate_log
+
+    with tempfile.TemporaryDirectory() as dir_temp:
+        file_log = Path(dir_temp) / "app.json"
+        generate_log(file=str(file_log), rows=args.rows)
+        file_config = Path(dir_temp) / "config.toml"
+        file_config.write_text(f'file_default = "{file_log.as_posix()}"\n\n[cache]\nenabled = false\n')
+        print(f"rows: {args.rows:,}, log: {file_log.stat().st_size / 2**20:.1f} MB")
+        # The first start warms the file system cache and the byte code of the modules
+        start(file_config)
+        lst_starts = [start(file_config) for _ in range(args.repeat)]
+    for stage in ["import", "first_frame", "loaded"]:
+        lst_seconds = [dict_times[stage] for dict_times in lst_starts]
+        print(
+            f"{stage:<12} median {1000 * statistics.median(lst_seconds):>8.0f} ms  "
+            f"min {1000 * min(lst_seconds):>8.0f} ms  max {1000 * max(lst_seconds):>8.0f} ms"
+        )
+    lst_deferred = lst_starts[-1]["deferred_loaded"]
+    print(f"deferred modules imported before the first frame: {', '.join(lst_deferred) or 'none'}")
+    first_frame = statistics.median(dict_times["first_frame"] for dict_times in lst_starts)
+    if first_frame > args.target:
+        print(f"The first frame took {1000 * first_frame:.0f} ms, above the target of {1000 * args.target:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--target", type=float, default=TARGET_FIRST_FRAME, help="The seconds to the first frame that fail the run"
+    )
+    parser.add_argument("--probe", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--started", type=float, default=0.0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.probe:
+        probe(file_config=args.probe, started=args.started)
+        sys.exit(0)
+    sys.exit(main(args))
@@ -0,0 +1,220 @@
+"""Times the hot paths of LogFile and the viewer on a synthetic log and compares them with a baseline
+
+Each case is timed without tracing, taking the best of the repeats, and run once
+more under tracemalloc for its peak memory. A case is a regression when it takes
+longer than the baseline by more than the tolerance and by more than a millisecond,
+so the cases that take microseconds do not report noise.
+
+Example:
+    python benchmarks/bench_suite.py --save-baseline    # after a change that is known to be good
+    python benchmarks/bench_suite.py                    # after upgrading pandas or textual
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from importlib import metadata
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from generate_log import generate_log, parse_levels  # noqa: E402
+from log_file import LogFile  # noqa: E402
+
+FILE_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+# Slowdowns below this many seconds are noise, whatever the relative change
+MIN_REGRESSION_SECONDS = 0.001
+LEVEL_COLORS = {
+    "DEBUG": "grey62",
+    "INFO": "steel_blue3",
+    "WARNING": "dark_orange",
+    "ERROR": "red",
+}
+PACKAGES = ["pandas", "numpy", "pyarrow", "textual", "openpyxl"]
+
+
+def measure(func, repeat: int) -> tuple:
+    """The best time of a function over repeats and its peak traced memory
+
+    Returns:
+        tuple: The seconds and the peak memory in bytes
+    """
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = min(seconds, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def log_file_cases(file_log: Path, dir_temp: str, export_format: str) -> list:
+    """The cases of LogFile, in an order in which each one starts from the state it needs
+
+    Returns:
+        list: Tuples of the name of a case and the function to time
+    """
+    log_file = LogFile(str(file_log), workers=1)
+    run = log_file.runs[0]["process"]
+    options = {"level_excludes": ["DEBUG", "INFO"], "col_excludes": []}
+    file_export = str(Path(dir_temp) / f"export.{export_format}")
+    return [
+        ("load", lambda: LogFile(str(file_log), load=False, workers=1)._load_file()),
+        ("runs", lambda: log_file.runs),
+        ("filter_runs", lambda: log_file.filter_runs([run])),
+        ("filter_all", lambda: log_file.filter_values({"process": None})),
+        ("filtered", lambda: log_file.filtered(options=options)),
+        ("entries_formatted", lambda: log_file.entries_formatted(level_colors=LEVEL_COLORS)),
+        ("export", lambda: log_file.export(file=file_export, options=options)),
+    ]
+
+
+def populate_table_case(file_log: Path, dir_temp: str, repeat: int) -> tuple:
+    """Times LogViewer.populate_table in a headless app, including rendering the table"""
+    # The viewer imports Textual, which is only needed for this case
+    from config import ConfigFile
+    from log_viewer import LogViewer
+
+    file_config = Path(dir_temp) / "config.toml"
+    file_config.write_text(f'file_default = "{file_log.as_posix()}"\n\n[cache]\nenabled = false\n')
+    result = {}
+
+    async def run() -> None:
+        app = LogViewer(config_file=ConfigFile(file_config=str(file_config)))
+        async with app.run_test(size=(160, 50)) as pilot:
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+
+            async def populate() -> None:
+                app.populate_table()
+                await pilot.pause()
+
+            seconds = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                await populate()
+                seconds = min(seconds, time.perf_counter() - start)
+            tracemalloc.start()
+            await populate()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result["populate_table"] = (seconds, peak)
+
+    asyncio.run(run())
+    return result["populate_table"]
+
+
+def compare(dict_results: dict, dict_baseline: dict, tolerance: float) -> list:
+    """Prints the results next to the baseline
+
+    Returns:
+        list: The names of the cases that regressed
+    """
+    lst_regressions = []
+    print(f"{'case':<18} {'ms':>10} {'rows/s':>15} {'peak MB':>9} {'baseline ms':>12} {'change':>8}")
+    for case, result in dict_results.items():
+        line = (
+            f"{case:<18} {1000 * result['seconds']:>10.3f} {result['rows_per_second']:>15,.0f} "
+            f"{result['peak_mb']:>9.1f}"
+        )
+        baseline = dict_baseline.get(case)
+        if baseline is not None:
+            change = result["seconds"] / baseline["seconds"] - 1
+            line = f"{line} {1000 * baseline['seconds']:>12.3f} {change:>+8.0%}"
+            slowdown = result["seconds"] - baseline["seconds"]
+            if change > tolerance and slowdown > MIN_REGRESSION_SECONDS:
+                lst_regressions.append(case)
+                line = f"{line}  REGRESSION"
+        print(line)
+    return lst_regressions
+
+
+def main(args: argparse.Namespace) -> int:
+    dict_results = {}
+    with tempfile.TemporaryDirectory() as dir_temp:
+        file_log = Path(dir_temp) / "log.json"
+        generate_log(
+            file=str(file_log),
+            rows=args.rows,
+            processes=args.processes,
+            level_weights=args.levels,
+            message_min=args.message_min,
+            message_max=args.message_max,
+        )
+        print(f"rows: {args.rows:,}, log: {file_log.stat().st_size / 2**20:.1f} MB")
+        lst_cases = log_file_cases(file_log, dir_temp, export_format=args.export_format)
+        for case, func in lst_cases:
+            dict_results[case] = measure(func, repeat=args.repeat)
+        if not args.no_viewer:
+            dict_results["populate_table"] = populate_table_case(
+                file_log, dir_temp, repeat=args.repeat
+            )
+    dict_results = {
+        case: {
+            "seconds": seconds,
+            "rows_per_second": args.rows / seconds,
+            "peak_mb": peak / 2**20,
+        }
+        for case, (seconds, peak) in dict_results.items()
+    }
+    # The results only compare for the same log and export
+    dict_params = {
+        "rows": args.rows,
+        "processes": args.processes,
+        "levels": args.levels,
+        "message_min": args.message_min,
+        "message_max": args.message_max,
+        "export_format": args.export_format,
+    }
+    dict_baseline = {}
+    if FILE_BASELINE.exists() and not args.save_baseline:
+        baseline = json.loads(FILE_BASELINE.read_text())
+        if baseline["params"] != dict_params:
+            print(f"The baseline was measured with {baseline['params']}, not comparing")
+        else:
+            dict_baseline = baseline["results"]
+    lst_regressions = compare(dict_results, dict_baseline, tolerance=args.tolerance)
+    if args.save_baseline:
+        baseline = {
+            "params": dict_params,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "packages": {package: metadata.version(package) for package in PACKAGES},
+            "results": dict_results,
+        }
+        FILE_BASELINE.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Saved the baseline to '{FILE_BASELINE}'")
+    if lst_regressions:
+        print(f"Regressions beyond {args.tolerance:.0%}: {lst_regressions}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--processes", type=int, default=10)
+    parser.add_argument(
+        "--levels",
+        type=parse_levels,
+        default=None,
+        help="The share of each level, e.g. DEBUG=50,INFO=35,WARNING=10,ERROR=5",
+    )
+    parser.add_argument("--message-min", type=int, default=10)
+    parser.add_argument("--message-max", type=int, default=120)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--export-format", default="xlsx", help="The format of the export case")
+    parser.add_argument("--no-viewer", action="store_true", help="Skip the populate_table case")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="The slowdown reported as a regression"
+    )
+    parser.add_argument("--save-baseline", action="store_true", help=f"Store the results in {FILE_BASELINE.name}")
+    sys.exit(main(parser.parse_args()))
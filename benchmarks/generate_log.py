@@ -0,0 +1,93 @@
+"""Generates synthetic logs in the shape written by logging_config.LOGGING"""
+
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+
+MODULES = {
+    "config": ["_read_file", "_read_path_str", "_read_list", "_write_file"],
+    "log_file": ["_load_file", "load", "export", "filter_runs"],
+    "log_viewer": ["populate_table", "action_reload_log", "on_row_selected"],
+    "selector_events": ["__init__"],
+}
+# The share of each level in the entries
+LEVEL_WEIGHTS = {"DEBUG": 50, "INFO": 35, "WARNING": 10, "ERROR": 5}
+
+
+def generate_log(
+    file: str,
+    rows: int,
+    processes: int = 10,
+    seed: int = 42,
+    level_weights: dict = None,
+    message_min: int = 10,
+    message_max: int = 120,
+) -> None:
+    """Writes a JSON lines log with one run per process, in chronological order
+
+    Args:
+        file (str): The path of the log to write
+        rows (int): The number of log entries
+        processes (int, optional): The number of runs in the log. Defaults to 10.
+        seed (int, optional): Seed for reproducible logs. Defaults to 42.
+        level_weights (dict, optional): The share of each level in the entries. Defaults to None for LEVEL_WEIGHTS.
+        message_min (int, optional): The least padding of a message. Defaults to 10.
+        message_max (int, optional): The most padding of a message. Defaults to 120.
+    """
+    rng = random.Random(seed)
+    level_weights = level_weights or LEVEL_WEIGHTS
+    levels = list(level_weights.keys())
+    weights = list(level_weights.values())
+    modules = list(MODULES.keys())
+    time_entry = datetime(2025, 1, 22, 23, 7, 22)
+    rows_per_process = max(rows // processes, 1)
+    process = 30000
+    with open(file, "w") as f:
+        for i in range(rows):
+            if i % rows_per_process == 0:
+                process = process + rng.randint(1, 5000)
+                time_entry = time_entry + timedelta(minutes=rng.randint(1, 600))
+            time_entry = time_entry + timedelta(milliseconds=rng.randint(0, 50))
+            module = rng.choice(modules)
+            entry = {
+                "asctime": time_entry.strftime("%Y-%m-%d %H:%M:%S,%f")[:-3],
+                "levelname": rng.choices(levels, weights=weights)[0],
+                "message": f"Message {i} " + "x" * rng.randint(message_min, message_max),
+                "module": module,
+                "funcName": rng.choice(MODULES[module]),
+                "process": process,
+            }
+            f.write(json.dumps(entry) + "\n")
+
+
+def parse_levels(text: str) -> dict:
+    """Parses level weights like DEBUG=50,INFO=35"""
+    return {
+        level.strip(): float(weight)
+        for level, weight in (item.split("=", 1) for item in text.split(","))
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("file", help="The log file to write")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--processes", type=int, default=10)
+    parser.add_argument(
+        "--levels",
+        type=parse_levels,
+        default=None,
+        help="The share of each level, e.g. DEBUG=50,INFO=35,WARNING=10,ERROR=5",
+    )
+    parser.add_argument("--message-min", type=int, default=10)
+    parser.add_argument("--message-max", type=int, default=120)
+    args = parser.parse_args()
+    generate_log(
+        file=args.file,
+        rows=args.rows,
+        processes=args.processes,
+        level_weights=args.levels,
+        message_min=args.message_min,
+        message_max=args.message_max,
+    )
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BitmapIndex:
+    """Bitmaps of the rows holding each value of columns with few distinct values
+
+    A bitmap has a bit per row, packed 8 rows to a byte, so combining filters is a
+    bitwise OR over the values of a column and an AND over the columns, touching
+    rows/8 bytes per value instead of scanning the column. The bitmaps grow by
+    doubling their capacity, so appending rows costs time proportional to the rows
+    appended.
+    """
+
+    def __init__(self, columns: list):
+        """
+        Args:
+            columns (list): The columns to index
+        """
+        self._columns = columns
+        self._bitmaps: dict = {col: {} for col in columns}
+        self._qty_rows = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            bitmap.nbytes
+            for dict_bitmaps in self._bitmaps.values()
+            for bitmap in dict_bitmaps.values()
+        )
+
+    def clear(self) -> None:
+        self._bitmaps = {col: {} for col in self._columns}
+        self._qty_rows = 0
+
+    def values(self, column: str) -> list:
+        """The values of a column that occur in the indexed rows"""
+        return list(self._bitmaps[column].keys())
+
+    def add(self, df_log: pd.DataFrame) -> None:
+        """Indexes rows appended to the log
+
+        Args:
+            df_log (pd.DataFrame): The appended rows
+        """
+        qty_new = df_log.shape[0]
+        if qty_new == 0:
+            return
+        start = self._qty_rows
+        qty_rows = start + qty_new
+        for col in self._columns:
+            if col not in df_log.columns:
+                continue
+            series = df_log[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes = series.cat.codes.to_numpy()
+                values = series.cat.categories.tolist()
+            else:
+                codes, uniques = pd.factorize(series)
+                values = uniques.tolist()
+            dict_bitmaps = self._bitmaps[col]
+            for code in np.unique(codes[codes >= 0]):
+                bitmap = dict_bitmaps.get(values[code], np.zeros(0, dtype=np.uint8))
+                dict_bitmaps[values[code]] = self._set_bits(bitmap, start, codes == code)
+        self._qty_rows = qty_rows
+
+    @staticmethod
+    def _set_bits(bitmap: np.ndarray, start: int, bits: np.ndarray) -> np.ndarray:
+        """Writes bits for the rows from start on, growing the bitmap when needed"""
+        byte_start = start // 8
+        qty_bytes = (start + len(bits) + 7) // 8
+        if qty_bytes > len(bitmap):
+            bitmap_grown = np.zeros(max(qty_bytes, 2 * len(bitmap)), dtype=np.uint8)
+            bitmap_grown[: len(bitmap)] = bitmap
+            bitmap = bitmap_grown
+        bits_partial = start % 8
+        if bits_partial > 0:
+            # The first byte holds bits of rows before start
+            bits_before = np.unpackbits(bitmap[byte_start : byte_start + 1])[:bits_partial]
+            bits = np.concatenate([bits_before.astype(bool), bits])
+        packed = np.packbits(bits)
+        bitmap[byte_start : byte_start + len(packed)] = packed
+        return bitmap
+
+    def mask(self, dict_filters: dict, start: int = 0) -> np.ndarray:
+        """The rows matching filters on the indexed columns
+
+        Args:
+            dict_filters (dict): For each filtered column the values to include, columns not in it are not filtered
+            start (int, optional): The first row, only the bytes of the rows from there on are combined. Defaults to 0.
+
+        Returns:
+            np.ndarray: Whether each row from start matches, a value of any included value for all filtered columns
+        """
+        byte_start = start // 8
+        qty_bytes = (self._qty_rows + 7) // 8 - byte_start
+        bitmap = np.full(qty_bytes, 0xFF, dtype=np.uint8)
+        for col, lst_values in dict_filters.items():
+            bitmap_col = np.zeros(qty_bytes, dtype=np.uint8)
+            dict_bitmaps = self._bitmaps[col]
+            for value in lst_values:
+                bitmap_value = dict_bitmaps.get(value)
+                if bitmap_value is not None:
+                    # A bitmap ends after the last byte written for its value
+                    bitmap_value = bitmap_value[byte_start : byte_start + qty_bytes]
+                    bitmap_col[: len(bitmap_value)] |= bitmap_value
+            np.bitwise_and(bitmap, bitmap_col, out=bitmap)
+        bits = np.unpackbits(bitmap, count=self._qty_rows - 8 * byte_start).view(bool)
+        return bits[start - 8 * byte_start :]
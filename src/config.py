@@ -22,6 +22,22 @@ class ConfigFile:
             },
             "file_default": "",
             "dir_default": "",
+            "cache": {
+                "enabled": True,
+                "dir": "",
+                "max_size_mb": 1024,
+            },
+            "parser": {
+                "workers": 0,
+                "parallel_min_mb": 64,
+                "lazy": False,
+                "decoder": "auto",
+            },
+            "instrumentation": {
+                "enabled": False,
+                "profile": "",
+                "dir_profile": "",
+            },
         }
         self._read_file()
 
@@ -88,6 +104,18 @@ class ConfigFile:
         self._data["export"]["level_excludes"] = value
         self._write_file()
 
+    @property
+    def cache_options(self) -> dict:
+        return self._data["cache"]
+
+    @property
+    def parser_options(self) -> dict:
+        return self._data["parser"]
+
+    @property
+    def instrumentation_options(self) -> dict:
+        return self._data["instrumentation"]
+
     def _read_file(self):
         if Path(self._file).exists():
             logger.debug(f"Found config file '{self._file}'")
@@ -98,6 +126,16 @@ class ConfigFile:
             self._read_dict(setting="level_colors")
             self._read_list(setting="col_excludes", section="export")
             self._read_list(setting="level_excludes", section="export")
+            self._read_value(setting="enabled", section="cache")
+            self._read_value(setting="dir", section="cache")
+            self._read_value(setting="max_size_mb", section="cache")
+            self._read_value(setting="workers", section="parser")
+            self._read_value(setting="parallel_min_mb", section="parser")
+            self._read_value(setting="lazy", section="parser")
+            self._read_value(setting="decoder", section="parser")
+            self._read_value(setting="enabled", section="instrumentation")
+            self._read_value(setting="profile", section="instrumentation")
+            self._read_value(setting="dir_profile", section="instrumentation")
         else:
             logger.warning(f"Found no config file '{self._file}'")
 
@@ -141,6 +179,9 @@ class ConfigFile:
             logger.debug("Config file 'level_colors' used")
 
     def _read_list(self, setting: str, section: str=None) -> None:
+        self._read_value(setting=setting, section=section)
+
+    def _read_value(self, setting: str, section: str=None) -> None:
         if section is None:
             if setting not in self._data:
                 logger.warning(f"Config file setting '{setting}' not present")
@@ -152,8 +193,7 @@ class ConfigFile:
                     self._data[section][setting] = self._defaults[section][setting]
             else:
                 logger.warning(f"Config file section '{section}' not present")
-                self._data[section] = {}
-                self._data[section][setting] = self._defaults[section][setting]
+                self._data[section] = dict(self._defaults[section])
 
     def _write_file(self) -> None:
         with open(self._file.stem + ".toml", "w") as f:
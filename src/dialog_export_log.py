@@ -6,6 +6,7 @@ from textual.containers import Grid, Horizontal
 from textual.screen import ModalScreen
 from textual.widgets import Button, DirectoryTree, Header, Input, Label
 
+from log_export import SUFFIXES, export_format
 from logging_config import logging
 
 logger = logging.getLogger(__name__)
@@ -33,6 +34,11 @@ class DialogExportLog(ModalScreen):
         align: right bottom;
     }
 
+    #format{
+        width: 1fr;
+        padding: 1 0;
+    }
+
     #save_file {
         background: green;
     }
@@ -60,6 +66,7 @@ class DialogExportLog(ModalScreen):
             DirectoryTree(self._root, id="directory"),
             Input(placeholder="export.xlsx", id="filename"),
             Horizontal(
+                Label(self._format_text("export.xlsx"), id="format"),
                 Button("Cancel", variant="error", id="cancel_file"),
                 Button("Save File", variant="primary", id="save_file"),
                 id="btns_dialog"
@@ -72,6 +79,7 @@ class DialogExportLog(ModalScreen):
         Focus the input widget so the user can name the file
         """
         self.query_one("#filename").focus()
+        self.query_one("#format").tooltip = f"Chosen by the extension: {', '.join(SUFFIXES)}"
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """
@@ -87,6 +95,16 @@ class DialogExportLog(ModalScreen):
         else:
             self.dismiss(False)
 
+    @staticmethod
+    def _format_text(filename: str) -> str:
+        return f"Format: {export_format(filename, default='xlsx')}"
+
+    @on(Input.Changed, "#filename")
+    def on_filename_changed(self, event: Input.Changed) -> None:
+        """Shows the format the file is exported in, chosen by its extension"""
+        filename = event.value or self.query_one("#filename").placeholder
+        self.query_one("#format").update(self._format_text(filename))
+
     @on(DirectoryTree.DirectorySelected)
     def on_directory_selection(self, event: DirectoryTree.DirectorySelected) -> None:
         """
@@ -97,7 +97,8 @@ class DialogExportOptions(ModalScreen):
         """
         level_names = ["DEBUG", "INFO", "WARNING", "ERROR"]
         level_excludes = self._config.export_level_excludes
-        cols_log = self._log_file.headers
+        # The exported columns, in lazy mode these include the ones read from the file
+        cols_log = list(self._log_file.selection().columns)
         col_excludes = self._config.export_col_excludes
         yield Grid(
             Header(),
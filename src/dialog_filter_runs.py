@@ -1,9 +1,11 @@
+import pandas as pd
 from textual.app import ComposeResult
 from textual.containers import Grid, Horizontal
 from textual.screen import ModalScreen
 from textual.widgets import Button, Header, Label, SelectionList
 
 from log_file import LogFile
+from log_parser import FORMAT_ASCTIME
 from logging_config import logging
 
 logger = logging.getLogger(__name__)
@@ -57,7 +59,10 @@ class DialogFilterRuns(ModalScreen):
         """
         Create the widgets for the OpenFileDialog's user interface
         """
-        lst_runs = self._lst_runs
+        lst_runs = [
+            (self._run_prompt(run), run["process"], i == 0)
+            for i, run in enumerate(self._lst_runs)
+        ]
         yield Grid(
             Header(),
             Label("Select the runs you want to include in the log selection"),
@@ -70,6 +75,24 @@ class DialogFilterRuns(ModalScreen):
             id="dialog_select_run",
         )
 
+    @staticmethod
+    def _run_prompt(run: dict) -> str:
+        """Describes a run by its last entry, duration and number of errors and warnings"""
+        if pd.isna(run["asctime_last"]):
+            # None of the entries of the run has a time
+            asctime_last = f"{'no time':<23}"
+            duration = ""
+        else:
+            asctime_last = run["asctime_last"].strftime(FORMAT_ASCTIME)[:-3]
+            seconds = int((run["asctime_last"] - run["asctime_first"]).total_seconds())
+            duration = f"{seconds // 3600}:{seconds % 3600 // 60:02}:{seconds % 60:02}"
+        qty_errors = run["levels"].get("ERROR", 0) + run["levels"].get("CRITICAL", 0)
+        qty_warnings = run["levels"].get("WARNING", 0)
+        return (
+            f"{asctime_last}  {duration:>9}  {run['qty_entries']:>8} entries  "
+            f"{qty_errors:>6} errors  {qty_warnings:>6} warnings  (process {run['process']})"
+        )
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """
         Event handler for when the load file button is pressed
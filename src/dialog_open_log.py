@@ -5,7 +5,7 @@ from textual import on
 from textual.app import ComposeResult
 from textual.containers import Grid, Horizontal
 from textual.screen import ModalScreen
-from textual.widgets import Button, DirectoryTree, Header, Label
+from textual.widgets import Button, Checkbox, DirectoryTree, Header, Label
 
 from logging_config import logging
 
@@ -62,6 +62,7 @@ class DialogOpenLog(ModalScreen):
             Label(f"Folder name: {self.root}", id="folder"),
             FilteredDirectoryTree(self.root, id="directory"),
             Horizontal(
+                Checkbox("Include rotated files", id="rotated"),
                 Button("Cancel", variant="error", id="cancel_file"),
                 Button("Open File", variant="primary", id="open_file", disabled=True),
                 id="btns_dialog"
@@ -81,7 +82,11 @@ class DialogOpenLog(ModalScreen):
         """
         event.stop()
         if event.button.id == "open_file":
-            self.dismiss(self.file_selected)
+            dict_selection = {
+                "file": str(self.file_selected),
+                "rotated": self.query_one("#rotated").value,
+            }
+            self.dismiss(dict_selection)
         else:
             self.dismiss(False)
 
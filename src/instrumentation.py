@@ -0,0 +1,165 @@
+"""Opt-in timing of the stages of loading, filtering, showing and exporting a log
+
+When enabled, each stage records its wall time, the rows it handled and the change
+in resident memory. The record is logged through the JSON logger of logging_config,
+with the measurements as fields, and added to per-stage totals for the viewer.
+When disabled, a stage costs a function call.
+
+Instrumentation is enabled by the [instrumentation] section of config.toml or the
+environment variable LOGVIEWER_INSTRUMENT=1. Setting a stage to profile, in the
+config or with LOGVIEWER_PROFILE=<stage>, runs the next call of that stage under
+cProfile and tracemalloc and writes both results to files.
+"""
+
+import cProfile
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+ENV_ENABLED = "LOGVIEWER_INSTRUMENT"
+ENV_PROFILE = "LOGVIEWER_PROFILE"
+# The stages that are recorded, in the order the viewer shows them
+STAGES = ["load", "parse", "sort", "filter", "format", "table_fill", "export"]
+
+_settings = {
+    "enabled": os.environ.get(ENV_ENABLED, "").lower() not in ("", "0", "false"),
+    "profile": os.environ.get(ENV_PROFILE, ""),
+    "dir_profile": "",
+}
+_lock = threading.Lock()
+_dict_stats: dict = {}
+
+
+def configure(enabled: bool = False, profile: str = "", dir_profile: str = "") -> None:
+    """Sets up instrumentation from the config, the environment variables take precedence
+
+    Args:
+        enabled (bool, optional): Record the stages. Defaults to False.
+        profile (str, optional): A stage to profile the next call of. Defaults to "" for none.
+        dir_profile (str, optional): The directory of the profiles. Defaults to "" for the working directory.
+    """
+    _settings["enabled"] = _settings["enabled"] or enabled
+    _settings["profile"] = os.environ.get(ENV_PROFILE, "") or profile
+    _settings["dir_profile"] = dir_profile
+    if _settings["enabled"]:
+        logger.info(f"Instrumentation enabled, profiling '{_settings['profile'] or 'nothing'}'")
+
+
+def is_enabled() -> bool:
+    return _settings["enabled"]
+
+
+def _memory() -> int:
+    """The resident memory of the process in bytes, 0 when it cannot be read"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+@contextmanager
+def stage(name: str) -> Iterator[dict]:
+    """Records a stage when instrumentation is enabled
+
+    Example:
+        with stage("filter") as record:
+            ...
+            record["rows"] = len(idx_selected)
+
+    Args:
+        name (str): The name of the stage, one of STAGES
+
+    Yields:
+        dict: The record, the stage can add the number of rows it handled and other fields
+    """
+    record = {}
+    if not _settings["enabled"]:
+        yield record
+        return
+    profiler = None
+    with _lock:
+        if _settings["profile"] == name:
+            # Only the next call is profiled
+            _settings["profile"] = ""
+            profiler = cProfile.Profile()
+    if profiler is not None:
+        tracemalloc.start()
+        profiler.enable()
+    memory_start = _memory()
+    time_start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        seconds = time.perf_counter() - time_start
+        memory_delta = _memory() - memory_start
+        if profiler is not None:
+            profiler.disable()
+            _dump_profile(name, profiler, tracemalloc.take_snapshot())
+            tracemalloc.stop()
+        _record(name, seconds=seconds, memory_delta=memory_delta, record=record)
+
+
+def _record(name: str, seconds: float, memory_delta: int, record: dict) -> None:
+    rows = record.get("rows", 0)
+    with _lock:
+        stats = _dict_stats.setdefault(
+            name, {"stage": name, "calls": 0, "seconds": 0.0, "rows": 0, "seconds_last": 0.0}
+        )
+        stats["calls"] = stats["calls"] + 1
+        stats["seconds"] = stats["seconds"] + seconds
+        stats["rows"] = stats["rows"] + rows
+        stats["seconds_last"] = seconds
+        stats["memory_delta_last"] = memory_delta
+    logger.info(
+        f"Stage '{name}' took {1000 * seconds:.1f} ms for {rows} rows",
+        extra=dict(record, stage=name, seconds=seconds, rows=rows, memory_delta=memory_delta),
+    )
+
+
+def _dump_profile(name: str, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot) -> None:
+    """Writes the cProfile statistics and the top allocations of a profiled stage"""
+    dir_profile = Path(_settings["dir_profile"] or ".")
+    dir_profile.mkdir(parents=True, exist_ok=True)
+    file_base = dir_profile / f"{name}-{datetime.now():%Y%m%d-%H%M%S}"
+    profiler.dump_stats(f"{file_base}.prof")
+    with open(f"{file_base}-memory.txt", "w") as f:
+        for stat in snapshot.statistics("lineno")[:50]:
+            f.write(f"{stat}\n")
+    logger.info(f"Profiled stage '{name}' to '{file_base}.prof' and '{file_base}-memory.txt'")
+
+
+def stats() -> list:
+    """The totals of the recorded stages, in the order of STAGES
+
+    Returns:
+        list: A dict per stage with stage, calls, seconds, rows, seconds_last and memory_delta_last
+    """
+    with _lock:
+        return sorted(
+            (dict(stats) for stats in _dict_stats.values()),
+            key=lambda stats: (
+                STAGES.index(stats["stage"]) if stats["stage"] in STAGES else len(STAGES)
+            ),
+        )
+
+
+def clear() -> None:
+    with _lock:
+        _dict_stats.clear()
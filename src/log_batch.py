@@ -0,0 +1,245 @@
+"""Filters and exports logs without the viewer
+
+Each log is loaded with LogFile, filtered on runs, time and a query and exported a
+chunk of rows at a time. The logs are processed concurrently in worker processes.
+
+Example:
+    python src/main.py logs/*.json --last-runs 1 --exclude-level DEBUG --format parquet -o exports
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from log_export import WRITERS
+from log_file import LogFile
+from log_parser import COLUMNS_LAZY
+from log_query import parse_query
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+
+def batch_query(query: str = "", since: str = None, until: str = None) -> str:
+    """A query with clauses on asctime added for a time span
+
+    Args:
+        query (str, optional): A query, see log_query.parse_query. Defaults to "".
+        since (str, optional): The time of the first entry. Defaults to None.
+        until (str, optional): The time of the last entry. Defaults to None.
+
+    Returns:
+        str: The query
+    """
+    lst_clauses = [query] if query else []
+    if since:
+        lst_clauses.append(f'asctime>="{since}"')
+    if until:
+        lst_clauses.append(f'asctime<="{until}"')
+    return " ".join(lst_clauses)
+
+
+def _run_value(run: str):
+    """A process given on the command line, as a number when it is one"""
+    return int(run) if run.isdigit() else run
+
+
+def is_lazy_query(query: str) -> bool:
+    """Whether a query refers to a column that lazy mode leaves in the file, like the
+    message of a bare word; such a query reads the column of every entry from the file"""
+    return any(clause.field in COLUMNS_LAZY for clause in parse_query(query))
+
+
+def export_paths(lst_files: list, output_dir: str, format: str) -> list:
+    """The path of the export of each log, beside the log or in an output directory
+
+    In the output directory the exports keep the directories of the logs below their
+    common directory, so logs of the same name, like the log.json of each service,
+    get an export each.
+
+    Args:
+        lst_files (list): The log files
+        output_dir (str): The directory of the exports, None to export beside each log
+        format (str): The export format, see log_export.WRITERS
+
+    Returns:
+        list: The path of the export of each log file
+    """
+    if not output_dir:
+        return [str(Path(file).parent / f"{Path(file).name}.{format}") for file in lst_files]
+    lst_paths = [Path(file).resolve() for file in lst_files]
+    dir_common = Path(os.path.commonpath([path.parent for path in lst_paths]))
+    return [
+        str(Path(output_dir) / path.parent.relative_to(dir_common) / f"{path.name}.{format}")
+        for path in lst_paths
+    ]
+
+
+def export_log(file: str, file_export: str, options: dict) -> dict:
+    """Loads a log, filters it and exports the selected entries
+
+    Args:
+        file (str): The path of the log file
+        file_export (str): The path of the export, its suffix selects the format
+        options (dict): rotated, lazy, decoder, runs, last_runs, query, level_excludes and col_excludes
+
+    Returns:
+        dict: The file, the export (None when no entries are selected), the number of entries exported and the number of rejected lines
+    """
+    if not Path(file).is_file():
+        raise FileNotFoundError(f"Log file '{file}' does not exist")
+    # Loading the messages at once is faster than reading each one for the query
+    lazy = options["lazy"] and not is_lazy_query(options["query"])
+    log_file = LogFile(
+        file,
+        rotated=options["rotated"],
+        workers=1,
+        lazy=lazy,
+        decoder=options["decoder"],
+    )
+    lst_runs = [_run_value(run) for run in options["runs"]]
+    if options["last_runs"] > 0:
+        lst_runs += [run["process"] for run in log_file.runs[: options["last_runs"]]]
+    if lst_runs:
+        log_file.filter_runs(lst_runs)
+    if options["query"]:
+        log_file.filter_query(options["query"])
+    export_options = {
+        "level_excludes": options["level_excludes"],
+        "col_excludes": options["col_excludes"],
+    }
+    selection = log_file.selection(options=export_options)
+    is_exported = log_file.export(file=file_export, options=export_options, selection=selection)
+    return {
+        "file": file,
+        "export": file_export if is_exported else None,
+        "qty_entries": len(selection.rows),
+        "qty_rejected": log_file.qty_rejected,
+    }
+
+
+def export_logs(lst_jobs: list, options: dict, workers: int):
+    """Exports logs, in worker processes when there is more than one
+
+    Args:
+        lst_jobs (list): Tuples of a log file and the path of its export
+        options (dict): The options of export_log
+        workers (int): The maximum number of worker processes
+
+    Yields:
+        tuple: A log file with the result of export_log for it, or the exception raised, in order of completion
+    """
+    if len(lst_jobs) < 2 or workers < 2:
+        for file, file_export in lst_jobs:
+            try:
+                yield file, export_log(file, file_export, options)
+            except Exception as e:
+                yield file, e
+        return
+    executor = ProcessPoolExecutor(
+        max_workers=min(workers, len(lst_jobs)), mp_context=multiprocessing.get_context("spawn")
+    )
+    try:
+        futures = {
+            executor.submit(export_log, file, file_export, options): file
+            for file, file_export in lst_jobs
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="logviewer",
+        description="Filters JSON lines logs and exports them without the viewer",
+    )
+    parser.add_argument("files", nargs="+", help="Log files or glob patterns")
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        default=None,
+        help="Directory of the exports, keeping the directories of the logs below their common directory (default: beside each log)",
+    )
+    parser.add_argument("-f", "--format", choices=list(WRITERS), default="xlsx")
+    parser.add_argument(
+        "--run", action="append", default=[], dest="runs", help="A process to export (repeatable)"
+    )
+    parser.add_argument(
+        "--last-runs", type=int, default=0, help="Export the N runs with the latest entries"
+    )
+    parser.add_argument("--since", default=None, help='Start time, e.g. "2024-01-01 10:00"')
+    parser.add_argument("--until", default=None, help="End time")
+    parser.add_argument("--query", default="", help='e.g. \'levelname>=WARNING module:config\'')
+    parser.add_argument(
+        "--exclude-level", action="append", default=[], dest="level_excludes", help="(repeatable)"
+    )
+    parser.add_argument(
+        "--exclude-column", action="append", default=[], dest="col_excludes", help="(repeatable)"
+    )
+    parser.add_argument(
+        "--rotated", action="store_true", help="Also load the files each log was rotated to"
+    )
+    parser.add_argument(
+        "--lazy",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Leave the messages in the file until they are exported, unless the query searches them (default: on)",
+    )
+    parser.add_argument("--decoder", default="auto", help="JSON decoder, see log_decoders")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=0, help="Logs processed at once (default: CPUs)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> int:
+    args = parse_args(argv)
+    lst_files = []
+    set_resolved = set()
+    for pattern in args.files:
+        lst_matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for file in lst_matches:
+            # A log given twice, also by another path, is exported once
+            if Path(file).resolve() not in set_resolved:
+                set_resolved.add(Path(file).resolve())
+                lst_files.append(file)
+    if not lst_files:
+        print("No log files found", file=sys.stderr)
+        return 1
+    lst_jobs = list(zip(lst_files, export_paths(lst_files, args.output_dir, args.format)))
+    for _, file_export in lst_jobs:
+        os.makedirs(Path(file_export).parent, exist_ok=True)
+    options = {
+        "rotated": args.rotated,
+        "lazy": args.lazy,
+        "decoder": args.decoder,
+        "runs": args.runs,
+        "last_runs": args.last_runs,
+        "query": batch_query(query=args.query, since=args.since, until=args.until),
+        "level_excludes": args.level_excludes,
+        "col_excludes": args.col_excludes,
+    }
+    workers = args.workers or os.cpu_count() or 1
+    qty_failed = 0
+    for file, result in export_logs(lst_jobs, options=options, workers=workers):
+        if isinstance(result, Exception):
+            qty_failed = qty_failed + 1
+            logger.error(f"Exporting '{file}' failed: {result}")
+            print(f"{file}: {type(result).__name__}: {result}", file=sys.stderr)
+            continue
+        rejected = f", {result['qty_rejected']} rejected lines" if result["qty_rejected"] else ""
+        if result["export"] is None:
+            print(f"{file}: no entries to export{rejected}")
+            continue
+        logger.info(f"Exported {result['qty_entries']} entries of '{file}' to '{result['export']}'")
+        print(f"{file} -> {result['export']}: {result['qty_entries']} entries{rejected}")
+    return 1 if qty_failed > 0 else 0
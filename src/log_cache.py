@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import platformdirs
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from log_parser import COLUMN_LINE_OFFSET
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LogCache:
+    """Stores parsed logs as uncompressed Feather files, so reopening an unchanged log
+    is a memory-mapped read instead of a JSON parse
+
+    Entries are keyed by a fingerprint of the log files (path, size, modification time
+    and a hash of their head and tail), the least recently used entries are removed
+    when the cache outgrows its maximum size. Logs loaded in lazy mode are cached
+    separately, with the line offsets of their entries as a NumPy array next to them.
+    The postings of the search index are stored next to a log as an Arrow file with a
+    record batch per segment, so a cached log is not tokenized again.
+    """
+
+    MIN_BYTES = 1024 * 1024
+    SAMPLE_BYTES = 64 * 1024
+
+    def __init__(self, dir_cache: str = "", max_size_mb: int = 1024, enabled: bool = True):
+        """
+        Args:
+            dir_cache (str, optional): Directory of the cache. Defaults to "" for the user cache directory.
+            max_size_mb (int, optional): Maximum total size of the cache in MB. Defaults to 1024.
+            enabled (bool, optional): Whether logs are cached. Defaults to True.
+        """
+        if dir_cache == "":
+            dir_cache = platformdirs.user_cache_dir("logviewer")
+        self._dir = Path(dir_cache)
+        self._max_bytes = max_size_mb * 1024 * 1024
+        self._enabled = enabled
+
+    def fingerprint(self, lst_files: list) -> str | None:
+        """A key for the contents of the log files
+
+        Taken before the files are read, so lines written while they are read are not
+        in the key, and the log is parsed again the next time instead of being cached
+        without those lines.
+
+        Args:
+            lst_files (list): The log files
+
+        Returns:
+            str | None: A hex digest of the files' path, size, modification time, head and tail, None when the files are not cached
+        """
+        if not self._is_cacheable(lst_files):
+            return None
+        hash_files = hashlib.sha1()
+        for file in lst_files:
+            stat_file = file.stat()
+            hash_files.update(
+                f"{file.resolve()}|{stat_file.st_size}|{stat_file.st_mtime_ns}".encode()
+            )
+            with open(file, "rb") as f:
+                hash_files.update(f.read(self.SAMPLE_BYTES))
+                if stat_file.st_size > self.SAMPLE_BYTES:
+                    start = max(stat_file.st_size - self.SAMPLE_BYTES, self.SAMPLE_BYTES)
+                    f.seek(start)
+                    # Only up to the size in the key, the file can grow meanwhile
+                    hash_files.update(f.read(stat_file.st_size - start))
+        return hash_files.hexdigest()
+
+    def _is_cacheable(self, lst_files: list) -> bool:
+        size_files = sum(file.stat().st_size for file in lst_files)
+        return self._enabled and size_files >= self.MIN_BYTES
+
+    def _file_cache(self, fingerprint: str, lazy: bool) -> Path:
+        name = fingerprint + ("-lazy" if lazy else "")
+        return self._dir / (name + ".feather")
+
+    def get(self, lst_files: list, fingerprint: str, lazy: bool = False) -> tuple | None:
+        """The cached log for the files, if their contents did not change
+
+        Args:
+            lst_files (list): The log files
+            fingerprint (str): The fingerprint of the files, see fingerprint
+            lazy (bool, optional): Get the log loaded in lazy mode, with its line offsets in COLUMN_LINE_OFFSET. Defaults to False.
+
+        Returns:
+            tuple | None: The dataframe, the offset after the last complete line of the last file, the offsets of the rejected lines per file and the segments of the search index (None when they were not stored), None if not cached
+        """
+        if fingerprint is None:
+            return None
+        file_cache = self._file_cache(fingerprint, lazy=lazy)
+        file_offsets = file_cache.with_suffix(".npy")
+        if not file_cache.exists() or (lazy and not file_offsets.exists()):
+            return None
+        try:
+            table = feather.read_table(file_cache, memory_map=True)
+            offset = int(table.schema.metadata[b"logviewer_offset"])
+            dict_rejected = json.loads(table.schema.metadata.get(b"logviewer_rejected", b"{}"))
+            df_log = table.to_pandas()
+            if lazy:
+                df_log[COLUMN_LINE_OFFSET] = np.load(file_offsets)
+        except (OSError, KeyError, ValueError, pa.ArrowException) as e:
+            logger.warning(f"Ignoring unreadable cache file '{file_cache}': {e}")
+            return None
+        file_words = file_cache.with_suffix(".words.arrow")
+        lst_segments = self._read_segments(file_words) if file_words.exists() else None
+        # Keep track of use for evicting the least recently used
+        for file in [file_cache, file_offsets, file_words]:
+            if file.exists():
+                os.utime(file)
+        logger.debug(f"Loaded '{lst_files[-1]}' from cache '{file_cache}'")
+        return df_log, offset, dict_rejected, lst_segments
+
+    @staticmethod
+    def _read_segments(file_words: Path) -> list | None:
+        """The segments of a search index, see SearchIndex.segments, None when unreadable"""
+        try:
+            with pa.OSFile(str(file_words), "rb") as f:
+                reader = pa.ipc.open_file(f)
+                lst_segments = []
+                for i in range(reader.num_record_batches):
+                    batch = reader.get_batch(i)
+                    postings = batch.column("rows")
+                    lst_segments.append(
+                        (
+                            batch.column("word").to_pylist(),
+                            postings.offsets.to_numpy(),
+                            postings.values.to_numpy(),
+                        )
+                    )
+        except (OSError, KeyError, pa.ArrowException) as e:
+            logger.warning(f"Ignoring unreadable cache file '{file_words}': {e}")
+            return None
+        return lst_segments
+
+    @staticmethod
+    def _write_segments(file_words: Path, lst_segments: list) -> None:
+        """Writes the segments of a search index, a record batch of the words and their rows per segment"""
+        schema = pa.schema([("word", pa.string()), ("rows", pa.large_list(pa.uint32()))])
+        file_temp = file_words.with_suffix(".tmp")
+        with pa.OSFile(str(file_temp), "wb") as f, pa.ipc.new_file(f, schema) as writer:
+            for words, offsets, rows in lst_segments:
+                postings = pa.LargeListArray.from_arrays(
+                    pa.array(offsets, type=pa.int64()), pa.array(rows, type=pa.uint32())
+                )
+                writer.write_batch(pa.record_batch([pa.array(words, type=pa.string()), postings], schema=schema))
+        os.replace(file_temp, file_words)
+
+    def put(
+        self,
+        lst_files: list,
+        fingerprint: str,
+        df_log: pd.DataFrame,
+        offset: int,
+        line_offsets: np.ndarray = None,
+        dict_rejected: dict = None,
+        search_segments: list = None,
+    ) -> None:
+        """Caches the log parsed from the files
+
+        Args:
+            lst_files (list): The log files
+            fingerprint (str): The fingerprint of the files taken before they were read, see fingerprint
+            df_log (pd.DataFrame): The parsed log
+            offset (int): The offset after the last complete line of the last file
+            line_offsets (np.ndarray, optional): The line offset of each entry of a log loaded in lazy mode. Defaults to None.
+            dict_rejected (dict, optional): The offsets of the rejected lines per file. Defaults to None.
+            search_segments (list, optional): The segments of the search index of the log, see SearchIndex.segments. Defaults to None.
+        """
+        if fingerprint is None or df_log.shape[0] == 0:
+            return
+        file_cache = self._file_cache(fingerprint, lazy=line_offsets is not None)
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            if line_offsets is not None:
+                file_temp = file_cache.with_suffix(".npy.tmp")
+                with open(file_temp, "wb") as f:
+                    np.save(f, np.asarray(line_offsets, dtype=np.int64))
+                os.replace(file_temp, file_cache.with_suffix(".npy"))
+            if search_segments is not None:
+                self._write_segments(file_cache.with_suffix(".words.arrow"), search_segments)
+            table = pa.Table.from_pandas(df_log, preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[b"logviewer_offset"] = str(offset).encode()
+            metadata[b"logviewer_rejected"] = json.dumps(dict_rejected or {}).encode()
+            table = table.replace_schema_metadata(metadata)
+            file_temp = file_cache.with_suffix(".tmp")
+            feather.write_feather(table, file_temp, compression="uncompressed")
+            os.replace(file_temp, file_cache)
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"Could not cache '{lst_files[-1]}': {e}")
+            return
+        logger.debug(f"Cached '{lst_files[-1]}' in '{file_cache}'")
+        self._evict()
+
+    def _evict(self) -> None:
+        """Removes the least recently used cache files until the cache fits its maximum size"""
+        lst_cached = sorted(
+            [*self._dir.glob("*.feather"), *self._dir.glob("*.npy"), *self._dir.glob("*.arrow")],
+            key=lambda file: file.stat().st_mtime,
+        )
+        size_cache = sum(file.stat().st_size for file in lst_cached)
+        while size_cache > self._max_bytes and len(lst_cached) > 1:
+            file_cache = lst_cached.pop(0)
+            size_cache = size_cache - file_cache.stat().st_size
+            file_cache.unlink(missing_ok=True)
+            logger.debug(f"Evicted cache file '{file_cache}'")
@@ -0,0 +1,165 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from log_parser import concat_logs
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+
+def extend_buffer(buffer: np.ndarray, qty: int, values: np.ndarray) -> np.ndarray:
+    """Writes values after the first qty values of a buffer, growing it by doubling its
+    capacity when needed, so appending costs time proportional to the values appended
+
+    Args:
+        buffer (np.ndarray): The buffer, of which the first qty values are used
+        qty (int): The number of values used
+        values (np.ndarray): The values to append
+
+    Returns:
+        np.ndarray: The buffer, a new one when it was grown
+    """
+    qty_new = qty + len(values)
+    if qty_new > len(buffer):
+        buffer_grown = np.empty(max(qty_new, 2 * len(buffer)), dtype=buffer.dtype)
+        buffer_grown[:qty] = buffer[:qty]
+        buffer = buffer_grown
+    buffer[qty:qty_new] = values
+    return buffer
+
+
+class LogChunks:
+    """The entries of a log as a list of dataframes, so appending entries copies none of
+    the entries before them
+
+    Appended entries get a chunk of their own and chunks are merged once a newer one is
+    as large as the one before it, like the segments of SearchIndex, so appending costs
+    an amortized O(log n) per entry and a log is kept in a few chunks. Taking rows only
+    touches the chunks holding them, operations over all entries merge the chunks first.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # The chunks and the row of the first entry of each followed by the number of
+        # entries, replaced at once so reading threads see them consistent
+        self._state = ((), np.zeros(1, dtype=np.int64))
+        self._columns: list = []
+
+    def __len__(self) -> int:
+        return int(self._state[1][-1])
+
+    @property
+    def columns(self) -> list:
+        """The columns of the entries, in the order they were first appended"""
+        return list(self._columns)
+
+    @property
+    def qty_chunks(self) -> int:
+        return len(self._state[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._state = ((), np.zeros(1, dtype=np.int64))
+            self._columns = []
+
+    def append(self, df_log: pd.DataFrame) -> None:
+        """Adds entries to the end
+
+        Args:
+            df_log (pd.DataFrame): The entries
+        """
+        if df_log.shape[0] == 0:
+            return
+        with self._lock:
+            lst_chunks = [*self._state[0], df_log]
+            while len(lst_chunks) > 1 and lst_chunks[-1].shape[0] >= lst_chunks[-2].shape[0]:
+                df_new = lst_chunks.pop()
+                df_old = lst_chunks.pop()
+                lst_chunks.append(concat_logs([df_old, df_new]))
+            self._columns = self._columns + [col for col in df_log.columns if col not in self._columns]
+            self._state = self._chunks_state(lst_chunks)
+
+    @staticmethod
+    def _chunks_state(lst_chunks: list) -> tuple:
+        bounds = np.zeros(len(lst_chunks) + 1, dtype=np.int64)
+        np.cumsum([df_chunk.shape[0] for df_chunk in lst_chunks], out=bounds[1:])
+        return tuple(lst_chunks), bounds
+
+    def frame(self) -> pd.DataFrame:
+        """All entries as one dataframe, the chunks are merged into it
+
+        Returns:
+            pd.DataFrame: The entries, an empty dataframe when there are none
+        """
+        with self._lock:
+            lst_chunks = list(self._state[0])
+            if len(lst_chunks) == 0:
+                return pd.DataFrame()
+            if len(lst_chunks) > 1:
+                lst_chunks = [concat_logs(lst_chunks)]
+                self._state = self._chunks_state(lst_chunks)
+            return lst_chunks[0]
+
+    def memory_usage(self) -> int:
+        """The number of bytes used by the entries"""
+        return sum(int(df_chunk.memory_usage(deep=True).sum()) for df_chunk in self._state[0])
+
+    def rows_from(self, start: int) -> pd.DataFrame:
+        """The entries from a row on, only the chunks holding them are copied
+
+        Args:
+            start (int): The row of the first entry
+
+        Returns:
+            pd.DataFrame: The entries
+        """
+        lst_chunks, bounds = self._state
+        if start >= bounds[-1]:
+            return lst_chunks[-1].iloc[:0] if lst_chunks else pd.DataFrame()
+        i = int(np.searchsorted(bounds, start, side="right")) - 1
+        lst_rows = [lst_chunks[i].iloc[start - bounds[i] :], *lst_chunks[i + 1 :]]
+        if len(lst_rows) == 1:
+            return lst_rows[0]
+        return concat_logs(lst_rows)
+
+    def take(self, rows: np.ndarray, columns: list) -> pd.DataFrame:
+        """The entries at rows, in the order of the rows
+
+        Args:
+            rows (np.ndarray): The rows of the entries
+            columns (list): The columns to take, columns a chunk does not have are empty for its entries
+
+        Returns:
+            pd.DataFrame: The entries, indexed from 0
+        """
+        lst_chunks, bounds = self._state
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            # An empty frame still has the dtypes of the columns, exports take their schema from it
+            return self.frame().iloc[:0].reindex(columns=columns)
+        idx_chunks = np.searchsorted(bounds, rows, side="right") - 1
+        if (idx_chunks == idx_chunks[0]).all():
+            df_taken = self._take_chunk(lst_chunks[idx_chunks[0]], rows - bounds[idx_chunks[0]], columns)
+            return df_taken.reindex(columns=columns).reset_index(drop=True)
+        # The rows of each chunk are taken at once, then put back in the order of the rows
+        order = np.argsort(idx_chunks, kind="stable")
+        rows_ordered = rows[order]
+        idx_ordered = idx_chunks[order]
+        lst_taken = []
+        for i in np.unique(idx_ordered).tolist():
+            rows_chunk = rows_ordered[idx_ordered == i] - bounds[i]
+            lst_taken.append(self._take_chunk(lst_chunks[i], rows_chunk, columns))
+        df_taken = concat_logs(lst_taken).reindex(columns=columns)
+        positions = np.empty(len(rows), dtype=np.int64)
+        positions[order] = np.arange(len(rows))
+        return df_taken.take(positions).reset_index(drop=True)
+
+    @staticmethod
+    def _take_chunk(df_chunk: pd.DataFrame, rows: np.ndarray, columns: list) -> pd.DataFrame:
+        """The rows of the columns a chunk has, a column at a time so only the rows are copied"""
+        return pd.DataFrame(
+            {col: df_chunk[col].take(rows) for col in columns if col in df_chunk.columns},
+            index=df_chunk.index[rows],
+        )
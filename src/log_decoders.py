@@ -0,0 +1,139 @@
+import io
+import json
+
+import pandas as pd
+
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+_DECODER_MSGSPEC = msgspec.json.Decoder() if msgspec is not None else None
+
+# The fields written by the JsonFormatter of logging_config.LOGGING
+FIELDS_LOG = ["asctime", "levelname", "message", "module", "funcName", "process"]
+
+
+def _objects(records: list) -> list:
+    """The decoded records, raising TypeError when one of them is not a JSON object"""
+    if not all(isinstance(record, dict) for record in records):
+        raise TypeError("A line is JSON but not an object")
+    return records
+
+
+def decode_pandas(data: bytes) -> pd.DataFrame:
+    """Decodes JSON lines with pandas' own reader"""
+    try:
+        df_lines = pd.read_json(io.BytesIO(data), orient="records", lines=True)
+    except AttributeError as e:
+        # Raised for lines that are JSON values other than objects
+        raise TypeError(str(e)) from e
+    # Lines that are only arrays or scalars are read as columns numbered from 0
+    if not all(isinstance(col, str) for col in df_lines.columns):
+        raise TypeError("A line is JSON but not an object")
+    return df_lines
+
+
+def decode_json(data: bytes) -> pd.DataFrame:
+    """Decodes JSON lines with the json module of the standard library"""
+    loads = json.loads
+    return pd.DataFrame.from_records(
+        _objects([loads(line) for line in data.splitlines() if line.strip()])
+    )
+
+
+def decode_orjson(data: bytes) -> pd.DataFrame:
+    loads = orjson.loads
+    return pd.DataFrame.from_records(
+        _objects([loads(line) for line in data.splitlines() if line.strip()])
+    )
+
+
+def decode_msgspec(data: bytes) -> pd.DataFrame:
+    try:
+        records = _DECODER_MSGSPEC.decode_lines(data)
+    except msgspec.DecodeError as e:
+        raise ValueError(str(e)) from e
+    return pd.DataFrame.from_records(_objects(records))
+
+
+def decode_schema(data: bytes) -> pd.DataFrame:
+    """Decodes JSON lines into the columns of the fields written by logging_config
+
+    The columns are known up front instead of collected from the records; fields
+    other than FIELDS_LOG are left out and missing fields are empty.
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    records = _objects([loads(line) for line in data.splitlines() if line.strip()])
+    return pd.DataFrame.from_records(records, columns=FIELDS_LOG)
+
+
+DECODERS = {
+    "msgspec": decode_msgspec,
+    "orjson": decode_orjson,
+    "schema": decode_schema,
+    "pandas": decode_pandas,
+    "json": decode_json,
+}
+# The decoders that keep all fields, in the order they are preferred when detecting one
+DECODERS_AUTO = ["msgspec", "orjson", "pandas", "json"]
+
+
+def is_record(line: bytes) -> bool:
+    """Whether a line is a JSON object"""
+    try:
+        record = orjson.loads(line) if orjson is not None else json.loads(line)
+    except ValueError:
+        return False
+    return isinstance(record, dict)
+
+
+def available_decoders() -> list:
+    """The names of the decoders whose libraries are installed"""
+    dict_libraries = {"msgspec": msgspec, "orjson": orjson}
+    return [name for name in DECODERS if dict_libraries.get(name, True) is not None]
+
+
+def select_decoder(name: str) -> str:
+    """Resolves the configured decoder to an available one
+
+    Args:
+        name (str): A name of DECODERS, or "auto" for the preferred available decoder
+
+    Returns:
+        str: The name of the decoder to use
+    """
+    lst_available = available_decoders()
+    if name in lst_available:
+        return name
+    if name != "auto":
+        logger.warning(f"JSON decoder '{name}' is not available, detecting one")
+    name = next(name for name in DECODERS_AUTO if name in lst_available)
+    logger.debug(f"Using JSON decoder '{name}' of {lst_available}")
+    return name
+
+
+def decode_lines(data: bytes, decoder: str = "pandas") -> pd.DataFrame:
+    """Decodes JSON lines into a dataframe with a column per field, skipping blank lines
+
+    Args:
+        data (bytes): Complete JSON lines
+        decoder (str, optional): The name of the decoder. Defaults to "pandas".
+
+    Returns:
+        pd.DataFrame: A row per line
+
+    Raises:
+        ValueError: When a line is not valid JSON
+        TypeError: When a line is JSON but not an object
+    """
+    return DECODERS[decoder](data)
@@ -0,0 +1,300 @@
+import json
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from log_parser import format_asctime
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows in an Excel sheet, leaving one for the header
+EXCEL_MAX_ROWS = 1_048_576 - 1
+
+
+def column_values(values: pd.Series) -> list:
+    """The values of a column as they are exported: asctime as written in the log and
+    missing values as None"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        lst_values = format_asctime(values)
+    else:
+        lst_values = values.tolist()
+    if values.hasnans:
+        lst_values = [None if pd.isna(value) else value for value in lst_values]
+    return lst_values
+
+
+def write_excel_rows(
+    lst_columns: list,
+    qty_rows: int,
+    take: Callable[[int, int], pd.DataFrame],
+    file: str,
+    chunksize: int = 10_000,
+) -> Iterator[float]:
+    """Writes rows taken a chunk at a time to an Excel file, so the rows to export
+    are never copied as a whole
+
+    Args:
+        lst_columns (list): The columns to export
+        qty_rows (int): The number of rows to export
+        take (Callable[[int, int], pd.DataFrame]): Returns the rows from start up to stop, with the columns to export
+        file (str): The path of the Excel file
+        chunksize (int, optional): The number of rows converted at a time. Defaults to 10_000.
+
+    Yields:
+        float: The percentage of the rows written
+    """
+    # openpyxl is only imported for Excel exports, it is slow to import
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = 0
+    for sheet, start_sheet in enumerate(range(0, qty_rows, EXCEL_MAX_ROWS)):
+        worksheet = workbook.create_sheet(title=f"Sheet{sheet + 1}")
+        worksheet.append(lst_columns)
+        end_sheet = min(start_sheet + EXCEL_MAX_ROWS, qty_rows)
+        for start in range(start_sheet, end_sheet, chunksize):
+            df_chunk = take(start, min(start + chunksize, end_sheet))
+            lst_values = [column_values(df_chunk[col]) for col in lst_columns]
+            for row in zip(*lst_values):
+                worksheet.append(row)
+            yield 100 * (start + df_chunk.shape[0]) / qty_rows
+    if sheet > 0:
+        logger.info(f"Exported {qty_rows} rows to '{file}' on {sheet + 1} sheets")
+    workbook.save(file)
+
+
+def write_csv_rows(
+    lst_columns: list,
+    qty_rows: int,
+    take: Callable[[int, int], pd.DataFrame],
+    file: str,
+    chunksize: int = 10_000,
+) -> Iterator[float]:
+    """Writes rows taken a chunk at a time to a CSV file, asctime as written in the log
+
+    Args:
+        lst_columns (list): The columns to export
+        qty_rows (int): The number of rows to export
+        take (Callable[[int, int], pd.DataFrame]): Returns the rows from start up to stop, with the columns to export
+        file (str): The path of the CSV file
+        chunksize (int, optional): The number of rows converted at a time. Defaults to 10_000.
+
+    Yields:
+        float: The percentage of the rows written
+    """
+    with open(file, "w", encoding="utf-8", newline="") as f:
+        for start in range(0, qty_rows, chunksize):
+            df_chunk = take(start, min(start + chunksize, qty_rows))
+            df_values = pd.DataFrame({col: column_values(df_chunk[col]) for col in lst_columns})
+            df_values.to_csv(f, header=start == 0, index=False)
+            yield 100 * (start + df_chunk.shape[0]) / qty_rows
+
+
+def write_jsonl_rows(
+    lst_columns: list,
+    qty_rows: int,
+    take: Callable[[int, int], pd.DataFrame],
+    file: str,
+    chunksize: int = 10_000,
+) -> Iterator[float]:
+    """Writes rows taken a chunk at a time to a JSON lines file, in the format of the log
+
+    Args:
+        lst_columns (list): The columns to export
+        qty_rows (int): The number of rows to export
+        take (Callable[[int, int], pd.DataFrame]): Returns the rows from start up to stop, with the columns to export
+        file (str): The path of the JSON lines file
+        chunksize (int, optional): The number of rows converted at a time. Defaults to 10_000.
+
+    Yields:
+        float: The percentage of the rows written
+    """
+    dumps = json.dumps
+    with open(file, "w", encoding="utf-8") as f:
+        for start in range(0, qty_rows, chunksize):
+            df_chunk = take(start, min(start + chunksize, qty_rows))
+            lst_values = [column_values(df_chunk[col]) for col in lst_columns]
+            f.writelines(
+                dumps(dict(zip(lst_columns, row)), ensure_ascii=False, default=str) + "\n"
+                for row in zip(*lst_values)
+            )
+            yield 100 * (start + df_chunk.shape[0]) / qty_rows
+
+
+def arrow_schema(df_columns: pd.DataFrame) -> pa.Schema:
+    """The Arrow schema of the columns to export, from their dtypes instead of their values,
+    so a column that is empty in the first chunk is not typed null
+
+    Columns of objects are stored as strings, categoricals as dictionaries of their categories.
+
+    Args:
+        df_columns (pd.DataFrame): The columns to export, rows are not needed
+
+    Returns:
+        pa.Schema: The schema
+    """
+    lst_fields = []
+    for col in df_columns.columns:
+        dtype = df_columns[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            type_values = _arrow_type(dtype.categories.dtype)
+            type_arrow = pa.dictionary(pa.int32(), type_values)
+        else:
+            type_arrow = _arrow_type(dtype)
+        lst_fields.append(pa.field(str(col), type_arrow))
+    return pa.schema(lst_fields)
+
+
+def _arrow_type(dtype) -> pa.DataType:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+        return pa.from_numpy_dtype(dtype)
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return pa.from_numpy_dtype(dtype)
+    return pa.string()
+
+
+def arrow_values(df_chunk: pd.DataFrame, schema: pa.Schema) -> pd.DataFrame:
+    """A chunk with the values of its string columns that are not strings, like nested
+    objects, written as JSON"""
+    for col in df_chunk.columns:
+        if schema.field(str(col)).type != pa.string() or df_chunk[col].dtype != object:
+            continue
+        values = df_chunk[col]
+        if pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+            df_chunk[col] = [
+                value if value is None or isinstance(value, str) or pd.isna(value)
+                else json.dumps(value, ensure_ascii=False, default=str)
+                for value in values.tolist()
+            ]
+    return df_chunk
+
+
+def _write_arrow_rows(
+    lst_columns: list,
+    qty_rows: int,
+    take: Callable[[int, int], pd.DataFrame],
+    file: str,
+    chunksize: int,
+    new_writer: Callable[[str, pa.Schema], object],
+) -> Iterator[float]:
+    """Writes rows taken a chunk at a time with an Arrow writer, removing the file when writing fails"""
+    schema = arrow_schema(take(0, 0)[lst_columns])
+    writer = new_writer(file, schema)
+    try:
+        for start in range(0, qty_rows, chunksize):
+            df_chunk = arrow_values(take(start, min(start + chunksize, qty_rows))[lst_columns], schema)
+            writer.write_table(pa.Table.from_pandas(df_chunk, schema=schema, preserve_index=False))
+            yield 100 * (start + df_chunk.shape[0]) / qty_rows
+    except BaseException:
+        # Also when the export is cancelled, a partial file cannot be read
+        writer.close()
+        Path(file).unlink(missing_ok=True)
+        raise
+    writer.close()
+
+
+def write_parquet_rows(
+    lst_columns: list,
+    qty_rows: int,
+    take: Callable[[int, int], pd.DataFrame],
+    file: str,
+    chunksize: int = 100_000,
+) -> Iterator[float]:
+    """Writes rows taken a chunk at a time to a Parquet file, a row group per chunk
+
+    The columns keep their types, so asctime is stored as a timestamp, see arrow_schema.
+
+    Args:
+        lst_columns (list): The columns to export
+        qty_rows (int): The number of rows to export
+        take (Callable[[int, int], pd.DataFrame]): Returns the rows from start up to stop, with the columns to export
+        file (str): The path of the Parquet file
+        chunksize (int, optional): The number of rows in a row group. Defaults to 100_000.
+
+    Yields:
+        float: The percentage of the rows written
+    """
+    yield from _write_arrow_rows(
+        lst_columns,
+        qty_rows,
+        take,
+        file,
+        chunksize=chunksize,
+        new_writer=lambda file, schema: pq.ParquetWriter(file, schema=schema),
+    )
+
+
+def write_feather_rows(
+    lst_columns: list,
+    qty_rows: int,
+    take: Callable[[int, int], pd.DataFrame],
+    file: str,
+    chunksize: int = 100_000,
+) -> Iterator[float]:
+    """Writes rows taken a chunk at a time to a Feather (Arrow IPC) file, a record batch per chunk
+
+    The columns keep their types, so asctime is stored as a timestamp, see arrow_schema.
+
+    Args:
+        lst_columns (list): The columns to export
+        qty_rows (int): The number of rows to export
+        take (Callable[[int, int], pd.DataFrame]): Returns the rows from start up to stop, with the columns to export
+        file (str): The path of the Feather file
+        chunksize (int, optional): The number of rows in a record batch. Defaults to 100_000.
+
+    Yields:
+        float: The percentage of the rows written
+    """
+    yield from _write_arrow_rows(
+        lst_columns,
+        qty_rows,
+        take,
+        file,
+        chunksize=chunksize,
+        new_writer=lambda file, schema: pa.ipc.new_file(file, schema=schema),
+    )
+
+
+# The writers of the export formats, they all take the rows a chunk at a time
+WRITERS = {
+    "xlsx": write_excel_rows,
+    "csv": write_csv_rows,
+    "jsonl": write_jsonl_rows,
+    "parquet": write_parquet_rows,
+    "feather": write_feather_rows,
+}
+# The export format of each file suffix
+SUFFIXES = {
+    ".xlsx": "xlsx",
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".json": "jsonl",
+    ".parquet": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+}
+
+
+def export_format(file: str, default: str = None) -> str:
+    """The export format of a file, by its suffix
+
+    Args:
+        file (str): The path of the file to export to
+        default (str, optional): The format of files with another suffix. Defaults to None for raising.
+
+    Returns:
+        str: A name of WRITERS
+
+    Raises:
+        ValueError: When the suffix is not one of SUFFIXES and there is no default
+    """
+    suffix = Path(file).suffix.lower()
+    if suffix in SUFFIXES:
+        return SUFFIXES[suffix]
+    if default is None:
+        raise ValueError(f"Cannot export to '{file}', expected one of {list(SUFFIXES)}")
+    return default
@@ -1,94 +1,763 @@
+import glob
+import json
+import os
+import threading
 from pathlib import Path
+from typing import Iterator, NamedTuple
 
+import numpy as np
 import pandas as pd
 from rich.text import Text
 
+from bitmap_index import BitmapIndex
+from log_cache import LogCache
+from log_chunks import LogChunks, extend_buffer
+from instrumentation import stage
+from log_export import WRITERS, export_format
+from log_parser import (
+    CHUNK_BYTES,
+    CHUNK_ROWS_LAZY,
+    COLUMN_LINE_OFFSET,
+    COLUMNS_CATEGORY,
+    COLUMNS_LAZY,
+    concat_logs,
+    format_asctime,
+    is_complete,
+    merge_sorted,
+    map_file,
+    normalize_dtypes,
+    parse_lines,
+    read_chunks,
+    read_files,
+    read_ranges,
+    rotation_set,
+)
+from log_query import QueryCache, QueryError, parse_query
+from log_timeline import MAX_BUCKETS, Histogram, TimelineCache, auto_width
+from log_decoders import select_decoder
 from logging_config import logging
+from run_index import RunIndex
+from search_index import SearchIndex
 
 logger = logging.getLogger(__name__)
 
+# Shown in lazy mode for the fields of entries read from a file that was rotated since
+MESSAGE_ROTATED = "(not available after rotation)"
+
+
+class Selection(NamedTuple):
+    """Entries of a log, by the positions of their rows in display order, and the
+    columns to show of them"""
+
+    rows: np.ndarray
+    columns: tuple
+
 
 class LogFile:
-    def __init__(self, file_log: str):
-        self._file = Path(file_log)
-        self._df_log = pd.DataFrame()
+    def __init__(
+        self,
+        file_log: str,
+        load: bool = True,
+        rotated: bool = False,
+        cache: LogCache = None,
+        workers: int = 0,
+        parallel_min_mb: int = 64,
+        lazy: bool = False,
+        decoder: str = "auto",
+    ):
+        """A JSON lines log file
+
+        Args:
+            file_log (str): The path of the log file, or a glob pattern matching the files of a rotated log
+            load (bool, optional): Load the file right away, otherwise it is loaded by iterating load_chunks. Defaults to True.
+            rotated (bool, optional): Also load the files the log was rotated to (file_log.1 … file_log.N). Defaults to False.
+            cache (LogCache, optional): Cache for parsed logs. Defaults to None for always parsing.
+            workers (int, optional): The number of processes parsing in parallel. Defaults to 0 for the number of CPUs.
+            parallel_min_mb (int, optional): The size in MB below which files are parsed in a single process. Defaults to 64.
+            lazy (bool, optional): Leave the messages in the file and read them when needed, only for a single file. Defaults to False.
+            decoder (str, optional): The JSON decoder, a name of log_decoders.DECODERS or "auto" for the fastest one installed. Defaults to "auto".
+        """
+        self._cache = cache
+        # Loading, tailing and filtering run in worker threads of the viewer
+        self._lock = threading.RLock()
+        self._search_index = SearchIndex()
+        self._query_cache = QueryCache()
+        self._bitmap_index = BitmapIndex(columns=COLUMNS_CATEGORY)
+        self._run_index = RunIndex()
+        self._timeline_cache = TimelineCache()
+        self._dict_filters = {}
+        self._lst_clauses = []
+        self._query = ""
+        self._workers = workers or os.cpu_count() or 1
+        self._parallel_min_bytes = parallel_min_mb * 1024 * 1024
+        self._lazy = lazy
+        self._decoder = select_decoder(decoder)
+        self._is_lazy = False
+        # In lazy mode the offset of the line of each entry, in the order of the entries
+        self._line_offsets = np.empty(0, dtype=np.int64)
+        # Entries before this row were read from a file that has been rotated since
+        self._row_current = 0
+        self._mmap = None
+        # The offsets of the lines that are not JSON objects, per file
+        self._dict_rejected = {}
+        # The entries, tailed entries are appended as chunks of their own
+        self._chunks = LogChunks()
+        # The first and last asctime of the entries
+        self._asctime_range = (pd.NaT, pd.NaT)
         self._levels = ["DEBUG", "INFO", "WARNING", "ERROR"]
+        # The selected rows in ascending order, of which the first number are used, they
+        # are only appended to after a selection so views of them stay valid
+        self._rows_selected = np.empty(0, dtype=np.int64)
+        self._qty_selected = 0
+        self._descending = True
+        self._offset = 0
+        self._inode = None
+        self._set_files(file_log=file_log, rotated=rotated)
         if not self._file.exists():
-            self._file = ""
-            logger.error(f"Log file '{self._file}' does not exist")
-        else:
+            logger.error(f"Log file '{file_log}' does not exist")
+        elif load:
             self._load_file()
 
+    def _set_files(self, file_log: str, rotated: bool) -> None:
+        """Sets the files to load, the last one is the file the log is written to"""
+        if rotated or glob.has_magic(file_log):
+            self._files = rotation_set(file_log)
+        else:
+            self._files = [Path(file_log)]
+        self._file = self._files[-1] if self._files else Path(file_log)
+
+    @property
+    def files(self) -> list:
+        """The files the log is loaded from, oldest first"""
+        return self._files
+
     def _load_file(self) -> bool:
         """Loads the logfile"""
         success = False
         if self._file.exists():
-            self._df_log = pd.read_json(self._file, orient="records", lines=True)
-            self._df_log.sort_values(by="asctime", ascending=False, inplace=True)
-            self._df_log["_selected"] = True
+            for _ in self.load_chunks():
+                pass
             success = True
         else:
             logger.error(f"Log file '{self._file}' does not exist")
         return success
 
-    def load(self, file_log: str):
-        self._file = Path(file_log)
-        if not self._file.exists():
-            self._file = ""
+    def load_chunks(self, chunk_bytes: int = CHUNK_BYTES) -> Iterator[tuple[float, bool]]:
+        """Loads the logfile in chunks of lines, so entries can be shown while loading
+
+        Parsed chunks are added to the log once they outnumber the entries already
+        loaded, so the copying done while loading stays proportional to the file size.
+        The entries are kept in file order, they are only sorted when the file turns
+        out not to be in chronological order.
+
+        Args:
+            chunk_bytes (int, optional): The number of bytes parsed at a time. Defaults to CHUNK_BYTES.
+
+        Yields:
+            tuple[float, bool]: The percentage of the bytes loaded and whether entries were added to the log
+        """
+        # The stage includes the time the caller takes for each chunk, like showing its entries
+        with stage("load") as record:
+            yield from self._load_chunks(chunk_bytes=chunk_bytes)
+            record["rows"] = len(self._chunks)
+
+    def _load_chunks(self, chunk_bytes: int) -> Iterator[tuple[float, bool]]:
+        self._chunks.clear()
+        self._asctime_range = (pd.NaT, pd.NaT)
+        self._rows_selected = np.empty(0, dtype=np.int64)
+        self._qty_selected = 0
+        self._search_index.clear()
+        self._query_cache.clear()
+        self._bitmap_index.clear()
+        self._run_index.clear()
+        self._timeline_cache.clear()
+        self._dict_filters = {}
+        self._line_offsets = np.empty(0, dtype=np.int64)
+        self._row_current = 0
+        self._close_mmap()
+        self._dict_rejected = {}
+        self._offset = 0
+        self._inode = None
+        if not self._file.is_file():
             logger.error(f"Log file '{self._file}' does not exist")
+            return
+        self._is_lazy = self._lazy and len(self._files) == 1
+        if self._lazy and not self._is_lazy:
+            logger.info("Lazy loading applies to a single file, loading the rotated files completely")
+        # The files are fingerprinted before they are read, so lines written while loading
+        # make the next load miss the cache instead of leaving them out
+        fingerprint = self._cache.fingerprint(self._files) if self._cache is not None else None
+        if self._load_cached(fingerprint):
+            self._log_memory_usage()
+            yield 100.0, True
+            return
+        if len(self._files) > 1:
+            yield from self._load_files()
+            self._store_cached(fingerprint)
+            self._log_memory_usage()
+            return
+        stat_file = self._file.stat()
+        size_file = stat_file.st_size
+        if self._workers > 1 and size_file >= self._parallel_min_bytes:
+            chunks = read_ranges(
+                self._file,
+                size=size_file,
+                workers=self._workers,
+                lazy=self._is_lazy,
+                decoder=self._decoder,
+            )
+        else:
+            chunks = self._read_chunks(chunk_bytes=chunk_bytes)
+        size_read = 0
+        lst_pending = []
+        qty_pending = 0
+        is_sorted = True
+        asctime_last = None
+        for df_chunk, size_chunk, size_complete, offsets_rejected in chunks:
+            size_read = size_read + size_chunk
+            self._offset = self._offset + size_complete
+            self._add_rejected(self._file, offsets_rejected)
+            if df_chunk.shape[0] > 0:
+                is_sorted = (
+                    is_sorted
+                    and df_chunk["asctime"].is_monotonic_increasing
+                    and (asctime_last is None or df_chunk["asctime"].iloc[0] >= asctime_last)
+                )
+                asctime_last = df_chunk["asctime"].iloc[-1]
+                lst_pending.append(df_chunk)
+                qty_pending = qty_pending + df_chunk.shape[0]
+            is_added = qty_pending > 0 and qty_pending >= len(self._chunks)
+            if is_added:
+                self._append(lst_pending)
+                lst_pending = []
+                qty_pending = 0
+            yield min(100 * size_read / max(size_file, 1), 100.0), is_added
+        if lst_pending:
+            self._append(lst_pending)
+        if not is_sorted:
+            logger.warning(f"Log file '{self._file}' is not in chronological order, sorting")
+            with self._lock, stage("sort") as record:
+                df_log = self._chunks.frame()
+                record["rows"] = df_log.shape[0]
+                order = np.argsort(df_log["asctime"].to_numpy(), kind="stable")
+                df_log = df_log.take(order).reset_index(drop=True)
+                self._chunks.clear()
+                self._chunks.append(df_log)
+                if self._is_lazy:
+                    self._line_offsets = self._line_offsets[order]
+                self._search_index.clear()
+                self._index_messages(df_log, start=0)
+                self._bitmap_index.clear()
+                self._bitmap_index.add(df_log)
+                self._run_index.clear()
+                self._run_index.add(df_log, start=0)
+                self._query_cache.clear()
+                self._timeline_cache.clear()
+                self._select()
+        self._inode = stat_file.st_ino
+        self._store_cached(fingerprint)
+        self._log_memory_usage()
+        yield 100.0, True
+
+    @property
+    def memory_usage(self) -> int:
+        """The number of bytes used by the loaded log and its indexes"""
+        return (
+            self._chunks.memory_usage()
+            + self._bitmap_index.nbytes
+            + self._line_offsets.nbytes
+        )
+
+    def _log_memory_usage(self) -> None:
+        size_files = sum(file.stat().st_size for file in self._files)
+        logger.info(
+            f"Loaded {len(self._chunks)} entries from '{self._file}' "
+            f"({size_files / 2**20:.1f} MB) using {self.memory_usage / 2**20:.1f} MB"
+        )
+
+    def _load_cached(self, fingerprint: str) -> bool:
+        """Loads the log from the cache when its files did not change since they were cached"""
+        if self._cache is None:
+            return False
+        cached = self._cache.get(self._files, fingerprint=fingerprint, lazy=self._is_lazy)
+        if cached is None:
+            return False
+        df_log, self._offset, dict_rejected, lst_segments = cached
+        for file, lst_offsets in dict_rejected.items():
+            self._add_rejected(Path(file), np.array(lst_offsets, dtype=np.int64))
+        df_log = normalize_dtypes(df_log)
+        self._inode = self._file.stat().st_ino
+        # The stored postings spare tokenizing the messages, which in lazy mode are read from the file
+        if lst_segments is not None:
+            self._search_index.load_segments(lst_segments)
+        self._append([df_log], index_messages=lst_segments is None)
+        return True
+
+    def _store_cached(self, fingerprint: str) -> None:
+        """Stores the loaded log in the cache under the fingerprint of its files before they were read"""
+        if self._cache is not None and len(self._chunks) > 0:
+            self._cache.put(
+                self._files,
+                fingerprint,
+                self._chunks.frame(),
+                offset=self._offset,
+                line_offsets=self._line_offsets[: len(self._chunks)] if self._is_lazy else None,
+                dict_rejected={
+                    str(file): offsets.tolist() for file, offsets in self._dict_rejected.items()
+                },
+                search_segments=self._search_index.segments(),
+            )
+
+    def tail(self) -> int:
+        """Adds the entries written to the log file since it was last read
+
+        Only the bytes after the offset of the last complete line read are read. When
+        the file was rotated (another inode), the rest of the file it was rotated to is
+        read first and then the new file from its start. When it was truncated, the
+        file is read from its start. The entries read before are kept.
+
+        Returns:
+            int: The number of entries added
+        """
+        with self._lock:
+            if self._inode is None:
+                return 0
+            try:
+                stat_file = self._file.stat()
+            except FileNotFoundError:
+                # The file is being rotated
+                return 0
+            qty_added = 0
+            if stat_file.st_ino != self._inode or stat_file.st_size < self._offset:
+                if stat_file.st_ino != self._inode:
+                    qty_added = self._tail_rotated()
+                logger.info(f"Log file '{self._file}' was rotated or truncated, reading from the start")
+                self._inode = stat_file.st_ino
+                self._offset = 0
+                self._row_current = len(self._chunks)
+                self._close_mmap()
+            return qty_added + self._read_tail(self._file, size=stat_file.st_size)
+
+    def _tail_rotated(self) -> int:
+        """Adds the entries written to the file that was read before it was rotated
+
+        Returns:
+            int: The number of entries added, 0 when the rotated file is not found
+        """
+        for file in reversed(rotation_set(str(self._file))[:-1]):
+            try:
+                stat_file = file.stat()
+            except FileNotFoundError:
+                continue
+            if stat_file.st_ino == self._inode:
+                return self._read_tail(file, size=stat_file.st_size)
+        logger.warning(
+            f"The rotated file of '{self._file}' is not found, entries written before the rotation may be missing"
+        )
+        return 0
+
+    def _read_tail(self, file: Path, size: int) -> int:
+        """Adds the complete lines of a file from the offset up to a size"""
+        if size <= self._offset:
+            return 0
+        with open(file, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        lines = data.splitlines(keepends=True)
+        if not is_complete(lines[-1]):
+            lines.pop()
+        with stage("parse") as record:
+            df_new, offsets_rejected = parse_lines(
+                lines, offset=self._offset, lazy=self._is_lazy, decoder=self._decoder
+            )
+            record["rows"] = df_new.shape[0]
+        self._add_rejected(file, offsets_rejected)
+        self._offset = self._offset + sum(len(line) for line in lines)
+        if df_new.shape[0] > 0:
+            self._append([df_new])
+        return df_new.shape[0]
+
+    def _load_files(self) -> Iterator[tuple[float, bool]]:
+        """Loads the files of a rotated log in parallel and merges them on asctime
+
+        Yields:
+            tuple[float, bool]: The percentage of the bytes loaded and whether entries were added to the log
+        """
+        size_total = sum(file.stat().st_size for file in self._files)
+        size_read = 0
+        dict_read = {}
+        lst_read = read_files(
+            self._files,
+            workers=self._workers,
+            parallel_min_bytes=self._parallel_min_bytes,
+            decoder=self._decoder,
+        )
+        for file, result in lst_read:
+            dict_read[file] = result
+            self._add_rejected(file, result[3])
+            size_read = size_read + file.stat().st_size
+            yield 100 * size_read / max(size_total, 1), False
+        df_log = merge_sorted([dict_read[file][0] for file in self._files], column="asctime")
+        if df_log.shape[0] > 0:
+            self._append([df_log])
+        _, self._offset, self._inode, _ = dict_read[self._file]
+        yield 100.0, True
+
+    def _add_rejected(self, file: Path, offsets_rejected: np.ndarray) -> None:
+        if len(offsets_rejected) > 0:
+            offsets_file = self._dict_rejected.get(file, np.empty(0, dtype=np.int64))
+            self._dict_rejected[file] = np.concatenate([offsets_file, offsets_rejected])
+
+    @property
+    def rejected_lines(self) -> dict:
+        """The offsets of the lines that were skipped because they are not JSON objects, per file"""
+        return dict(self._dict_rejected)
+
+    @property
+    def qty_rejected(self) -> int:
+        """The number of lines that were skipped because they are not JSON objects"""
+        return sum(len(offsets) for offsets in self._dict_rejected.values())
+
+    def _append(self, lst_df: list, index_messages: bool = True) -> None:
+        """Adds parsed entries to the end of the log, index_messages=False when their
+        messages are already in the search index
+
+        Only the new entries are indexed and selected, so following a log costs time
+        proportional to the entries added, not to the size of the log.
+        """
+        df_new = concat_logs(lst_df)
+        with self._lock:
+            start = len(self._chunks)
+            if COLUMN_LINE_OFFSET in df_new.columns:
+                line_offsets = df_new.pop(COLUMN_LINE_OFFSET).to_numpy(dtype=np.int64)
+                self._line_offsets = extend_buffer(self._line_offsets, start, line_offsets)
+            if index_messages:
+                self._index_messages(df_new, start=start)
+            if self._is_lazy:
+                # The lazy columns were only parsed for indexing
+                df_new = df_new.drop(columns=COLUMNS_LAZY, errors="ignore")
+            self._bitmap_index.add(df_new)
+            self._run_index.add(df_new, start=start)
+            if "asctime" in df_new.columns:
+                asctime_first, asctime_last = self._asctime_range
+                self._asctime_range = (
+                    pd.Series([asctime_first, df_new["asctime"].min()]).min(),
+                    pd.Series([asctime_last, df_new["asctime"].max()]).max(),
+                )
+            self._chunks.append(df_new)
+            self._select(start=start)
+
+    def _read_chunks(self, chunk_bytes: int) -> Iterator[tuple]:
+        """Reads the file in chunks from a memory map, in lazy mode the map is kept open
+        for reading the records of entries when they are needed"""
+        if not self._is_lazy:
+            yield from read_chunks(self._file, chunk_bytes=chunk_bytes, decoder=self._decoder)
+            return
+        with self._lock:
+            self._mmap = map_file(self._file)
+        if self._mmap is not None:
+            yield from read_chunks(
+                self._file,
+                chunk_bytes=chunk_bytes,
+                lazy=True,
+                buffer=self._mmap,
+                decoder=self._decoder,
+            )
+
+    def _close_mmap(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _read_records(self, rows: np.ndarray) -> list:
+        """Reads the JSON records of entries from the file, for lazy mode
+
+        The file stays memory mapped, a record is read by seeking to the offset of its line.
+
+        Args:
+            rows (np.ndarray): The rows of the entries
+
+        Returns:
+            list: The record of each entry, None for entries of a file rotated since they were read
+        """
+        with self._lock:
+            if self._mmap is None or len(self._mmap) < self._offset:
+                self._close_mmap()
+                self._mmap = map_file(self._file)
+            lst_records = []
+            for row in rows:
+                if row < self._row_current:
+                    lst_records.append(None)
+                    continue
+                start = self._line_offsets[row]
+                end = self._mmap.find(b"\n", start)
+                line = self._mmap[start:] if end == -1 else self._mmap[start:end]
+                lst_records.append(json.loads(line))
+            return lst_records
+
+    def _read_lazy_column(self, col: str, start: int, stop: int) -> pd.Series | None:
+        """The values of a lazy column for the rows from start up to stop, read from the file
+
+        Returns:
+            pd.Series | None: The values, None when the column is not a lazy column of the log
+        """
+        if not self._is_lazy or col not in COLUMNS_LAZY:
+            return None
+        return self._read_lazy_columns(np.arange(start, stop))[col]
+
+    def _read_lazy_columns(self, rows: np.ndarray) -> pd.DataFrame:
+        """The lazy columns of entries, read from the file"""
+        lst_records = self._read_records(rows)
+        return pd.DataFrame(
+            {
+                col: [None if record is None else record.get(col) for record in lst_records]
+                for col in COLUMNS_LAZY
+            },
+            dtype=object,
+        )
+
+    def details(self, level_colors: dict, position: int) -> dict:
+        """All fields of a selected entry, with levelname colored
+
+        In lazy mode the fields left out of the log are read from the file, for entries
+        of a file rotated since they were read they are MESSAGE_ROTATED.
+
+        Args:
+            level_colors (dict): The color for each levelname
+            position (int): The position of the entry in the selected entries
+
+        Returns:
+            dict: The fields of the entry, empty when there is no entry at the position
+        """
+        headers = self.headers
+        entry = self.entries_formatted(
+            level_colors=level_colors, start=position, stop=position + 1, columns=headers
+        )
+        if not entry:
+            return {}
+        # Fields an entry does not have are empty, like the fields of columns the log does not have
+        dict_entry = {
+            col: "" if value is None or (isinstance(value, float) and np.isnan(value)) else value
+            for col, value in zip(headers, entry[0])
+        }
+        if self._is_lazy:
+            row = self._idx_selected[position]
+            (record,) = self._read_records(np.array([row]))
+            for col in COLUMNS_LAZY:
+                if record is None:
+                    dict_entry[col] = MESSAGE_ROTATED
+                elif record.get(col) is not None:
+                    dict_entry[col] = str(record[col])
+        return dict_entry
+
+    def _index_messages(self, df_log: pd.DataFrame, start: int) -> None:
+        """Adds the messages to the search index, in lazy mode they are read from the file
+        when the entries have none, like entries loaded from the cache"""
+        if "message" in df_log.columns:
+            self._search_index.add(df_log["message"], start=start)
+            return
+        stop = start + df_log.shape[0]
+        for start_chunk in range(start, stop, CHUNK_ROWS_LAZY):
+            messages = self._read_lazy_column(
+                "message", start=start_chunk, stop=min(start_chunk + CHUNK_ROWS_LAZY, stop)
+            )
+            if messages is None:
+                return
+            self._search_index.add(messages, start=start_chunk)
+
+    def search(self, text: str) -> np.ndarray:
+        """Searches the messages of the selected entries for words
+
+        Args:
+            text (str): The words the message should all contain
+
+        Returns:
+            np.ndarray: The positions of the matching entries, in display order
+        """
+        rows = self._search_index.search(text).astype(np.int64)
+        idx_selected = self._idx_selected
+        if self._descending:
+            idx_selected = idx_selected[::-1]
+        positions = np.searchsorted(idx_selected, rows)
+        is_selected = positions < len(idx_selected)
+        is_selected[is_selected] = idx_selected[positions[is_selected]] == rows[is_selected]
+        positions = positions[is_selected]
+        if self._descending:
+            positions = (len(idx_selected) - 1 - positions)[::-1]
+        return positions
+
+    def load(self, file_log: str, rotated: bool = False):
+        self._set_files(file_log=file_log, rotated=rotated)
+        if not self._file.exists():
+            logger.error(f"Log file '{file_log}' does not exist")
         else:
             self._load_file()
 
-    def entries_formatted(self, level_colors: dict) -> list:
-        lst_entries = []
-        # Turn rows into tuples, taking only the runs that were selected
-        df_selected = self._df_log[self._df_log["_selected"]]
-        df_selected.drop("_selected", axis=1, inplace=True)
-        lst_columns = list(df_selected.columns)
-        for _, row in df_selected.iterrows():
-            entry = ()
-            for col in lst_columns:
-                # Color levelname
-                if col == "levelname":
-                    levelname = Text(row[col])
-                    levelname.style = f"bold {level_colors[row[col]]}"
-                    entry = entry + (levelname,)
+    def _select(self, start: int = 0) -> None:
+        """Stores the selected rows, of the rows from start on when the rows before start
+        are selected already, like after appending entries
+
+        Args:
+            start (int, optional): The first row to select. Defaults to 0 for all rows.
+        """
+        is_selected = self._bitmap_index.mask(self._dict_filters, start=start)
+        if self._lst_clauses:
+            start_query = min(start, self._query_cache.qty_evaluated(self._lst_clauses))
+            mask_query = self._query_cache.mask(
+                self._chunks.rows_from(start_query),
+                self._lst_clauses,
+                read_column=self._read_lazy_column,
+                start=start_query,
+            )
+            is_selected = is_selected & mask_query[start - start_query :]
+        rows = start + np.flatnonzero(is_selected)
+        if start == 0:
+            # A new buffer, so the rows of a selection taken before stay as they were
+            self._rows_selected = rows
+            self._qty_selected = len(rows)
+        else:
+            self._rows_selected = extend_buffer(self._rows_selected, self._qty_selected, rows)
+            self._qty_selected = self._qty_selected + len(rows)
+
+    @property
+    def _idx_selected(self) -> np.ndarray:
+        """The selected rows in the display order"""
+        rows = self._rows_selected[: self._qty_selected]
+        return rows[::-1] if self._descending else rows
+
+    @property
+    def row_count(self) -> int:
+        """The number of selected rows"""
+        return self._qty_selected
+
+    def timeline(self, max_buckets: int, width: int = None) -> Histogram:
+        """The number of entries per level per time bucket, over all entries of the log
+
+        Args:
+            max_buckets (int): The number of buckets the whole log is fitted in when no width is given
+            width (int, optional): The bucket width in seconds, one of log_timeline.WIDTHS. Defaults to None for fitting the log in max_buckets.
+
+        Returns:
+            Histogram: The buckets from the first to the last entry, None when no entry has a time
+        """
+        with self._lock:
+            asctime_first, asctime_last = self._asctime_range
+            span = (asctime_last - asctime_first).total_seconds()
+            if pd.isna(span):
+                return None
+            width_min = auto_width(span=span, max_buckets=MAX_BUCKETS)
+            if width is None:
+                width = auto_width(span=span, max_buckets=max_buckets)
+            width = max(width, width_min)
+            # Only the entries appended since the histogram was last counted are read
+            start = self._timeline_cache.qty_counted(width)
+            return self._timeline_cache.histogram(self._chunks.rows_from(start), width=width, start=start)
+
+    def position_at(self, start: np.datetime64, end: np.datetime64) -> int:
+        """The position of the selected entry a time bucket starts with in the display
+        order, the first entry of the bucket or, when sorted descending, the last
+
+        Args:
+            start (np.datetime64): The start of the bucket
+            end (np.datetime64): The end of the bucket
+
+        Returns:
+            int: The position, -1 when nothing is selected
+        """
+        with self._lock:
+            if self._qty_selected == 0:
+                return -1
+            idx_ascending = self._rows_selected[: self._qty_selected]
+            asctime = self._chunks.take(idx_ascending, ["asctime"])["asctime"].to_numpy()
+            if self._descending:
+                position = len(asctime) - np.searchsorted(asctime, np.datetime64(end, "ns"))
+            else:
+                position = np.searchsorted(asctime, np.datetime64(start, "ns"))
+            return int(min(max(position, 0), len(asctime) - 1))
+
+    def sort_asctime(self, descending: bool) -> None:
+        """Sets the display order of the selected rows on asctime
+
+        Args:
+            descending (bool): Show the newest entries first
+        """
+        with self._lock:
+            self._descending = descending
+
+    def entries_formatted(
+        self, level_colors: dict, start: int = 0, stop: int = None, columns: tuple = None
+    ) -> list:
+        """The selected entries as tuples, with levelname colored
+
+        Args:
+            level_colors (dict): The color for each levelname
+            start (int, optional): The position of the first selected row. Defaults to 0.
+            stop (int, optional): The position after the last selected row. Defaults to None for all rows.
+            columns (tuple, optional): The columns of the tuples, columns the log does not have are empty. Defaults to None for the headers.
+
+        Returns:
+            list: Tuples with the values of the columns for each entry
+        """
+        with stage("format") as record:
+            # The headers are read once, entries loaded meanwhile can add columns
+            selection = self.selection()
+            if columns is None:
+                columns = tuple(col for col in selection.columns if col in self._chunks.columns)
+            selection = Selection(
+                rows=selection.rows,
+                columns=tuple(col for col in columns if col in selection.columns),
+            )
+            df_selected = self.take(selection, start=start, stop=stop)
+            dict_level_text = self._level_texts(level_colors=level_colors)
+            lst_columns = []
+            for col in columns:
+                if col not in df_selected.columns:
+                    values = [""] * df_selected.shape[0]
+                elif pd.api.types.is_datetime64_any_dtype(df_selected[col]):
+                    values = format_asctime(df_selected[col])
+                    if df_selected[col].hasnans:
+                        values = ["" if pd.isna(value) else value for value in values]
                 else:
-                    entry = entry + (row[col],)
-            lst_entries.append(entry)
+                    values = df_selected[col].tolist()
+                # Color levelname by sharing one Text per level
+                if col == "levelname":
+                    values = [dict_level_text.get(level, level) for level in values]
+                lst_columns.append(values)
+            lst_entries = list(zip(*lst_columns)) if lst_columns else [()] * df_selected.shape[0]
+            record["rows"] = len(lst_entries)
         return lst_entries
 
+    @staticmethod
+    def _level_texts(level_colors: dict) -> dict:
+        """A colored Text for each levelname, shared by all entries of that level"""
+        dict_level_text = {
+            level: Text(level, style=f"bold {color}")
+            for level, color in level_colors.items()
+        }
+        return dict_level_text
+
     @property
     def headers(self) -> tuple:
-        columns = list(self._df_log.columns)
-        columns.remove("_selected")
-        headers = tuple(columns)
+        headers = tuple(self._chunks.columns)
         return headers
 
     @property
     def entries(self) -> tuple:
-        lst_entries = list(self._df_log.itertuples(index=False, name=None))
+        lst_entries = list(self._chunks.frame().itertuples(index=False, name=None))
         return lst_entries
 
     @property
     def runs(self) -> list:
-        """Lists the runs present in the logfile (based on de process)
+        """The runs present in the log (based on the process), the latest run first
+
+        The statistics are kept up to date while loading and tailing, so this does not
+        touch the entries.
 
         Returns:
-            list: _description_
+            list: A dict per run with process, asctime_first, asctime_last, row_first, row_last, qty_entries and levels (the entries per levelname)
         """
-        lst_runs = []
-        idx_runs_max = (
-            self._df_log
-            .groupby("process").asctime.idxmax()
-        )
-        df_runs = self._df_log.loc[idx_runs_max, ["process", "asctime"]]
-        df_runs.sort_values(by="asctime", ascending=False, inplace=True)
-        i = 0
-        for _, row in df_runs.iterrows():
-            lst_runs.append((row["asctime"], row["process"], i==0))
-            i = i + 1
-        return lst_runs
+        with self._lock:
+            return self._run_index.runs()
 
     def filter_runs(self, lst_runs: list) -> None:
         """_summary_
@@ -99,22 +768,140 @@ class LogFile:
         Returns:
             _type_: _description_
         """
-        self._df_log.loc[:, "_selected"] = self._df_log["process"].isin(lst_runs)
+        self.filter_values({"process": lst_runs})
+
+    def filter_values(self, dict_filters: dict) -> None:
+        """Selects the entries with one of the given values for columns with few distinct values
+
+        The filters are resolved with the bitmap index, so changing them does not scan the log.
+
+        Args:
+            dict_filters (dict): For levelname, process, module or funcName the values to include, None to no longer filter the column
+        """
+        with self._lock, stage("filter") as record:
+            for col, lst_values in dict_filters.items():
+                if lst_values is None:
+                    self._dict_filters.pop(col, None)
+                else:
+                    self._dict_filters[col] = list(lst_values)
+            self._select()
+            record["rows"] = self.row_count
+
+    @property
+    def query(self) -> str:
+        """The query the selected entries match"""
+        return self._query
 
-    def export(self, file: str, options: dict) -> bool:
-        """Export the log to an Excel file, dropping rows and columns specified by options
+    def filter_query(self, query: str) -> None:
+        """Selects the entries of the filtered runs that match a query
 
         Args:
-            file (str): The path of the Excel file
+            query (str): The query, see log_query.parse_query. An empty query selects all entries.
+
+        Raises:
+            QueryError: When the query cannot be parsed or refers to an unknown field
+        """
+        lst_clauses = parse_query(query)
+        with self._lock, stage("filter") as record:
+            lst_clauses_previous = self._lst_clauses
+            self._lst_clauses = lst_clauses
+            try:
+                self._select()
+            except QueryError:
+                self._lst_clauses = lst_clauses_previous
+                raise
+            self._query = query.strip()
+            record["rows"] = self.row_count
+
+    def export(self, file: str, options: dict, selection: Selection = None) -> bool:
+        """Export the log to a file, dropping rows and columns specified by options
+
+        Args:
+            file (str): The path of the file, its suffix selects the format, see log_export.SUFFIXES; Excel for other suffixes
             options (dict): Specifies which columns should be dropped and what 'levelname' values should be dropped
+            selection (Selection, optional): A result of selection to export, instead of selecting again. Defaults to None.
         """
         success = False
-        df_export = self.filtered(options=options)
-        if df_export.shape[0] > 0:
-            df_export.to_excel(file, index=False)
+        for _ in self.export_chunks(file=file, options=options, selection=selection):
             success = True
         return success
 
+    def export_chunks(
+        self, file: str, options: dict, selection: Selection = None
+    ) -> Iterator[float]:
+        """Exports the log to a file in chunks of rows, reporting progress
+
+        Only a chunk of the entries is copied at a time.
+
+        Args:
+            file (str): The path of the file, its suffix selects the format, see log_export.SUFFIXES; Excel for other suffixes
+            options (dict): Specifies which columns should be dropped and what 'levelname' values should be dropped
+            selection (Selection, optional): A result of selection to export, instead of selecting again. Defaults to None.
+
+        Yields:
+            float: The percentage of the entries exported, nothing when no entries are left to export
+        """
+        if selection is None:
+            selection = self.selection(options=options)
+        if len(selection.rows) > 0:
+            format_export = export_format(file, default="xlsx")
+            with stage("export") as record:
+                yield from WRITERS[format_export](
+                    lst_columns=list(selection.columns),
+                    qty_rows=len(selection.rows),
+                    take=lambda start, stop: self.take(selection, start=start, stop=stop),
+                    file=file,
+                )
+                record.update(rows=len(selection.rows), format=format_export)
+
+    def selection(self, options: dict = None) -> Selection:
+        """The selected entries, further filtered on options
+
+        The rows are the positions kept by the filters, so selecting copies no entries.
+
+        Args:
+            options (dict, optional): Specifies which columns should be dropped and what rows should be dropped on 'levelname' values. Defaults to None for all selected entries and columns.
+
+        Returns:
+            Selection: The rows in display order and the columns
+        """
+        rows = self._idx_selected
+        lst_columns = list(self.headers)
+        if self._is_lazy:
+            lst_columns = lst_columns + COLUMNS_LAZY
+        if options is None:
+            return Selection(rows=rows, columns=tuple(lst_columns))
+        if len(options["level_excludes"]) > 0:
+            lst_levels = [
+                level
+                for level in self._bitmap_index.values("levelname")
+                if level not in options["level_excludes"]
+            ]
+            is_level = self._bitmap_index.mask({"levelname": lst_levels})
+            rows = rows[is_level[rows]]
+        lst_columns = [col for col in lst_columns if col not in options["col_excludes"]]
+        return Selection(rows=rows, columns=tuple(lst_columns))
+
+    def take(self, selection: Selection, start: int = 0, stop: int = None) -> pd.DataFrame:
+        """Copies the entries of a selection, only its columns and only the rows from start up to stop
+
+        Args:
+            selection (Selection): A result of selection
+            start (int, optional): The position of the first row. Defaults to 0.
+            stop (int, optional): The position after the last row. Defaults to None for all rows.
+
+        Returns:
+            pd.DataFrame: The entries
+        """
+        rows = selection.rows[start:stop]
+        columns = self._chunks.columns
+        lst_lazy = [col for col in selection.columns if col not in columns]
+        df_taken = self._chunks.take(rows, [col for col in selection.columns if col in columns])
+        if lst_lazy:
+            df_lazy = self._read_lazy_columns(rows)[lst_lazy].set_index(df_taken.index)
+            df_taken = pd.concat([df_taken, df_lazy], axis=1)[list(selection.columns)]
+        return df_taken
+
     def filtered(self, options: dict) -> pd.DataFrame:
         """The log filtered based on options and run filter
 
@@ -124,12 +911,4 @@ class LogFile:
         Returns:
             pd.DataFrame: A filtered set of log entries and columns
         """
-        df_filtered = self._df_log[self._df_log["_selected"]]
-        df_filtered.drop("_selected", axis=1, inplace=True)
-        if len(options["col_excludes"]) > 0:
-            print("me")
-            df_filtered.drop(options["col_excludes"], axis=1, inplace=True)
-        if len(options["level_excludes"]) > 0:
-            df_filtered = df_filtered.loc[~df_filtered['levelname'].isin(options["level_excludes"])]
-        return df_filtered
-
+        return self.take(self.selection(options=options))
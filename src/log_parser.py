@@ -0,0 +1,523 @@
+import glob
+import json
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+from log_decoders import decode_lines, is_record
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+# The asctime format written by the JsonFormatter of logging_config.LOGGING
+FORMAT_ASCTIME = "%Y-%m-%d %H:%M:%S,%f"
+# Columns with few distinct values, stored as categoricals
+COLUMNS_CATEGORY = ["levelname", "module", "funcName", "process"]
+# The bytes parsed at a time, so the memory used while parsing is bounded by a chunk
+CHUNK_BYTES = 4 * 1024 * 1024
+# Columns left out in lazy mode, they are read from the file when needed
+COLUMNS_LAZY = ["message"]
+# The entries whose lazy columns are read from the file at a time
+CHUNK_ROWS_LAZY = 100_000
+# The byte offset of the line of each entry, parsed in lazy mode
+COLUMN_LINE_OFFSET = "_line_offset"
+
+
+def rotation_set(file_log: str) -> list:
+    """The files of a log rotated by a RotatingFileHandler, oldest first
+
+    Args:
+        file_log (str): The path of the log (log.json finds log.json.1 … log.json.N) or a glob pattern
+
+    Returns:
+        list: Paths of the files, the file that is written to last
+    """
+    if glob.has_magic(file_log):
+        lst_files = [Path(file) for file in glob.glob(file_log)]
+    else:
+        file = Path(file_log)
+        lst_files = [file] + [
+            path
+            for path in file.parent.glob(glob.escape(file.name) + ".*")
+            if path.suffix[1:].isdigit()
+        ]
+    lst_files = [file for file in lst_files if file.is_file()]
+    return sorted(lst_files, key=lambda file: (-_rotation_number(file), file.name))
+
+
+def _rotation_number(file: Path) -> int:
+    """The number a RotatingFileHandler appends to a rotated file, 0 for the file written to"""
+    suffix = file.suffix[1:]
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def is_complete(line: bytes) -> bool:
+    """Whether a line is completely written: terminated or valid JSON at the end of the file"""
+    if line.endswith(b"\n"):
+        return True
+    try:
+        json.loads(line)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_lines(
+    lines: list, offset: int = 0, lazy: bool = False, decoder: str = "pandas"
+) -> tuple:
+    """Parses JSON lines into a dataframe
+
+    Args:
+        lines (list): The lines
+        offset (int, optional): The byte offset of the first line. Defaults to 0.
+        lazy (bool, optional): Keep the line offsets, so the lazy columns can be left out once indexed. Defaults to False.
+        decoder (str, optional): The name of the JSON decoder, see log_decoders. Defaults to "pandas".
+
+    Returns:
+        tuple: The dataframe with an entry per valid line and the offsets of the rejected lines
+    """
+    return parse_buffer(b"".join(lines), offset=offset, lazy=lazy, decoder=decoder)
+
+
+def parse_buffer(
+    data: bytes, offset: int = 0, lazy: bool = False, decoder: str = "pandas"
+) -> tuple:
+    """Parses a buffer of JSON lines into a dataframe, skipping lines that are not JSON objects
+
+    The buffer is decoded at once; only when that fails the lines are checked one by
+    one, so a malformed line costs a second pass over its own chunk only.
+
+    Args:
+        data (bytes): Complete lines
+        offset (int, optional): The byte offset of the buffer. Defaults to 0.
+        lazy (bool, optional): Keep the offset of each line in COLUMN_LINE_OFFSET. The lazy columns are kept for indexing, LogFile leaves them out once appended. Defaults to False.
+        decoder (str, optional): The name of the JSON decoder, see log_decoders. Defaults to "pandas".
+
+    Returns:
+        tuple: The dataframe with an entry per valid line and the offsets of the rejected lines
+    """
+    offsets_rejected = np.empty(0, dtype=np.int64)
+    if not data.strip():
+        return pd.DataFrame(), offsets_rejected
+    try:
+        df_lines = decode_lines(data, decoder=decoder)
+        if lazy:
+            offsets_lines = line_starts(data, offset=offset)
+    except (ValueError, TypeError):
+        data, offsets_lines, offsets_rejected = _valid_lines(data, offset=offset)
+        logger.warning(
+            f"Skipping {len(offsets_rejected)} lines that are not JSON objects at offsets "
+            f"{offsets_rejected[:10].tolist()}"
+        )
+        df_lines = decode_lines(data, decoder=decoder) if data else pd.DataFrame()
+    if lazy and df_lines.shape[0] > 0:
+        df_lines[COLUMN_LINE_OFFSET] = offsets_lines
+    return normalize_dtypes(df_lines), offsets_rejected
+
+
+def _valid_lines(data: bytes, offset: int) -> tuple:
+    """Separates the lines that are JSON objects from the others
+
+    Returns:
+        tuple: The valid lines joined, their offsets and the offsets of the other lines
+    """
+    lst_lines = []
+    lst_offsets = []
+    lst_rejected = []
+    for start in line_starts(data).tolist():
+        end = data.find(b"\n", start)
+        line = data[start:] if end == -1 else data[start : end + 1]
+        if is_record(line):
+            lst_lines.append(line)
+            lst_offsets.append(offset + start)
+        else:
+            lst_rejected.append(offset + start)
+    return (
+        b"".join(lst_lines),
+        np.array(lst_offsets, dtype=np.int64),
+        np.array(lst_rejected, dtype=np.int64),
+    )
+
+
+def line_starts(data: bytes, offset: int = 0) -> np.ndarray:
+    """The offsets of the starts of the lines in a buffer, leaving out blank lines
+    like read_json does
+
+    Args:
+        data (bytes): Lines
+        offset (int, optional): The offset of the buffer. Defaults to 0.
+
+    Returns:
+        np.ndarray: The offsets as int64
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if len(buffer) == 0:
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero(buffer == ord("\n"))
+    if buffer[-1] != ord("\n"):
+        ends = np.append(ends, len(buffer))
+    starts = np.concatenate([[0], ends[:-1] + 1]).astype(np.int64)
+    # Only lines starting with whitespace can be blank, so only those are checked one by one
+    is_space = np.zeros(256, dtype=bool)
+    is_space[list(b" \t\n\r\x0b\x0c")] = True
+    idx_space = np.flatnonzero(is_space[buffer[starts]])
+    is_blank = np.zeros(len(starts), dtype=bool)
+    for i in idx_space:
+        is_blank[i] = not data[starts[i] : ends[i]].strip()
+    return starts[~is_blank] + offset
+
+
+def normalize_dtypes(df_log: pd.DataFrame) -> pd.DataFrame:
+    """Stores asctime as datetime64 and the columns with few distinct values as categoricals"""
+    if "asctime" in df_log.columns and df_log["asctime"].dtype == object:
+        df_log["asctime"] = parse_asctime(df_log["asctime"])
+    for col in COLUMNS_CATEGORY:
+        if col in df_log.columns and not isinstance(df_log[col].dtype, pd.CategoricalDtype):
+            df_log[col] = df_log[col].astype("category")
+    return df_log
+
+
+def parse_asctime(values: pd.Series) -> pd.Series:
+    """Parses asctime written with FORMAT_ASCTIME, inferring the format of the other times
+
+    Times written in another format, like ISO 8601 with a T, are parsed with the format
+    inferred for each value. Their UTC offsets are dropped, so they keep the local time
+    they were written with. Values that are not times become NaT.
+
+    Args:
+        values (pd.Series): The asctime values as written in the log
+
+    Returns:
+        pd.Series: The times as datetime64
+    """
+    asctime = pd.to_datetime(values, format=FORMAT_ASCTIME, errors="coerce")
+    is_failed = asctime.isna() & values.notna()
+    if not is_failed.any():
+        return asctime
+    values_failed = values[is_failed].astype(str).str.replace(
+        r"\s*(Z|[+-]\d\d:?\d\d)$", "", regex=True
+    )
+    asctime[is_failed] = pd.to_datetime(values_failed, format="mixed", errors="coerce")
+    qty_invalid = int((asctime.isna() & values.notna()).sum())
+    if qty_invalid > 0:
+        logger.warning(f"{qty_invalid} asctime values are not times, e.g. '{values[is_failed].iloc[0]}'")
+    return asctime
+
+
+def format_asctime(asctime: pd.Series) -> list:
+    """Formats asctime values the way they are written in the log"""
+    return asctime.dt.strftime(FORMAT_ASCTIME).str[:-3].tolist()
+
+
+def concat_logs(lst_df: list) -> pd.DataFrame:
+    """Concatenates parsed logs, keeping the categorical columns categorical
+
+    Categoricals only stay categorical in a concat when their categories are the same,
+    so the categories of the frames are extended to the union of the categories first.
+    """
+    lst_df = [df for df in lst_df if df.shape[0] > 0]
+    if len(lst_df) == 0:
+        return pd.DataFrame()
+    for col in COLUMNS_CATEGORY:
+        lst_dtypes = [df[col].dtype for df in lst_df if col in df.columns]
+        if len(lst_dtypes) < len(lst_df) or len(set(lst_dtypes)) < 2:
+            continue
+        if not all(isinstance(dtype, pd.CategoricalDtype) for dtype in lst_dtypes):
+            continue
+        categories = lst_dtypes[0].categories
+        for dtype in lst_dtypes[1:]:
+            categories = categories.append(dtype.categories.difference(categories))
+        dtype_union = pd.CategoricalDtype(categories)
+        lst_unified = []
+        for df in lst_df:
+            if df[col].dtype != dtype_union:
+                df = df.copy(deep=False)
+                df[col] = df[col].cat.set_categories(categories)
+            lst_unified.append(df)
+        lst_df = lst_unified
+    return pd.concat(lst_df, ignore_index=True)
+
+
+def map_file(file: Path) -> mmap.mmap | None:
+    """Maps a log file read-only, None when it is empty (an empty file cannot be mapped)"""
+    with open(file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_buffer(
+    buffer: mmap.mmap,
+    start: int,
+    end: int,
+    chunk_bytes: int = CHUNK_BYTES,
+    lazy: bool = False,
+    decoder: str = "pandas",
+) -> Iterator[tuple]:
+    """Parses the lines in a byte range of a mapped log file in chunks
+
+    The chunks are sliced from the mapping at line ends, so the lines are never split
+    into separate objects and only one chunk is copied at a time.
+
+    Args:
+        buffer (mmap.mmap): The mapped log file
+        start (int): The offset of the first line
+        end (int): The offset after the last line
+        chunk_bytes (int, optional): The number of bytes parsed at a time. Defaults to CHUNK_BYTES.
+        lazy (bool, optional): Keep the line offsets, so the lazy columns can be left out once indexed. Defaults to False.
+        decoder (str, optional): The name of the JSON decoder, see log_decoders. Defaults to "pandas".
+
+    Yields:
+        tuple: The dataframe of a chunk, the bytes read, the bytes of the complete lines and the offsets of the rejected lines
+    """
+    pos = start
+    while pos < end:
+        stop = min(pos + chunk_bytes, end)
+        if stop < end:
+            newline = buffer.find(b"\n", stop - 1, end)
+            stop = end if newline == -1 else newline + 1
+        size_complete = stop - pos
+        if buffer[stop - 1] != ord("\n"):
+            # Leave a line that is still being written for tail
+            newline = buffer.rfind(b"\n", pos, stop)
+            line_start = pos if newline == -1 else newline + 1
+            if not is_complete(buffer[line_start:stop]):
+                size_complete = line_start - pos
+        data = buffer[pos : pos + size_complete]
+        with stage("parse") as record:
+            df_chunk, offsets_rejected = parse_buffer(data, offset=pos, lazy=lazy, decoder=decoder)
+            record["rows"] = df_chunk.shape[0]
+        yield df_chunk, stop - pos, size_complete, offsets_rejected
+        pos = stop
+
+
+def read_file(file: Path, decoder: str = "pandas") -> tuple:
+    """Reads a whole log file into a dataframe sorted on asctime
+
+    Args:
+        file (Path): The log file
+        decoder (str, optional): The name of the JSON decoder, see log_decoders. Defaults to "pandas".
+
+    Returns:
+        tuple: The dataframe, the offset after the last complete line, the inode of the file and the offsets of the rejected lines
+    """
+    inode = file.stat().st_ino
+    df_file, offset, offsets_rejected = read_range(file, start=0, end=None, decoder=decoder)
+    if df_file.shape[0] > 0 and not df_file["asctime"].is_monotonic_increasing:
+        with stage("sort") as record:
+            df_file.sort_values(by="asctime", kind="stable", inplace=True, ignore_index=True)
+            record["rows"] = df_file.shape[0]
+    return df_file, offset, inode, offsets_rejected
+
+
+def read_chunks(
+    file: Path,
+    chunk_bytes: int = CHUNK_BYTES,
+    lazy: bool = False,
+    buffer: mmap.mmap = None,
+    decoder: str = "pandas",
+) -> Iterator[tuple]:
+    """Reads a log file in chunks of lines
+
+    Args:
+        file (Path): The log file
+        chunk_bytes (int, optional): The number of bytes parsed at a time. Defaults to CHUNK_BYTES.
+        lazy (bool, optional): Keep the line offsets, so the lazy columns can be left out once indexed. Defaults to False.
+        buffer (mmap.mmap, optional): The file mapped by the caller, which keeps it open. Defaults to None for mapping it here.
+        decoder (str, optional): The name of the JSON decoder, see log_decoders. Defaults to "pandas".
+
+    Yields:
+        tuple: The dataframe of a chunk, the bytes read, the bytes of the complete lines and the offsets of the rejected lines
+    """
+    if buffer is not None:
+        yield from read_buffer(
+            buffer, 0, len(buffer), chunk_bytes=chunk_bytes, lazy=lazy, decoder=decoder
+        )
+        return
+    buffer = map_file(file)
+    if buffer is None:
+        return
+    with buffer:
+        yield from read_buffer(
+            buffer, 0, len(buffer), chunk_bytes=chunk_bytes, lazy=lazy, decoder=decoder
+        )
+
+
+def split_ranges(file: Path, size: int, parts: int) -> list:
+    """Splits a file in byte ranges that start at the start of a line
+
+    Args:
+        file (Path): The log file
+        size (int): The number of bytes to split
+        parts (int): The number of ranges to split into, fewer when lines are long
+
+    Returns:
+        list: Tuples with the start and end of each range
+    """
+    lst_bounds = [0]
+    with open(file, "rb") as f:
+        for part in range(1, parts):
+            f.seek(max(size * part // parts - 1, lst_bounds[-1]))
+            f.readline()
+            bound = f.tell()
+            if lst_bounds[-1] < bound < size:
+                lst_bounds.append(bound)
+    lst_bounds.append(size)
+    return list(zip(lst_bounds[:-1], lst_bounds[1:]))
+
+
+def read_range(
+    file: Path, start: int, end: int | None, lazy: bool = False, decoder: str = "pandas"
+) -> tuple:
+    """Reads the lines in a byte range of a log file
+
+    Args:
+        file (Path): The log file
+        start (int): The offset of the first line
+        end (int | None): The offset after the last line, None for the end of the file
+        lazy (bool, optional): Keep the line offsets, so the lazy columns can be left out once indexed. Defaults to False.
+        decoder (str, optional): The name of the JSON decoder, see log_decoders. Defaults to "pandas".
+
+    Returns:
+        tuple: The dataframe, the bytes of the complete lines and the offsets of the rejected lines
+    """
+    buffer = map_file(file)
+    if buffer is None:
+        return pd.DataFrame(), 0, np.empty(0, dtype=np.int64)
+    with buffer:
+        end = len(buffer) if end is None else min(end, len(buffer))
+        lst_chunks = list(read_buffer(buffer, start, end, lazy=lazy, decoder=decoder))
+    df_range = concat_logs([chunk[0] for chunk in lst_chunks])
+    size_complete = sum(chunk[2] for chunk in lst_chunks)
+    offsets_rejected = np.concatenate(
+        [np.empty(0, dtype=np.int64)] + [chunk[3] for chunk in lst_chunks]
+    )
+    return df_range, size_complete, offsets_rejected
+
+
+def read_ranges(
+    file: Path, size: int, workers: int, lazy: bool = False, decoder: str = "pandas"
+) -> Iterator[tuple]:
+    """Reads a log file split in byte ranges that are parsed by worker processes
+
+    The ranges are yielded in file order, so they can be shown while later ranges are
+    still being parsed.
+
+    Args:
+        file (Path): The log file
+        size (int): The number of bytes to read
+        workers (int): The number of worker processes
+        lazy (bool, optional): Keep the line offsets, so the lazy columns can be left out once indexed. Defaults to False.
+        decoder (str, optional): The name of the JSON decoder, see log_decoders. Defaults to "pandas".
+
+    Yields:
+        tuple: The dataframe of a range, the bytes read, the bytes of the complete lines and the offsets of the rejected lines
+    """
+    # More ranges than workers, so the first range is shown early and the load stays balanced
+    lst_ranges = split_ranges(file, size=size, parts=workers * 4)
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=_spawn_context())
+    try:
+        futures = [
+            executor.submit(read_range, file, start, end, lazy, decoder)
+            for start, end in lst_ranges
+        ]
+        for (start, end), future in zip(lst_ranges, futures):
+            df_range, size_complete, offsets_rejected = future.result()
+            yield df_range, end - start, size_complete, offsets_rejected
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def read_files(
+    lst_files: list, workers: int, parallel_min_bytes: int, decoder: str = "pandas"
+) -> Iterator[tuple]:
+    """Reads log files, in worker processes when they are large enough to benefit
+
+    Args:
+        lst_files (list): The log files
+        workers (int): The maximum number of worker processes
+        parallel_min_bytes (int): The total size below which the files are read in this process
+        decoder (str, optional): The name of the JSON decoder, see log_decoders. Defaults to "pandas".
+
+    Yields:
+        tuple: A file with the result of read_file for it, in order of completion
+    """
+    size_total = sum(file.stat().st_size for file in lst_files)
+    if len(lst_files) < 2 or workers < 2 or size_total < parallel_min_bytes:
+        for file in lst_files:
+            yield file, read_file(file, decoder=decoder)
+        return
+    executor = ProcessPoolExecutor(
+        max_workers=min(workers, len(lst_files)), mp_context=_spawn_context()
+    )
+    try:
+        futures = {executor.submit(read_file, file, decoder): file for file in lst_files}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _spawn_context() -> multiprocessing.context.BaseContext:
+    """Spawned workers do not inherit the locks held by the threads of the viewer"""
+    return multiprocessing.get_context("spawn")
+
+
+def merge_sorted(lst_df: list, column: str) -> pd.DataFrame:
+    """Merges dataframes that are each sorted on a column into one sorted dataframe
+
+    The frames are merged pairwise (a k-way merge in log2(k) rounds) by finding where
+    the rows of one frame go in the other with a binary search, so the frames are
+    never sorted as a whole. Rows with equal values keep the order of the frames.
+
+    Args:
+        lst_df (list): Dataframes sorted on column
+        column (str): The column the frames are sorted on
+
+    Returns:
+        pd.DataFrame: All rows, sorted on column
+    """
+    lst_df = [df for df in lst_df if df.shape[0] > 0]
+    if len(lst_df) == 0:
+        return pd.DataFrame()
+    lst_runs = []
+    start = 0
+    for df in lst_df:
+        lst_runs.append((df[column].to_numpy(), np.arange(start, start + df.shape[0])))
+        start = start + df.shape[0]
+    while len(lst_runs) > 1:
+        lst_merged = [
+            _merge_two(*lst_runs[i], *lst_runs[i + 1])
+            for i in range(0, len(lst_runs) - 1, 2)
+        ]
+        if len(lst_runs) % 2 == 1:
+            lst_merged.append(lst_runs[-1])
+        lst_runs = lst_merged
+    _, idx_order = lst_runs[0]
+    df_merged = concat_logs(lst_df)
+    df_merged = df_merged.take(idx_order).reset_index(drop=True)
+    return df_merged
+
+
+def _merge_two(
+    keys_a: np.ndarray, idx_a: np.ndarray, keys_b: np.ndarray, idx_b: np.ndarray
+) -> tuple:
+    """Merges two sorted key arrays, carrying along the row positions of the keys"""
+    pos_b = np.searchsorted(keys_a, keys_b, side="right") + np.arange(len(keys_b))
+    is_a = np.ones(len(keys_a) + len(keys_b), dtype=bool)
+    is_a[pos_b] = False
+    dtype = np.result_type(keys_a, keys_b)
+    keys = np.empty(len(is_a), dtype=dtype)
+    keys[is_a] = keys_a
+    keys[pos_b] = keys_b
+    idx = np.empty(len(is_a), dtype=np.int64)
+    idx[is_a] = idx_a
+    idx[pos_b] = idx_b
+    return keys, idx
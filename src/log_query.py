@@ -0,0 +1,262 @@
+import re
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from log_chunks import extend_buffer
+from log_parser import CHUNK_ROWS_LAZY
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+# Levels in order of severity, for comparing levelname
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+# A clause is a field, an operator and a value, or a bare value searched in the message
+PATTERN_CLAUSE = re.compile(
+    r"\s*(?:(?P<field>\w+)\s*(?P<op>>=|<=|!=|!~|!:|>|<|=|:|~))?\s*"
+    r"""(?P<value>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|\S+)"""
+)
+OPERATORS_ORDERED = {">=", "<=", ">", "<"}
+
+
+class QueryError(ValueError):
+    """A query that cannot be parsed or evaluated"""
+
+
+class Clause(NamedTuple):
+    field: str
+    op: str
+    value: str
+
+
+def parse_query(query: str) -> list:
+    """Parses a query into clauses that all must match
+
+    A clause is `field op value`, with operators
+        = and !=    equal or not equal
+        : and !:    contains or does not contain, case insensitive; a range `from..to` for ordered fields
+        ~ and !~    matches or does not match a regular expression, case insensitive
+        > >= < <=   compares, levels by severity and asctime as a time
+    Values with spaces are quoted with " or ', a value without a field is searched in the message.
+
+    Example: `levelname>=WARNING module:config message~"not present" asctime>="2024-01-01 10:00"`
+
+    Args:
+        query (str): The query
+
+    Returns:
+        list: The clauses
+    """
+    lst_clauses = []
+    query = query.strip()
+    pos = 0
+    while pos < len(query):
+        match = PATTERN_CLAUSE.match(query, pos)
+        if match is None or match.end() == pos:
+            raise QueryError(f"Cannot parse query at '{query[pos:]}'")
+        pos = match.end()
+        value = match["value"]
+        if value[0] in "\"'" and value.endswith(value[0]) and len(value) > 1:
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        lst_clauses.append(
+            Clause(field=match["field"] or "message", op=match["op"] or ":", value=value)
+        )
+    return lst_clauses
+
+
+def clause_mask(df_log: pd.DataFrame, clause: Clause) -> np.ndarray:
+    """Evaluates a clause over the rows of a log
+
+    Args:
+        df_log (pd.DataFrame): The log
+        clause (Clause): The clause
+
+    Returns:
+        np.ndarray: Whether each row matches
+    """
+    if clause.field not in df_log.columns:
+        raise QueryError(f"Unknown field '{clause.field}'")
+    series = df_log[clause.field]
+    op = clause.op
+    is_negated = op.startswith("!")
+    if is_negated:
+        op = {"!=": "=", "!:": ":", "!~": "~"}[op]
+    if op in OPERATORS_ORDERED or (op == ":" and ".." in clause.value and _is_ordered(series)):
+        mask = _compare(series, op, clause.value)
+    elif op == "=":
+        mask = _map_values(series, lambda values: values.astype(str) == clause.value)
+    elif op == ":":
+        mask = _map_values(
+            series,
+            lambda values: values.astype(str).str.contains(
+                clause.value, case=False, regex=False, na=False
+            ),
+        )
+    else:
+        try:
+            re.compile(clause.value)
+        except re.error as e:
+            raise QueryError(f"Invalid regular expression '{clause.value}': {e}") from e
+        mask = _map_values(
+            series,
+            lambda values: values.astype(str).str.contains(
+                clause.value, case=False, regex=True, na=False
+            ),
+        )
+    return ~mask if is_negated else mask
+
+
+def _is_ordered(series: pd.Series) -> bool:
+    """Whether a field compares by order: levels, times and numbers, also as categoricals"""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return (
+        series.name == "levelname"
+        or pd.api.types.is_datetime64_any_dtype(dtype)
+        or pd.api.types.is_numeric_dtype(dtype)
+    )
+
+
+def _map_values(series: pd.Series, func, missing=False) -> np.ndarray:
+    """Applies a vectorized function to the values of a series
+
+    For categoricals the function is applied to the categories only and looked up by
+    code, so a string match on a column with a few distinct values stays cheap.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        results = np.asarray(func(pd.Series(series.cat.categories)))
+        codes = series.cat.codes.to_numpy()
+        # A missing value has code -1, which looks up the appended missing result
+        return np.append(results, missing)[codes]
+    return np.asarray(func(series.fillna("")))
+
+
+def _compare(series: pd.Series, op: str, value: str) -> np.ndarray:
+    """Compares an ordered field to a value, or a range `from..to` for the : operator"""
+    if op == ":":
+        value_from, value_to = value.split("..", 1)
+        mask = np.ones(len(series), dtype=bool)
+        if value_from:
+            mask &= _compare(series, ">=", value_from)
+        if value_to:
+            mask &= _compare(series, "<=", value_to)
+        return mask
+    if series.name == "levelname":
+        if value.upper() not in LEVELS:
+            raise QueryError(f"Unknown level '{value}', expected one of {LEVELS}")
+        ranks = _map_values(series, lambda values: values.map(_level_rank), missing=-1)
+        values, value = ranks, LEVELS.index(value.upper())
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        try:
+            value = pd.Timestamp(value)
+        except ValueError as e:
+            raise QueryError(f"Invalid time '{value}': {e}") from e
+        values = series.to_numpy()
+        value = np.datetime64(value)
+    elif pd.api.types.is_numeric_dtype(series) or (
+        isinstance(series.dtype, pd.CategoricalDtype)
+        and pd.api.types.is_numeric_dtype(series.cat.categories)
+    ):
+        try:
+            value = float(value)
+        except ValueError as e:
+            raise QueryError(f"Invalid number '{value}' for '{series.name}'") from e
+        values = series.astype(float).to_numpy()
+    else:
+        values = series.astype(str).to_numpy()
+    with np.errstate(invalid="ignore"):
+        if op == ">=":
+            return np.asarray(values >= value, dtype=bool)
+        if op == "<=":
+            return np.asarray(values <= value, dtype=bool)
+        if op == ">":
+            return np.asarray(values > value, dtype=bool)
+        return np.asarray(values < value, dtype=bool)
+
+
+def _level_rank(level: str) -> int:
+    return LEVELS.index(level) if level in LEVELS else -1
+
+
+class QueryCache:
+    """The masks of recently evaluated clauses
+
+    Refining a query only evaluates the clauses that changed, and entries appended to
+    the log are evaluated for the new rows only. The masks grow by doubling their
+    capacity, so appending rows costs time proportional to the rows appended.
+    """
+
+    def __init__(self, max_clauses: int = 32):
+        self._max_clauses = max_clauses
+        # For each clause the mask of the rows, of which the first number were evaluated
+        self._masks: OrderedDict = OrderedDict()
+
+    def clear(self) -> None:
+        self._masks.clear()
+
+    def qty_evaluated(self, lst_clauses: list) -> int:
+        """The number of rows all clauses were evaluated for, mask needs the rows from there on"""
+        return min((self._masks.get(clause, (None, 0))[1] for clause in lst_clauses), default=0)
+
+    def mask(
+        self,
+        df_log: pd.DataFrame,
+        lst_clauses: list,
+        read_column: Callable[[str, int, int], pd.Series | None] = None,
+        start: int = 0,
+    ) -> np.ndarray:
+        """Evaluates clauses that all must match over the rows of a log
+
+        Args:
+            df_log (pd.DataFrame): The rows of the log from start on, the log is only ever appended to since the last clear
+            lst_clauses (list): The clauses
+            read_column (Callable[[str, int, int], pd.Series | None], optional): Returns the values of a field that is not a column of the log for the rows from start up to stop, None for an unknown field. Defaults to None.
+            start (int, optional): The row of the log df_log starts with, at most qty_evaluated of the clauses. Defaults to 0.
+
+        Returns:
+            np.ndarray: Whether each row of df_log matches all clauses
+        """
+        qty_rows = start + df_log.shape[0]
+        mask = np.ones(df_log.shape[0], dtype=bool)
+        for clause in lst_clauses:
+            mask_clause, qty_evaluated = self._masks.get(clause, (np.empty(0, dtype=bool), 0))
+            if qty_evaluated < start:
+                raise ValueError(f"Clause {clause} was evaluated for {qty_evaluated} rows, not up to row {start}")
+            if qty_evaluated < qty_rows:
+                mask_new = self._evaluate(
+                    df_log, clause, start=qty_evaluated - start, offset=start, read_column=read_column
+                )
+                mask_clause = extend_buffer(mask_clause, qty_evaluated, mask_new)
+                qty_evaluated = qty_rows
+            self._masks[clause] = (mask_clause, qty_evaluated)
+            self._masks.move_to_end(clause)
+            mask &= mask_clause[start:qty_rows]
+        while len(self._masks) > self._max_clauses:
+            self._masks.popitem(last=False)
+        return mask
+
+    @staticmethod
+    def _evaluate(
+        df_log: pd.DataFrame, clause: Clause, start: int, offset: int, read_column
+    ) -> np.ndarray:
+        """Evaluates a clause over the rows of df_log from start, reading a field that is
+        not a column of the log a chunk of rows at a time; the rows of df_log are the rows
+        of the log from offset on"""
+        qty_rows = df_log.shape[0]
+        series = None
+        if clause.field not in df_log.columns and read_column is not None:
+            series = read_column(
+                clause.field, offset + start, offset + min(start + CHUNK_ROWS_LAZY, qty_rows)
+            )
+        if series is None:
+            return clause_mask(df_log.iloc[start:], clause)
+        lst_masks = [clause_mask(series.to_frame(clause.field), clause)]
+        for start_chunk in range(start + CHUNK_ROWS_LAZY, qty_rows, CHUNK_ROWS_LAZY):
+            series = read_column(
+                clause.field, offset + start_chunk, offset + min(start_chunk + CHUNK_ROWS_LAZY, qty_rows)
+            )
+            lst_masks.append(clause_mask(series.to_frame(clause.field), clause))
+        return np.concatenate(lst_masks)
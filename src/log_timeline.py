@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+
+from logging_config import logging
+
+# The chart imports this module before the first frame, pandas is only needed to count
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# The bucket widths in seconds the timeline zooms through, from seconds to weeks
+WIDTHS = [1, 5, 15, 30, 60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 7 * 86400]
+# The most buckets counted for a width, zooming in further than this is refused
+MAX_BUCKETS = 100_000
+
+
+class Histogram(NamedTuple):
+    """The number of entries per level in consecutive time buckets"""
+
+    start: np.datetime64
+    width: int
+    levels: list
+    counts: np.ndarray
+
+    def bucket_start(self, bucket: int) -> np.datetime64:
+        """The time a bucket starts"""
+        return self.start + np.timedelta64(bucket * self.width, "s")
+
+
+def auto_width(span: float, max_buckets: int) -> int:
+    """The smallest bucket width of WIDTHS that fits a time span in a number of buckets
+
+    Args:
+        span (float): The time span in seconds
+        max_buckets (int): The number of buckets available
+
+    Returns:
+        int: The bucket width in seconds
+    """
+    return next((width for width in WIDTHS if span / width < max_buckets), WIDTHS[-1])
+
+
+def format_width(width: int) -> str:
+    """A bucket width as 5s, 15m, 3h or 1d"""
+    for unit, seconds in [("d", 86400), ("h", 3600), ("m", 60)]:
+        if width >= seconds and width % seconds == 0:
+            return f"{width // seconds}{unit}"
+    return f"{width}s"
+
+
+class TimelineCache:
+    """The number of entries per level per time bucket, for each bucket width
+
+    The entries are binned with one bincount over the bucket and level of each entry.
+    The counts of a bucket width are kept, so zooming back to it costs nothing, and
+    entries appended to the log are binned on their own and added to the counts.
+    """
+
+    def __init__(self):
+        self._dict_counts: dict = {}
+
+    def clear(self) -> None:
+        self._dict_counts = {}
+
+    def qty_counted(self, width: int) -> int:
+        """The number of entries counted for a width, histogram needs the entries from there on"""
+        counted = self._dict_counts.get(width)
+        return 0 if counted is None else counted["qty_rows"]
+
+    def histogram(self, df_log: pd.DataFrame, width: int, start: int = 0) -> Histogram:
+        """Counts the entries of a log per level in buckets of a width
+
+        Args:
+            df_log (pd.DataFrame): The entries of the log from start on, the log is only ever appended to since the last clear
+            width (int): The bucket width in seconds
+            start (int, optional): The row of the log df_log starts with, at most qty_counted of the width. Defaults to 0.
+
+        Returns:
+            Histogram: The buckets from the first to the last entry, None when no entry has a time
+        """
+        qty_rows = start + df_log.shape[0]
+        counted = self._dict_counts.get(width)
+        if counted is None or counted["qty_rows"] < qty_rows:
+            counted = self._count(df_log, width, counted, start=start)
+            self._dict_counts[width] = counted
+        if counted["counts"].shape[1] == 0:
+            return None
+        return Histogram(
+            start=np.datetime64(counted["bucket_first"] * width, "s"),
+            width=width,
+            levels=list(counted["levels"]),
+            counts=counted["counts"],
+        )
+
+    @staticmethod
+    def _count(df_log: pd.DataFrame, width: int, counted: dict = None, start: int = 0) -> dict:
+        """Adds the entries that were not counted yet to the counts of a width, df_log
+        holds the entries from start on"""
+        if counted is None:
+            counted = {
+                "qty_rows": 0,
+                "bucket_first": 0,
+                "levels": [],
+                "counts": np.zeros((0, 0), dtype=np.int64),
+            }
+        df_new = df_log.iloc[counted["qty_rows"] - start :]
+        counted = dict(counted, qty_rows=start + df_log.shape[0])
+        if "asctime" not in df_new.columns or df_new.shape[0] == 0:
+            return counted
+        asctime = df_new["asctime"].to_numpy(dtype="datetime64[s]")
+        is_timed = ~np.isnat(asctime)
+        buckets = asctime[is_timed].astype(np.int64) // width
+        if len(buckets) == 0:
+            return counted
+        if "levelname" in df_new.columns:
+            levels = df_new["levelname"].astype(object).fillna("")[is_timed]
+            codes_new, uniques = levels.factorize()
+        else:
+            codes_new, uniques = np.zeros(len(buckets), dtype=np.int64), [""]
+        lst_levels = list(counted["levels"])
+        for level in uniques:
+            if level not in lst_levels:
+                lst_levels.append(level)
+        codes = np.array([lst_levels.index(level) for level in uniques], dtype=np.int64)[codes_new]
+        counts = counted["counts"]
+        if counts.shape[1] == 0:
+            bucket_first = int(buckets.min())
+            bucket_last = bucket_first - 1
+        else:
+            bucket_first = counted["bucket_first"]
+            bucket_last = bucket_first + counts.shape[1] - 1
+        # Extend the counts to the levels and buckets of the new entries
+        bucket_first_new = min(bucket_first, int(buckets.min()))
+        bucket_last_new = max(bucket_last, int(buckets.max()))
+        qty_buckets = bucket_last_new - bucket_first_new + 1
+        counts_new = np.zeros((len(lst_levels), qty_buckets), dtype=np.int64)
+        shift = bucket_first - bucket_first_new
+        counts_new[: counts.shape[0], shift : shift + counts.shape[1]] = counts
+        counts_new += np.bincount(
+            codes * qty_buckets + (buckets - bucket_first_new),
+            minlength=len(lst_levels) * qty_buckets,
+        ).reshape(len(lst_levels), qty_buckets)
+        counted.update(bucket_first=bucket_first_new, levels=lst_levels, counts=counts_new)
+        return counted
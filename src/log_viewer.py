@@ -1,18 +1,27 @@
+from __future__ import annotations
+
 import os
+from typing import TYPE_CHECKING
 
 from rich.text import Text
-from textual import on
+from textual import on, work
 from textual.app import App, ComposeResult
 from textual.containers import Grid, Horizontal, Vertical
-from textual.widgets import DataTable, Footer, Header, Label, TextArea
+from textual.widgets import Footer, Header, Input, Label, ProgressBar, TextArea
+from textual.worker import get_current_worker
 
+import instrumentation
 from config import ConfigFile
-from dialog_export_options import DialogExportOptions
-from log_file import LogFile
 from logging_config import logging
-from dialog_open_log import DialogOpenLog
-from dialog_export_log import DialogExportLog
-from dialog_filter_runs import DialogFilterRuns
+from stats_overlay import StatsOverlay
+from timeline_chart import TimelineChart
+from virtual_table import VirtualTable
+
+# pandas, pyarrow and openpyxl take longer to import than the first frame takes to show,
+# the modules that need them are imported when a log is loaded or a dialog is opened
+if TYPE_CHECKING:
+    from log_cache import LogCache
+    from log_file import LogFile
 
 logger = logging.getLogger(__name__)
 
@@ -37,12 +46,38 @@ class LogViewer(App):
         border: round gray;
         width: 100%;
     }
+
+    #progress{
+        dock: bottom;
+        display: none;
+        padding: 0 1;
+    }
+
+    #progress.busy{
+        display: block;
+    }
+
+    .bar{
+        dock: bottom;
+        display: none;
+    }
+
+    .bar.visible{
+        display: block;
+    }
     """
 
     BINDINGS = [
         ("q", "quit", "Quit"),
         ("o", "open_file", "Open"),
         ("r", "reload_log", "Reload"),
+        ("l", "toggle_follow", "Follow"),
+        ("slash", "search", "Search"),
+        ("n", "search_next", "Next hit"),
+        ("N", "search_previous", "Previous hit"),
+        ("colon", "query", "Query"),
+        ("g", "toggle_timeline", "Timeline"),
+        ("i", "toggle_stats", "Stats"),
         ("e", "export_file", "Export log"),
         ("a", "sort_by_asc_time", "Sort asctime"),
         ("f", "filter_run", "Filter runs"),
@@ -64,16 +99,24 @@ class LogViewer(App):
         self._config = config_file
         self._file_log = config_file.file_default
         self._dir_default = config_file.dir_default
+        self._is_following = False
+        self._is_rotated = False
+        # The log file and the selection of the export being prepared
+        self._export = None
+        self._search_text = ""
+        instrumentation.configure(**config_file.instrumentation_options)
+        self._log_file: LogFile | None = None
+        # Created with the first log that is loaded
+        self._log_cache: LogCache | None = None
         if self._file_log == "":
             self.sub_title = "No log file opened"
         else:
-            self._log_file = LogFile(file_log=self._file_log)
             self.sub_title = self._file_log
 
     def compose(self) -> ComposeResult:
         yield Grid(
             Header(show_clock=True),
-            Horizontal(DataTable(id="table"), id="panel_table"),
+            Horizontal(VirtualTable(id="table"), id="panel_table"),
             Grid(
                 Vertical(
                     Label("Level", id="label_levelname"),
@@ -87,30 +130,49 @@ class LogViewer(App):
                 ),
                 id="panel_details",
             ),
+            ProgressBar(id="progress"),
+            TimelineChart(id="timeline", classes="bar"),
+            StatsOverlay(id="stats"),
+            Input(placeholder="Search messages", id="input_search", classes="bar"),
+            Input(
+                placeholder='Query, e.g. levelname>=WARNING module:config message~"not present"',
+                id="input_query",
+                classes="bar",
+            ),
             Footer(),
             id="app_grid",
         )
 
     def on_mount(self) -> None:
         self.notify("Hello, welcome to LogViewer", title="Welcome")
+        self._timer_follow = self.set_interval(1.0, self._follow_log, pause=True)
         if self._file_log == "":
             self.action_open_file()
-        else:
-            self.populate_table()
 
-    @on(DataTable.RowHighlighted)
-    @on(DataTable.RowSelected)
-    def on_row_selected(self, message: DataTable.RowSelected) -> None:
+    def on_ready(self) -> None:
+        """Loads the default log once the first frame is shown"""
+        if self._file_log != "":
+            self.load_log(file=self._file_log)
+
+    @on(VirtualTable.RowHighlighted)
+    @on(VirtualTable.RowSelected)
+    def on_row_selected(self, message: VirtualTable.RowSelected) -> None:
         """
         Display selected log record details
         """
+        # Only the highlighted entry is fetched from the log file
+        dict_entry = self._log_file.details(
+            level_colors=self._config.level_colors, position=message.cursor_row
+        )
+        if not dict_entry:
+            return
         # Get details for which values are present in log
         lst_col_details = ["asctime", "levelname", "message", "module", "funcName"]
-        lst_col_log = [column.value for column in self.query_one("#table").columns]
+        lst_col_log = list(dict_entry.keys())
         lst_col_present = list(set(lst_col_details) & set(lst_col_log))
         lst_col_missing = list(set(lst_col_details) - set(lst_col_log))
         for col in lst_col_present:
-            value = self.query_one("#table").get_cell(message.row_key, col)
+            value = dict_entry[col]
             if col not in ["levelname", "asctime"]:
                 label_value = Text()
                 label_value.append(col + ": ", style="bold")
@@ -125,23 +187,125 @@ class LogViewer(App):
         # Setting empty values for columns which are not in the log
         for col in lst_col_missing:
             label_id = "#label_" + col
-            self.query_one(label_id).update("")
+            if col == "message":
+                self.query_one(label_id).load_text("")
+            else:
+                self.query_one(label_id).update("")
 
     def populate_table(self, lst_run_filter: list = None) -> None:
-        """Populates the DataTable"""
-        table = self.query_one("DataTable")
-        table = table.clear(columns=True)
-        table.cursor_type = "row"
+        """Points the table to the selected entries of the log file, the table
+        fetches only the rows it displays"""
+        table = self.query_one(VirtualTable)
         table.zebra_stripes = True
-        for col in self._log_file.headers:
-            if col != "_selected":
-                table.add_column(col, key=col)
-        rows = self._log_file.entries_formatted(level_colors=self._config.level_colors)
-        table.add_rows(rows)
-        self.query_one("DataTable").focus()
+        # The rows are fetched for the columns of the header, a chunk loaded meanwhile can add columns
+        columns = self._log_file.headers
+        with instrumentation.stage("table_fill") as record:
+            table.set_source(
+                columns=columns,
+                row_count=self._log_file.row_count,
+                fetch_rows=lambda start, stop: self._log_file.entries_formatted(
+                    level_colors=self._config.level_colors, start=start, stop=stop, columns=columns
+                ),
+            )
+            record["rows"] = self._log_file.row_count
+        table.focus()
+        self.query_one(TimelineChart).set_source(
+            fetch_histogram=lambda max_buckets, width: self._log_file.timeline(
+                max_buckets=max_buckets, width=width
+            ),
+            level_colors=self._config.level_colors,
+        )
+
+    def load_log(self, file: str, rotated: bool = False) -> None:
+        """Starts loading a log file, entries are shown while it is loading
+
+        Args:
+            file (str): The path of the log file
+            rotated (bool, optional): Also load the files the log was rotated to. Defaults to False.
+        """
+        from log_cache import LogCache
+        from log_file import LogFile
+
+        self._file_log = file
+        self._is_rotated = rotated
+        self.sub_title = file
+        if self._log_cache is None:
+            cache_options = self._config.cache_options
+            self._log_cache = LogCache(
+                dir_cache=cache_options["dir"],
+                max_size_mb=cache_options["max_size_mb"],
+                enabled=cache_options["enabled"],
+            )
+        parser_options = self._config.parser_options
+        self._log_file = LogFile(
+            file_log=file,
+            load=False,
+            rotated=rotated,
+            cache=self._log_cache,
+            workers=parser_options["workers"],
+            parallel_min_mb=parser_options["parallel_min_mb"],
+            lazy=parser_options["lazy"],
+            decoder=parser_options["decoder"],
+        )
+        self.populate_table()
+        self.query_one(VirtualTable).loading = True
+        self._load_chunks(log_file=self._log_file)
+
+    @work(thread=True, exclusive=True, group="load_log")
+    def _load_chunks(self, log_file: LogFile) -> None:
+        """Loads the log file in a thread, passing each loaded chunk to the table
+
+        Opening another file cancels the worker, which stops loading after the current chunk.
+        """
+        worker = get_current_worker()
+        for progress, is_added in log_file.load_chunks():
+            if worker.is_cancelled:
+                return
+            self.call_from_thread(self._show_load_progress, log_file, progress, is_added)
+        self.call_from_thread(self._show_loaded, log_file)
+
+    def _show_load_progress(self, log_file: LogFile, progress: float, is_added: bool) -> None:
+        """Shows the loading progress and the entries loaded so far"""
+        if log_file is not self._log_file:
+            return
+        table = self.query_one(VirtualTable)
+        if is_added or progress >= 100:
+            table.loading = False
+        if is_added:
+            if table.columns != log_file.headers:
+                self.populate_table()
+            else:
+                with instrumentation.stage("table_fill") as record:
+                    table.set_row_count(log_file.row_count)
+                    record["rows"] = log_file.row_count
+            self.query_one(TimelineChart).refresh(layout=True)
+        self._show_sub_title(log_file, progress)
+
+    def _show_loaded(self, log_file: LogFile) -> None:
+        """Shows the loaded log and warns about the lines that were skipped"""
+        self._show_load_progress(log_file, 100.0, False)
+        if log_file is self._log_file and log_file.qty_rejected > 0:
+            self.notify(
+                f"Skipped {log_file.qty_rejected} lines that are not JSON objects",
+                title="Load",
+                severity="warning",
+            )
+
+    def _show_sub_title(self, log_file: LogFile, progress: float = 100.0) -> None:
+        """Shows the log file, its rotated files, the loading progress and the rejected lines"""
+        sub_title = str(self._file_log)
+        if len(log_file.files) > 1:
+            sub_title = f"{sub_title} (+{len(log_file.files) - 1} rotated)"
+        if log_file.qty_rejected > 0:
+            sub_title = f"{sub_title} ({log_file.qty_rejected} rejected lines)"
+        if progress < 100:
+            sub_title = f"{sub_title} (loading {progress:.0f}%)"
+        self.sub_title = sub_title
 
     def action_open_file(self) -> None:
         """Opens a file chooser dialog"""
+        from dialog_open_log import DialogOpenLog
+
         if self._dir_default == "":
             dir_default = os.path.expanduser("~")
         else:
@@ -151,13 +315,10 @@ class LogViewer(App):
             self.dialog_callback_open_log,
         )
 
-    def dialog_callback_open_log(self, file: str) -> None:
-        if file:
-            self.notify(f"Opened file: '{file}'")
-            self._file_log = file
-            self.sub_title = file
-            self._log_file = LogFile(file_log=self._file_log)
-            self.populate_table()
+    def dialog_callback_open_log(self, selection: dict) -> None:
+        if selection:
+            self.notify(f"Opened file: '{selection['file']}'")
+            self.load_log(file=selection["file"], rotated=selection["rotated"])
         else:
             self.notify(
                 "You cancelled opening a file!", title="Cancelled", severity="warning"
@@ -165,6 +326,8 @@ class LogViewer(App):
 
     def action_export_file(self) -> None:
         """Opens a file chooser dialog"""
+        from dialog_export_options import DialogExportOptions
+
         self.push_screen(
             DialogExportOptions(config=self._config, log_file=self._log_file),
             self.dialog_callback_export_options,
@@ -172,40 +335,110 @@ class LogViewer(App):
 
     def dialog_callback_export_options(self, options: str) -> None:
         if options:
-            df_filtered = self._log_file.filtered(options=options)
-            if df_filtered.shape[0] > 0:
-                self.push_screen(
-                    DialogExportLog(root=self._config.dir_default),
-                    self.dialog_callback_export_log,
-                )
-            else:
-                self.notify(
-                    "Noting to export due to filter and levelname exclusion!",
-                    title="Export aborted",
-                    severity="error",
-                )
+            self._check_export(options=options)
         else:
             self.notify("You cancelled exporting a log!", severity="warning")
 
+    @work(thread=True, exclusive=True, group="export_log")
+    def _check_export(self, options: dict) -> None:
+        """Selects the entries to export in a thread, the selection is kept for the export"""
+        log_file = self._log_file
+        selection = log_file.selection(options=options)
+        self._export = (log_file, selection)
+        self.call_from_thread(self._show_export_dialog, len(selection.rows))
+
+    def _show_export_dialog(self, qty_entries: int) -> None:
+        from dialog_export_log import DialogExportLog
+
+        if qty_entries > 0:
+            self.push_screen(
+                DialogExportLog(root=self._config.dir_default),
+                self.dialog_callback_export_log,
+            )
+        else:
+            self.notify(
+                "Noting to export due to filter and levelname exclusion!",
+                title="Export aborted",
+                severity="error",
+            )
+
     def dialog_callback_export_log(self, file: str) -> None:
         if file:
-            is_exported = self._log_file.export(
-                file=file, options=self._config.export_options
-            )
-            if is_exported:
-                self.notify(f"Exporting file: '{file}'")
-            else:
-                self.notify("Error export", severity="warning")
+            self.notify(f"Exporting file: '{file}'")
+            self._export_log(file=file)
         else:
             self.notify(
                 "You cancelled exporting part of the log!", title="Cancelled", severity="warning"
             )
 
+    @work(thread=True, exclusive=True, group="export_log")
+    def _export_log(self, file: str) -> None:
+        """Exports the entries selected for the export in a thread"""
+        (log_file, selection), self._export = self._export, None
+        self.call_from_thread(self._show_progress, 0.0)
+        is_exported = False
+        lst_progress = log_file.export_chunks(
+            file=file, options=self._config.export_options, selection=selection
+        )
+        try:
+            for progress in lst_progress:
+                self.call_from_thread(self._show_progress, progress)
+                is_exported = True
+        except (OSError, ValueError) as e:
+            logger.error(f"Exporting to '{file}' failed: {e}")
+            is_exported = False
+        self.call_from_thread(self._show_exported, file, is_exported)
+
+    def _show_progress(self, progress: float) -> None:
+        progress_bar = self.query_one("#progress")
+        progress_bar.add_class("busy")
+        progress_bar.update(total=100, progress=progress)
+
+    def _show_exported(self, file: str, is_exported: bool) -> None:
+        self.query_one("#progress").remove_class("busy")
+        if is_exported:
+            self.notify(f"Exported file: '{file}'")
+        else:
+            self.notify("Error export", severity="warning")
+
     def action_reload_log(self) -> None:
         logger.debug("Reloading log data")
-        self.populate_table()
+        self.load_log(file=self._file_log, rotated=self._is_rotated)
         self.notify(f"Reloaded the log file '{self._file_log}'")
 
+    def action_toggle_follow(self) -> None:
+        """Toggles following the entries written to the log file"""
+        if self._log_file is None:
+            self.notify("Open a log file to follow", title="Follow", severity="warning")
+            return
+        self._is_following = not self._is_following
+        if self._is_following:
+            self._timer_follow.resume()
+            self.notify(f"Following the log file '{self._file_log}'", title="Follow")
+        else:
+            self._timer_follow.pause()
+            self.notify("Stopped following the log file", title="Follow")
+
+    @work(thread=True, group="follow_log")
+    def _follow_log(self) -> None:
+        """Adds the entries written to the log file since the last check to the table"""
+        log_file = self._log_file
+        if log_file is None:
+            return
+        qty_added = log_file.tail()
+        if qty_added > 0:
+            self.call_from_thread(self._show_followed, log_file)
+
+    def _show_followed(self, log_file: LogFile) -> None:
+        if log_file is self._log_file:
+            table = self.query_one(VirtualTable)
+            if table.columns != log_file.headers:
+                self.populate_table()
+            else:
+                table.set_row_count(log_file.row_count)
+            self.query_one(TimelineChart).refresh(layout=True)
+            self._show_sub_title(log_file)
+
     def action_toggle_dark(self) -> None:
         """An action to toggle dark mode."""
         self.theme = (
@@ -220,12 +453,8 @@ class LogViewer(App):
         )
 
     def action_sort_by_asc_time(self) -> None:
-        table = self.query_one(DataTable)
-        table.sort(
-            "asctime",
-            key=lambda asctime: asctime,
-            reverse=self.sort_reverse("asctime"),
-        )
+        self._log_file.sort_asctime(descending=self.sort_reverse("asctime"))
+        self.query_one(VirtualTable).invalidate()
 
     def sort_reverse(self, sort_type: str):
         """Determine if `sort_type` is ascending or descending."""
@@ -237,6 +466,8 @@ class LogViewer(App):
         return reverse
 
     def action_filter_run(self) -> None:
+        from dialog_filter_runs import DialogFilterRuns
+
         self.push_screen(
             DialogFilterRuns(log_file=self._log_file),
             self.dialog_callback_filter_run,
@@ -244,10 +475,144 @@ class LogViewer(App):
 
     def dialog_callback_filter_run(self, lst_runs: list) -> None:
         if lst_runs:
-            self._log_file.filter_runs(lst_runs=lst_runs)
-            self.populate_table()
-            self.notify(f"Filtering runs: '{lst_runs}'")
+            self.query_one(VirtualTable).loading = True
+            self._filter_runs(lst_runs=lst_runs)
         else:
             self.notify(
                 "You cancelled filtering runs!", title="Cancelled", severity="warning"
             )
+
+    @work(thread=True, exclusive=True, group="filter_log")
+    def _filter_runs(self, lst_runs: list) -> None:
+        """Filters the runs in a thread"""
+        log_file = self._log_file
+        log_file.filter_runs(lst_runs=lst_runs)
+        self.call_from_thread(self._show_filtered, log_file, lst_runs)
+
+    def _show_filtered(self, log_file: LogFile, lst_runs: list) -> None:
+        if log_file is not self._log_file:
+            return
+        self.query_one(VirtualTable).loading = False
+        self.populate_table()
+        self.notify(f"Filtering runs: '{lst_runs}'")
+
+    def action_query(self) -> None:
+        """Shows the query bar with the current query"""
+        input_query = self.query_one("#input_query")
+        input_query.value = self._log_file.query
+        input_query.add_class("visible")
+        input_query.focus()
+
+    @on(Input.Submitted, "#input_query")
+    def on_query_submitted(self, message: Input.Submitted) -> None:
+        message.input.remove_class("visible")
+        table = self.query_one(VirtualTable)
+        table.focus()
+        table.loading = True
+        self._filter_query(query=message.value)
+
+    @work(thread=True, exclusive=True, group="filter_log")
+    def _filter_query(self, query: str) -> None:
+        """Filters the entries on a query in a thread"""
+        from log_query import QueryError
+
+        log_file = self._log_file
+        try:
+            log_file.filter_query(query=query)
+        except QueryError as e:
+            self.call_from_thread(self._show_query_error, log_file, str(e))
+            return
+        self.call_from_thread(self._show_queried, log_file)
+
+    def _show_query_error(self, log_file: LogFile, error: str) -> None:
+        if log_file is not self._log_file:
+            return
+        self.query_one(VirtualTable).loading = False
+        self.notify(error, title="Query", severity="error")
+
+    def _show_queried(self, log_file: LogFile) -> None:
+        if log_file is not self._log_file:
+            return
+        self.query_one(VirtualTable).loading = False
+        self.populate_table()
+        if log_file.query:
+            self.notify(f"{log_file.row_count} entries match '{log_file.query}'", title="Query")
+
+    def action_toggle_stats(self) -> None:
+        """Shows or hides the timings of the instrumented stages"""
+        if not instrumentation.is_enabled():
+            self.notify(
+                f"Enable instrumentation in the [instrumentation] section of config.toml or with "
+                f"{instrumentation.ENV_ENABLED}=1",
+                title="Stats",
+                severity="warning",
+            )
+            return
+        overlay = self.query_one(StatsOverlay)
+        overlay.toggle_class("visible")
+        overlay.update_stats()
+
+    def action_toggle_timeline(self) -> None:
+        """Shows or hides the timeline of the entries per level"""
+        timeline = self.query_one(TimelineChart)
+        if timeline.has_class("visible"):
+            timeline.remove_class("visible")
+            self.query_one(VirtualTable).focus()
+        else:
+            timeline.add_class("visible")
+            timeline.focus()
+
+    @on(TimelineChart.BucketSelected)
+    def on_bucket_selected(self, message: TimelineChart.BucketSelected) -> None:
+        """Moves the cursor to the selected entries of a bucket of the timeline"""
+        position = self._log_file.position_at(start=message.start, end=message.end)
+        if position >= 0:
+            self.query_one(VirtualTable).cursor_row = position
+
+    def action_search(self) -> None:
+        """Shows the search bar"""
+        input_search = self.query_one("#input_search")
+        input_search.add_class("visible")
+        input_search.focus()
+
+    @on(Input.Submitted, "#input_search")
+    def on_search_submitted(self, message: Input.Submitted) -> None:
+        """Searches the messages and jumps to the first hit from the cursor"""
+        message.input.remove_class("visible")
+        table = self.query_one(VirtualTable)
+        table.focus()
+        self._search_text = message.value.strip()
+        if self._search_text == "":
+            return
+        qty_hits = self._jump_to_hit(start=table.cursor_row)
+        if qty_hits == 0:
+            self.notify(f"No messages found with '{self._search_text}'", severity="warning")
+        else:
+            self.notify(f"Found {qty_hits} messages with '{self._search_text}'")
+
+    def action_search_next(self) -> None:
+        self._jump_to_hit(start=self.query_one(VirtualTable).cursor_row + 1)
+
+    def action_search_previous(self) -> None:
+        self._jump_to_hit(start=self.query_one(VirtualTable).cursor_row - 1, forward=False)
+
+    def _jump_to_hit(self, start: int, forward: bool = True) -> int:
+        """Moves the cursor to the nearest search hit from a position, wrapping around
+
+        The hits are looked up again on every jump, so they follow filtering, sorting and
+        tailing of the log; a lookup only intersects a few sorted arrays.
+
+        Returns:
+            int: The number of hits
+        """
+        if self._search_text == "":
+            return 0
+        hits = self._log_file.search(self._search_text)
+        if len(hits) == 0:
+            return 0
+        if forward:
+            i = hits.searchsorted(start, side="left") % len(hits)
+        else:
+            i = hits.searchsorted(start, side="right") - 1
+        self.query_one(VirtualTable).cursor_row = int(hits[i])
+        return len(hits)
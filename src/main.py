@@ -1,7 +1,15 @@
+import sys
+
 from config import ConfigFile
-from log_viewer import LogViewer
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Arguments select the batch mode, which does not need the viewer
+        from log_batch import main
+
+        sys.exit(main(sys.argv[1:]))
+    from log_viewer import LogViewer
+
     config_file = ConfigFile(file_config="config.toml")
     app = LogViewer(config_file=config_file)
     app.run()
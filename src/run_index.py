@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RunIndex:
+    """Statistics of the runs (processes) in a log, kept up to date as entries are appended
+
+    For each process it stores the first and last asctime, the first and last row, the
+    number of entries and the number of entries per level. Appended entries are
+    aggregated on their own and merged into the statistics, so the log is never
+    grouped as a whole.
+    """
+
+    def __init__(self):
+        self._dict_runs: dict = {}
+
+    def clear(self) -> None:
+        self._dict_runs = {}
+
+    def add(self, df_log: pd.DataFrame, start: int) -> None:
+        """Adds appended entries to the statistics of their runs
+
+        Args:
+            df_log (pd.DataFrame): The appended entries
+            start (int): The row number of the first entry
+        """
+        if df_log.shape[0] == 0 or "process" not in df_log.columns:
+            return
+        df_rows = pd.DataFrame(
+            {
+                "process": df_log["process"],
+                "asctime": df_log["asctime"],
+                "row": np.arange(start, start + df_log.shape[0]),
+            }
+        )
+        df_stats = df_rows.groupby("process", observed=True).agg(
+            asctime_first=("asctime", "min"),
+            asctime_last=("asctime", "max"),
+            row_first=("row", "min"),
+            row_last=("row", "max"),
+            qty_entries=("row", "size"),
+        )
+        if "levelname" in df_log.columns:
+            df_levels = (
+                pd.DataFrame({"process": df_log["process"], "levelname": df_log["levelname"]})
+                .groupby(["process", "levelname"], observed=True)
+                .size()
+                .unstack(fill_value=0)
+                # A process whose entries have no levelname in the chunk has no row of levels
+                .reindex(df_stats.index, fill_value=0)
+            )
+        else:
+            df_levels = pd.DataFrame(index=df_stats.index)
+        for process, stats in zip(df_stats.index.tolist(), df_stats.itertuples(index=False)):
+            dict_levels = {
+                level: int(qty)
+                for level, qty in df_levels.loc[process].items()
+                if qty > 0
+            }
+            run = self._dict_runs.get(process)
+            if run is None:
+                self._dict_runs[process] = {
+                    "process": process,
+                    "asctime_first": stats.asctime_first,
+                    "asctime_last": stats.asctime_last,
+                    "row_first": int(stats.row_first),
+                    "row_last": int(stats.row_last),
+                    "qty_entries": int(stats.qty_entries),
+                    "levels": dict_levels,
+                }
+                continue
+            run["asctime_first"] = min(run["asctime_first"], stats.asctime_first)
+            run["asctime_last"] = max(run["asctime_last"], stats.asctime_last)
+            run["row_last"] = int(stats.row_last)
+            run["qty_entries"] = run["qty_entries"] + int(stats.qty_entries)
+            for level, qty in dict_levels.items():
+                run["levels"][level] = run["levels"].get(level, 0) + qty
+
+    def runs(self) -> list:
+        """The statistics of the runs, the run with the latest entry first
+
+        Returns:
+            list: A dict per run with process, asctime_first, asctime_last, row_first, row_last, qty_entries and levels (the entries per levelname)
+        """
+        return sorted(
+            (dict(run, levels=dict(run["levels"])) for run in self._dict_runs.values()),
+            key=lambda run: run["asctime_last"],
+            reverse=True,
+        )
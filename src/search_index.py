@@ -0,0 +1,139 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SearchIndex:
+    """An inverted index of the words in log messages
+
+    Each word maps to the sorted row numbers of the messages containing it. The
+    postings are kept in segments; within a segment they are stored as one array of
+    row numbers with the offsets of each word's rows. Appended rows get a new segment
+    and segments are merged once a newer one is as large as the one before it, so
+    adding rows costs an amortized O(log n) per word while a lookup only touches a
+    few segments.
+    """
+
+    PATTERN_TOKEN = re.compile(r"\w+")
+
+    def __init__(self):
+        self._segments: list = []
+
+    @property
+    def qty_postings(self) -> int:
+        return sum(len(rows) for _, _, rows in self._segments)
+
+    def clear(self) -> None:
+        self._segments = []
+
+    def segments(self) -> list:
+        """The segments of the postings, for storing them with the log
+
+        Returns:
+            list: A tuple per segment of the words, the offsets of each word's rows and the rows
+        """
+        return [(list(dict_tokens), offsets, rows) for dict_tokens, offsets, rows in self._segments]
+
+    def load_segments(self, lst_segments: list) -> None:
+        """Replaces the postings by stored segments, so a cached log is not indexed again
+
+        Args:
+            lst_segments (list): A result of segments
+        """
+        self._segments = [
+            (
+                dict(zip(words, range(len(words)))),
+                np.asarray(offsets, dtype=np.int64),
+                np.asarray(rows, dtype=np.uint32),
+            )
+            for words, offsets, rows in lst_segments
+        ]
+
+    def add(self, messages: pd.Series, start: int) -> None:
+        """Indexes messages appended to the log
+
+        Args:
+            messages (pd.Series): The messages of the appended rows
+            start (int): The row number of the first message
+        """
+        lst_tokens = []
+        lst_rows = []
+        findall = self.PATTERN_TOKEN.findall
+        for row, message in enumerate(messages.tolist(), start=start):
+            if not isinstance(message, str):
+                continue
+            tokens = set(findall(message.lower()))
+            lst_tokens.extend(tokens)
+            lst_rows.extend([row] * len(tokens))
+        if not lst_tokens:
+            return
+        tokens = np.array(lst_tokens, dtype=object)
+        rows = np.array(lst_rows, dtype=np.uint32)
+        self._segments.append(self._build_segment(tokens, rows))
+        self._merge_segments()
+
+    @staticmethod
+    def _build_segment(tokens: np.ndarray, rows: np.ndarray) -> tuple:
+        """Groups the rows by token: a dict from token to its number, the offsets of
+        each token's rows and the rows"""
+        codes, uniques = pd.factorize(tokens)
+        order = np.argsort(codes, kind="stable")
+        offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(uniques)), out=offsets[1:])
+        dict_tokens = dict(zip(uniques.tolist(), range(len(uniques))))
+        return dict_tokens, offsets, rows[order]
+
+    def _merge_segments(self) -> None:
+        """Merges the newest segments while a segment is at least as large as the one before it"""
+        while (
+            len(self._segments) > 1
+            and len(self._segments[-1][2]) >= len(self._segments[-2][2])
+        ):
+            segment_new = self._segments.pop()
+            segment_old = self._segments.pop()
+            lst_tokens = []
+            lst_rows = []
+            for dict_tokens, offsets, rows in (segment_old, segment_new):
+                tokens = np.array(list(dict_tokens.keys()), dtype=object)
+                lst_tokens.append(np.repeat(tokens, np.diff(offsets)))
+                lst_rows.append(rows)
+            self._segments.append(
+                self._build_segment(np.concatenate(lst_tokens), np.concatenate(lst_rows))
+            )
+
+    def lookup(self, token: str) -> np.ndarray:
+        """The sorted rows of the messages containing a word"""
+        lst_rows = []
+        for dict_tokens, offsets, rows in self._segments:
+            token_id = dict_tokens.get(token)
+            if token_id is not None:
+                lst_rows.append(rows[offsets[token_id] : offsets[token_id + 1]])
+        if not lst_rows:
+            return np.empty(0, dtype=np.uint32)
+        return np.concatenate(lst_rows)
+
+    def search(self, text: str) -> np.ndarray:
+        """The sorted rows of the messages containing all words of the text
+
+        Args:
+            text (str): The words to search for
+
+        Returns:
+            np.ndarray: Row numbers
+        """
+        tokens = self.PATTERN_TOKEN.findall(text.lower())
+        if not tokens:
+            return np.empty(0, dtype=np.uint32)
+        # Intersecting the rarest words first keeps the intermediate results small
+        lst_rows = sorted((self.lookup(token) for token in set(tokens)), key=len)
+        rows = lst_rows[0]
+        for rows_token in lst_rows[1:]:
+            if len(rows) == 0:
+                break
+            rows = np.intersect1d(rows, rows_token, assume_unique=True)
+        return rows
@@ -0,0 +1,48 @@
+from rich.table import Table
+from textual.widgets import Static
+
+import instrumentation
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StatsOverlay(Static):
+    """The totals of the instrumented stages, updated every second while shown"""
+
+    DEFAULT_CSS = """
+    StatsOverlay {
+        dock: right;
+        width: auto;
+        height: auto;
+        display: none;
+        background: $panel;
+        border: round $accent;
+        padding: 0 1;
+    }
+
+    StatsOverlay.visible {
+        display: block;
+    }
+    """
+
+    def on_mount(self) -> None:
+        self.set_interval(1.0, self.update_stats)
+
+    def update_stats(self) -> None:
+        if not self.has_class("visible"):
+            return
+        table = Table(box=None, padding=(0, 1), header_style="bold")
+        for header in ["stage", "calls", "last ms", "total ms", "rows/s", "mem Δ MB"]:
+            table.add_column(header, justify="left" if header == "stage" else "right")
+        for stats in instrumentation.stats():
+            rows_per_second = stats["rows"] / stats["seconds"] if stats["seconds"] > 0 else 0
+            table.add_row(
+                stats["stage"],
+                f"{stats['calls']}",
+                f"{1000 * stats['seconds_last']:.1f}",
+                f"{1000 * stats['seconds']:.0f}",
+                f"{rows_per_second:,.0f}",
+                f"{stats['memory_delta_last'] / 2**20:+.1f}",
+            )
+        self.update(table)
@@ -0,0 +1,164 @@
+from typing import Callable
+
+import numpy as np
+from rich.text import Text
+from textual import events
+from textual.binding import Binding
+from textual.message import Message
+from textual.widget import Widget
+
+from log_timeline import WIDTHS, Histogram, format_width
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+BARS = " ▁▂▃▄▅▆▇█"
+
+
+class TimelineChart(Widget, can_focus=True):
+    """The number of entries per level over time, a line of bars per level
+
+    The counts are asked from a source for a bucket width, the chart shows the buckets
+    that fit its width, ending at the last entry unless panned. Clicking a bucket posts
+    BucketSelected with the time span of the bucket.
+    """
+
+    DEFAULT_CSS = """
+    TimelineChart {
+        height: auto;
+        background: $surface;
+        border-top: solid $panel;
+        padding: 0 1;
+    }
+    """
+
+    BINDINGS = [
+        Binding("plus,equals_sign", "zoom_in", "Zoom in"),
+        Binding("minus", "zoom_out", "Zoom out"),
+        Binding("0", "zoom_fit", "Fit", show=False),
+        Binding("left", "pan(-1)", "Earlier", show=False),
+        Binding("right", "pan(1)", "Later", show=False),
+    ]
+
+    class BucketSelected(Message):
+        """Posted when a bucket is clicked"""
+
+        def __init__(self, start: np.datetime64, end: np.datetime64) -> None:
+            super().__init__()
+            self.start = start
+            self.end = end
+
+    def __init__(
+        self,
+        name: str | None = None,
+        id: str | None = None,
+        classes: str | None = None,
+        disabled: bool = False,
+    ) -> None:
+        super().__init__(name=name, id=id, classes=classes, disabled=disabled)
+        self._fetch_histogram: Callable[[int, int | None], Histogram | None] | None = None
+        self._level_colors: dict = {}
+        # None fits the whole log in the chart
+        self._width: int | None = None
+        # The number of buckets the view ends before the last bucket
+        self._pan = 0
+        self._histogram: Histogram | None = None
+        self._bucket_first = 0
+
+    def set_source(
+        self,
+        fetch_histogram: Callable[[int, int | None], Histogram | None],
+        level_colors: dict,
+    ) -> None:
+        """Points the chart to a new source of counts
+
+        Args:
+            fetch_histogram (Callable[[int, int | None], Histogram | None]): Returns the counts for a number of buckets and a bucket width, None for fitting the log in the buckets
+            level_colors (dict): The color for each levelname
+        """
+        self._fetch_histogram = fetch_histogram
+        self._level_colors = level_colors
+        self._width = None
+        self._pan = 0
+        self.refresh(layout=True)
+
+    @property
+    def _qty_buckets(self) -> int:
+        return max(self.size.width - self._label_width, 1)
+
+    @property
+    def _label_width(self) -> int:
+        return max((len(level) for level in self._level_colors), default=0) + 1
+
+    def render(self) -> Text:
+        text = Text(no_wrap=True, overflow="crop")
+        self._histogram = None
+        if self._fetch_histogram is not None and self.size.width > 0:
+            self._histogram = self._fetch_histogram(self._qty_buckets, self._width)
+        if self._histogram is None:
+            text.append("No entries with a time")
+            return text
+        histogram = self._histogram
+        qty_buckets = histogram.counts.shape[1]
+        self._pan = min(self._pan, max(qty_buckets - self._qty_buckets, 0))
+        bucket_last = qty_buckets - self._pan
+        self._bucket_first = max(bucket_last - self._qty_buckets, 0)
+        # Levels in the order of the configured colors, unknown levels after them
+        lst_levels = [level for level in self._level_colors if level in histogram.levels]
+        lst_levels += [level for level in histogram.levels if level not in lst_levels]
+        for level in lst_levels:
+            counts = histogram.counts[histogram.levels.index(level), self._bucket_first : bucket_last]
+            count_max = max(int(counts.max(initial=0)), 1)
+            # Any count shows at least the lowest bar, so single entries stand out
+            heights = np.where(counts > 0, np.ceil(counts * (len(BARS) - 1) / count_max), 0)
+            text.append(f"{level or '-':<{self._label_width}}", style="bold")
+            text.append(
+                "".join(BARS[int(height)] for height in heights),
+                style=self._level_colors.get(level, ""),
+            )
+            text.append("\n")
+        time_first = str(histogram.bucket_start(self._bucket_first))
+        time_last = str(histogram.bucket_start(bucket_last))
+        axis = f"{time_first}  ({format_width(histogram.width)} per bar)  {time_last}"
+        text.append(f"{'':<{self._label_width}}{axis}", style="dim")
+        return text
+
+    def on_click(self, event: events.Click) -> None:
+        offset = event.get_content_offset(self)
+        if offset is None or self._histogram is None:
+            return
+        bucket = self._bucket_first + offset.x - self._label_width
+        if offset.x < self._label_width or bucket >= self._histogram.counts.shape[1]:
+            return
+        self.post_message(
+            self.BucketSelected(
+                start=self._histogram.bucket_start(bucket),
+                end=self._histogram.bucket_start(bucket + 1),
+            )
+        )
+
+    def action_zoom_in(self) -> None:
+        width = self._histogram.width if self._histogram is not None else WIDTHS[-1]
+        lst_smaller = [w for w in WIDTHS if w < width]
+        if lst_smaller:
+            self._width = lst_smaller[-1]
+            self._pan = 0
+            self.refresh()
+
+    def action_zoom_out(self) -> None:
+        width = self._histogram.width if self._histogram is not None else WIDTHS[0]
+        lst_larger = [w for w in WIDTHS if w > width]
+        if lst_larger:
+            self._width = lst_larger[0]
+            self._pan = 0
+            self.refresh()
+
+    def action_zoom_fit(self) -> None:
+        self._width = None
+        self._pan = 0
+        self.refresh()
+
+    def action_pan(self, direction: int) -> None:
+        """Moves the view half a chart earlier (-1) or later (1)"""
+        self._pan = max(self._pan - direction * (self._qty_buckets // 2), 0)
+        self.refresh()
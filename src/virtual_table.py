@@ -0,0 +1,273 @@
+from typing import Callable
+
+from rich.cells import cell_len
+from rich.style import Style
+from rich.text import Text
+from textual import events
+from textual.binding import Binding
+from textual.cache import LRUCache
+from textual.geometry import Size
+from textual.message import Message
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+from logging_config import logging
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualTable(ScrollView, can_focus=True):
+    """A table that only asks its source for the rows that are visible
+
+    The rows are fetched by positional index through a callable, a window of the
+    visible rows plus a prefetch margin is kept, so the memory used by the view
+    does not depend on the number of rows in the log.
+    """
+
+    COMPONENT_CLASSES = {
+        "virtual-table--header",
+        "virtual-table--cursor",
+        "virtual-table--even-row",
+        "virtual-table--odd-row",
+    }
+
+    DEFAULT_CSS = """
+    VirtualTable {
+        background: $surface;
+        color: $foreground;
+        height: 100%;
+
+        &:focus {
+            background-tint: $foreground 5%;
+            & > .virtual-table--cursor {
+                background: $block-cursor-background;
+                color: $block-cursor-foreground;
+                text-style: $block-cursor-text-style;
+            }
+        }
+
+        & > .virtual-table--header {
+            text-style: bold;
+            background: $panel;
+            color: $foreground;
+        }
+
+        & > .virtual-table--even-row {
+            background: $surface-lighten-1 50%;
+        }
+
+        & > .virtual-table--cursor {
+            background: $block-cursor-blurred-background;
+            color: $block-cursor-blurred-foreground;
+            text-style: $block-cursor-blurred-text-style;
+        }
+    }
+    """
+
+    BINDINGS = [
+        Binding("enter", "select_cursor", "Select", show=False),
+        Binding("up", "cursor_up", "Cursor up", show=False),
+        Binding("down", "cursor_down", "Cursor down", show=False),
+        Binding("pageup", "page_up", "Page up", show=False),
+        Binding("pagedown", "page_down", "Page down", show=False),
+        Binding("home", "scroll_top", "Top", show=False),
+        Binding("end", "scroll_bottom", "Bottom", show=False),
+    ]
+
+    cursor_row = reactive(0, always_update=True)
+
+    class RowHighlighted(Message):
+        """Posted when the cursor moves to another row"""
+
+        def __init__(self, virtual_table: "VirtualTable", cursor_row: int) -> None:
+            super().__init__()
+            self.virtual_table = virtual_table
+            self.cursor_row = cursor_row
+
+        @property
+        def control(self) -> "VirtualTable":
+            return self.virtual_table
+
+    class RowSelected(RowHighlighted):
+        """Posted when a row is selected with enter or a mouse click"""
+
+    def __init__(
+        self,
+        prefetch: int = 100,
+        max_column_width: int = 120,
+        name: str | None = None,
+        id: str | None = None,
+        classes: str | None = None,
+        disabled: bool = False,
+    ) -> None:
+        super().__init__(name=name, id=id, classes=classes, disabled=disabled)
+        self.zebra_stripes = True
+        self._prefetch = prefetch
+        self._max_column_width = max_column_width
+        self._columns: tuple = ()
+        self._widths: list = []
+        self._row_count = 0
+        self._fetch_rows: Callable[[int, int], list] | None = None
+        self._window_start = 0
+        self._window: list = []
+        self._strip_cache: LRUCache[int, Strip] = LRUCache(1024)
+
+    @property
+    def columns(self) -> tuple:
+        return self._columns
+
+    @property
+    def row_count(self) -> int:
+        return self._row_count
+
+    def set_source(
+        self, columns: tuple, row_count: int, fetch_rows: Callable[[int, int], list]
+    ) -> None:
+        """Points the table to a new source of rows
+
+        Args:
+            columns (tuple): The column names, used as header
+            row_count (int): The number of rows the source holds
+            fetch_rows (Callable[[int, int], list]): Returns the rows from start up to stop as tuples
+        """
+        self._columns = tuple(columns)
+        self._widths = [cell_len(str(column)) for column in self._columns]
+        self._fetch_rows = fetch_rows
+        self.set_row_count(row_count)
+        self.cursor_row = 0
+        self.scroll_home(animate=False)
+
+    def set_row_count(self, row_count: int) -> None:
+        """Sets the number of rows after the source changed and drops fetched rows"""
+        self._row_count = row_count
+        self.invalidate()
+        if self.cursor_row >= row_count:
+            self.cursor_row = max(row_count - 1, 0)
+
+    def invalidate(self) -> None:
+        """Drops the fetched rows so they are requested again from the source"""
+        self._window = []
+        self._window_start = 0
+        self._strip_cache.clear()
+        self._update_virtual_size()
+        self.refresh()
+
+    def _update_virtual_size(self) -> None:
+        width = sum(self._widths) + len(self._widths)
+        self.virtual_size = Size(width, self._row_count + 1)
+
+    def _get_row(self, row: int) -> tuple:
+        """Returns a row, fetching a new window from the source when it is not present"""
+        offset = row - self._window_start
+        if 0 <= offset < len(self._window):
+            return self._window[offset]
+        start = max(row - self._prefetch, 0)
+        stop = min(row + self.size.height + self._prefetch, self._row_count)
+        self._window = self._fetch_rows(start, stop)
+        self._window_start = start
+        self._update_widths(self._window)
+        return self._window[row - start]
+
+    def _update_widths(self, rows: list) -> None:
+        """Widens the columns to fit the values of newly fetched rows"""
+        widened = False
+        for row in rows:
+            for i, value in enumerate(row):
+                width = min(cell_len(self._cell_text(value)), self._max_column_width)
+                if width > self._widths[i]:
+                    self._widths[i] = width
+                    widened = True
+        if widened:
+            self._strip_cache.clear()
+            self._update_virtual_size()
+
+    @staticmethod
+    def _cell_text(value) -> str:
+        text = value.plain if isinstance(value, Text) else str(value)
+        return text.partition("\n")[0]
+
+    def _render_cells(self, cells: tuple, style: Style) -> Strip:
+        line = Text(no_wrap=True, end="")
+        for value, width in zip(cells, self._widths):
+            cell = Text(self._cell_text(value), no_wrap=True, end="")
+            if isinstance(value, Text):
+                cell.stylize(value.style)
+            cell.truncate(width, overflow="ellipsis", pad=True)
+            line.append_text(cell)
+            line.append(" ")
+        return Strip(line.render(self.app.console)).apply_style(style)
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        width = self.size.width
+        base_style = self.rich_style
+        if y == 0:
+            style = base_style + self.get_component_rich_style("virtual-table--header")
+            strip = self._render_cells(self._columns, style)
+            return strip.crop_extend(scroll_x, scroll_x + width, style)
+        row = scroll_y + y - 1
+        if row >= self._row_count or self._fetch_rows is None:
+            return Strip.blank(width, base_style)
+        strip = self._strip_cache.get(row)
+        if strip is None:
+            strip = self._render_cells(self._get_row(row), Style())
+            self._strip_cache[row] = strip
+        if row == self.cursor_row:
+            style = base_style + self.get_component_rich_style("virtual-table--cursor")
+        elif self.zebra_stripes and row % 2 == 0:
+            style = base_style + self.get_component_rich_style("virtual-table--even-row")
+        else:
+            style = base_style
+        return strip.apply_style(style).crop_extend(scroll_x, scroll_x + width, style)
+
+    def notify_style_update(self) -> None:
+        self._strip_cache.clear()
+        super().notify_style_update()
+
+    def validate_cursor_row(self, value: int) -> int:
+        return max(min(value, self._row_count - 1), 0)
+
+    def watch_cursor_row(self, old_row: int, new_row: int) -> None:
+        self._scroll_cursor_into_view()
+        self.refresh()
+        if self._row_count > 0:
+            self.post_message(self.RowHighlighted(self, new_row))
+
+    def _scroll_cursor_into_view(self) -> None:
+        rows_visible = max(self.size.height - 1, 1)
+        if self.cursor_row < self.scroll_y:
+            self.scroll_to(y=self.cursor_row, animate=False)
+        elif self.cursor_row >= self.scroll_y + rows_visible:
+            self.scroll_to(y=self.cursor_row - rows_visible + 1, animate=False)
+
+    def action_cursor_up(self) -> None:
+        self.cursor_row -= 1
+
+    def action_cursor_down(self) -> None:
+        self.cursor_row += 1
+
+    def action_page_up(self) -> None:
+        self.cursor_row -= max(self.size.height - 1, 1)
+
+    def action_page_down(self) -> None:
+        self.cursor_row += max(self.size.height - 1, 1)
+
+    def action_scroll_top(self) -> None:
+        self.cursor_row = 0
+
+    def action_scroll_bottom(self) -> None:
+        self.cursor_row = self._row_count - 1
+
+    def action_select_cursor(self) -> None:
+        if self._row_count > 0:
+            self.post_message(self.RowSelected(self, self.cursor_row))
+
+    def on_click(self, event: events.Click) -> None:
+        offset = event.get_content_offset(self)
+        if offset is None or offset.y == 0:
+            return
+        row = self.scroll_offset.y + offset.y - 1
+        if row < self._row_count:
+            self.cursor_row = row
+            self.post_message(self.RowSelected(self, row))
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from bitmap_index import BitmapIndex
+from log_parser import normalize_dtypes
+
+
+def chunk(lst_levels: list, lst_modules: list) -> pd.DataFrame:
+    """A parsed chunk of entries with a levelname and module each"""
+    return normalize_dtypes(pd.DataFrame({"levelname": lst_levels, "module": lst_modules}))
+
+
+def rows(mask: np.ndarray) -> list:
+    return np.flatnonzero(mask).tolist()
+
+
+def test_values_of_a_column_are_combined_with_or_and_columns_with_and():
+    bitmap_index = BitmapIndex(columns=["levelname", "module"])
+    bitmap_index.add(chunk(["INFO", "ERROR", "INFO", None], ["load", "load", "main", "main"]))
+    assert bitmap_index.values("levelname") == ["ERROR", "INFO"]
+    assert rows(bitmap_index.mask({})) == [0, 1, 2, 3]
+    assert rows(bitmap_index.mask({"levelname": ["INFO", "ERROR"]})) == [0, 1, 2]
+    assert rows(bitmap_index.mask({"levelname": ["INFO"], "module": ["main"]})) == [2]
+    assert rows(bitmap_index.mask({"levelname": ["CRITICAL"]})) == []
+
+
+def test_appended_rows_not_on_a_byte_boundary():
+    lst_levels = ["INFO", "ERROR", "DEBUG"] * 7
+    lst_modules = ["load", "main"] * 10 + ["load"]
+    bitmap_index = BitmapIndex(columns=["levelname", "module"])
+    for start, stop in [(0, 5), (5, 6), (6, 19), (19, 21)]:
+        bitmap_index.add(chunk(lst_levels[start:stop], lst_modules[start:stop]))
+    bitmap_whole = BitmapIndex(columns=["levelname", "module"])
+    bitmap_whole.add(chunk(lst_levels, lst_modules))
+    dict_filters = {"levelname": ["ERROR", "DEBUG"], "module": ["load"]}
+    mask = bitmap_index.mask(dict_filters)
+    assert len(mask) == 21
+    assert rows(mask) == rows(bitmap_whole.mask(dict_filters))
+    assert rows(mask) == [i for i in range(21) if lst_levels[i] != "INFO" and lst_modules[i] == "load"]
+
+
+def test_mask_from_start_covers_the_rows_from_there_on():
+    bitmap_index = BitmapIndex(columns=["levelname"])
+    bitmap_index.add(chunk(["INFO", "ERROR"] * 10, ["main"] * 20))
+    mask = bitmap_index.mask({"levelname": ["ERROR"]})
+    for start in [0, 3, 8, 13, 20]:
+        assert bitmap_index.mask({"levelname": ["ERROR"]}, start=start).tolist() == mask[start:].tolist()
+
+
+def test_value_of_only_the_first_rows():
+    bitmap_index = BitmapIndex(columns=["levelname"])
+    bitmap_index.add(chunk(["CRITICAL"], ["main"]))
+    bitmap_index.add(chunk(["INFO"] * 20, ["main"] * 20))
+    assert rows(bitmap_index.mask({"levelname": ["CRITICAL"]})) == [0]
+    assert rows(bitmap_index.mask({"levelname": ["CRITICAL"]}, start=16)) == []
+
+
+def test_clear():
+    bitmap_index = BitmapIndex(columns=["levelname"])
+    bitmap_index.add(chunk(["INFO"], ["main"]))
+    bitmap_index.clear()
+    assert bitmap_index.values("levelname") == []
+    assert len(bitmap_index.mask({})) == 0
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from log_batch import batch_query, export_paths, is_lazy_query
+
+
+def test_export_paths_beside_the_logs():
+    assert export_paths(["logs/a/log.json", "b.json"], output_dir=None, format="csv") == [
+        str(Path("logs/a/log.json.csv")),
+        "b.json.csv",
+    ]
+
+
+def test_export_paths_keep_the_directories_of_logs_of_the_same_name(tmp_path):
+    lst_files = [str(tmp_path / "s1" / "log.json"), str(tmp_path / "s2" / "log.json")]
+    assert export_paths(lst_files, output_dir="out", format="csv") == [
+        str(Path("out/s1/log.json.csv")),
+        str(Path("out/s2/log.json.csv")),
+    ]
+
+
+def test_export_paths_of_a_single_log(tmp_path):
+    lst_files = [str(tmp_path / "s1" / "log.json")]
+    assert export_paths(lst_files, output_dir="out", format="parquet") == [str(Path("out/log.json.parquet"))]
+
+
+def test_batch_query():
+    assert batch_query("module:load", since="2024-01-01") == 'module:load asctime>="2024-01-01"'
+    assert batch_query(until="2024-01-02") == 'asctime<="2024-01-02"'
+
+
+def test_is_lazy_query():
+    assert is_lazy_query("failed")
+    assert is_lazy_query('message~"^load"')
+    assert not is_lazy_query("levelname>=WARNING module:load")
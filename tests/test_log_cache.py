@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from log_cache import LogCache
+from log_file import LogFile
+
+
+def write_log(file, start: int, stop: int, mode: str = "w") -> None:
+    """Writes entries with long messages, so a few thousand make a log worth caching"""
+    with open(file, mode) as f:
+        for i in range(start, stop):
+            dict_record = {
+                "asctime": f"2024-01-01 10:{i // 60 % 60:02d}:{i % 60:02d},000",
+                "levelname": "INFO",
+                "process": 1,
+                "message": f"entry {i} " + "x" * 200,
+            }
+            f.write(json.dumps(dict_record) + "\n")
+
+
+@pytest.fixture
+def cache(tmp_path) -> LogCache:
+    return LogCache(dir_cache=str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def file_log(tmp_path):
+    file_log = tmp_path / "app.json"
+    write_log(file_log, 0, 6000)
+    return file_log
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_unchanged_log_is_loaded_from_the_cache(file_log, cache, lazy):
+    log_file = LogFile(str(file_log), cache=cache, workers=1, lazy=lazy)
+    log_cached = LogFile(str(file_log), cache=cache, workers=1, lazy=lazy)
+    assert log_cached.row_count == log_file.row_count == 6000
+    assert (log_cached.search("entry 5999") == log_file.search("entry 5999")).all()
+    assert len(log_cached.search("entry 5999")) == 1
+
+
+def test_changed_log_is_parsed_again(file_log, cache):
+    LogFile(str(file_log), cache=cache, workers=1)
+    write_log(file_log, 6000, 6010, mode="a")
+    assert LogFile(str(file_log), cache=cache, workers=1).row_count == 6010
+
+
+def test_lines_written_while_loading_are_not_left_out_of_the_cache(file_log, cache):
+    log_file = LogFile(str(file_log), load=False, cache=cache, workers=1)
+    for i, _ in enumerate(log_file.load_chunks(chunk_bytes=64 * 1024)):
+        if i == 0:
+            write_log(file_log, 6000, 6010, mode="a")
+    # The lines are read or not depending on the chunk being read, the next load has them all
+    assert LogFile(str(file_log), cache=cache, workers=1).row_count == 6010
+
+
+def test_small_logs_are_not_cached(tmp_path, cache):
+    file_log = tmp_path / "small.json"
+    write_log(file_log, 0, 10)
+    assert cache.fingerprint([file_log]) is None
+    LogFile(str(file_log), cache=cache, workers=1)
+    assert not (tmp_path / "cache").exists()
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cached_search_index_is_extended_by_tailed_entries(file_log, cache, lazy):
+    LogFile(str(file_log), cache=cache, workers=1, lazy=lazy)
+    log_cached = LogFile(str(file_log), cache=cache, workers=1, lazy=lazy)
+    write_log(file_log, 6000, 6002, mode="a")
+    assert log_cached.tail() == 2
+    assert len(log_cached.search("entry 6001")) == 1
+    assert len(log_cached.search("entry 17")) == 1
+
+
+def test_log_is_indexed_when_the_postings_are_not_cached(file_log, cache, tmp_path):
+    LogFile(str(file_log), cache=cache, workers=1)
+    for file_words in (tmp_path / "cache").glob("*.words.arrow"):
+        file_words.unlink()
+    log_cached = LogFile(str(file_log), cache=cache, workers=1)
+    assert len(log_cached.search("entry 42")) == 1
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from log_file import MESSAGE_ROTATED, LogFile
+
+
+def write_log(file, lst_messages: list, mode: str = "a") -> None:
+    """Writes an entry per message, a second apart"""
+    with open(file, mode) as f:
+        for message in lst_messages:
+            second = int(message[1:])
+            dict_record = {
+                "asctime": f"2024-01-01 10:{second // 60:02d}:{second % 60:02d},000",
+                "levelname": "INFO",
+                "message": message,
+            }
+            f.write(json.dumps(dict_record) + "\n")
+
+
+def messages(log_file: LogFile) -> list:
+    """The messages of the selected entries, the newest first like the viewer shows them"""
+    return log_file.take(log_file.selection())["message"].tolist()
+
+
+@pytest.fixture
+def file_log(tmp_path):
+    file_log = tmp_path / "app.json"
+    write_log(file_log, ["m0", "m1"], mode="w")
+    return file_log
+
+
+def test_tail_adds_the_complete_lines_written_since(file_log):
+    log_file = LogFile(str(file_log), workers=1)
+    assert log_file.tail() == 0
+    write_log(file_log, ["m2"])
+    with open(file_log, "a") as f:
+        f.write('{"asctime": "2024-01-01 10:00:03,000", "mess')
+    assert log_file.tail() == 1
+    with open(file_log, "a") as f:
+        f.write('age": "m3"}\n')
+    assert log_file.tail() == 1
+    assert messages(log_file) == ["m3", "m2", "m1", "m0"]
+
+
+def test_tail_reads_the_rest_of_the_rotated_file_first(file_log):
+    log_file = LogFile(str(file_log), workers=1)
+    write_log(file_log, ["m2"])
+    file_log.rename(file_log.with_name("app.json.1"))
+    write_log(file_log, ["m3", "m4"], mode="w")
+    assert log_file.tail() == 3
+    assert messages(log_file) == ["m4", "m3", "m2", "m1", "m0"]
+    write_log(file_log, ["m5"])
+    assert log_file.tail() == 1
+    assert messages(log_file)[0] == "m5"
+
+
+def test_tail_reads_the_new_file_when_the_rotated_file_is_gone(file_log):
+    log_file = LogFile(str(file_log), workers=1)
+    file_log.rename(file_log.with_name("app.old"))
+    write_log(file_log, ["m2"], mode="w")
+    assert log_file.tail() == 1
+    assert messages(log_file) == ["m2", "m1", "m0"]
+
+
+def test_tail_reads_a_truncated_file_from_the_start(file_log):
+    log_file = LogFile(str(file_log), workers=1)
+    write_log(file_log, ["m2"], mode="w")
+    assert log_file.tail() == 1
+    assert messages(log_file) == ["m2", "m1", "m0"]
+
+
+def test_tail_while_the_file_is_missing(file_log):
+    log_file = LogFile(str(file_log), workers=1)
+    file_log.unlink()
+    assert log_file.tail() == 0
+    assert log_file.row_count == 2
+
+
+def test_tail_keeps_the_filters_and_order(file_log):
+    log_file = LogFile(str(file_log), workers=1)
+    log_file.filter_query("m4")
+    log_file.sort_asctime(descending=False)
+    write_log(file_log, ["m3", "m4", "m5", "m4"])
+    assert log_file.tail() == 4
+    assert log_file.row_count == 2
+    assert messages(log_file) == ["m4", "m4"]
+    assert log_file.selection().rows.tolist() == [3, 5]
+
+
+def test_lazy_details_of_entries_read_before_rotation(file_log):
+    log_file = LogFile(str(file_log), workers=1, lazy=True)
+    file_log.rename(file_log.with_name("app.json.1"))
+    write_log(file_log, ["m2"], mode="w")
+    assert log_file.tail() == 1
+    file_log.with_name("app.json.1").unlink()
+    assert log_file.details(level_colors={}, position=2)["message"] == MESSAGE_ROTATED
+    assert log_file.details(level_colors={}, position=0)["message"] == "m2"
@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from log_parser import COLUMN_LINE_OFFSET, line_starts, merge_sorted, parse_buffer
+
+
+def line(second: int, **fields) -> bytes:
+    """A JSON line of an entry"""
+    dict_record = {"asctime": f"2024-01-01 10:00:{second:02d},000", "levelname": "INFO", "message": f"m{second}"}
+    return json.dumps(dict(dict_record, **fields)).encode() + b"\n"
+
+
+def test_line_starts():
+    assert line_starts(b"ab\ncd\nef").tolist() == [0, 3, 6]
+    assert line_starts(b"ab\ncd\n", offset=10).tolist() == [10, 13]
+    assert line_starts(b"").tolist() == []
+
+
+def test_line_starts_leaves_out_blank_lines():
+    data = b"ab\n\n" + b" " * 12 + b"\n\t\r\ncd\n  ef\n"
+    assert line_starts(data).tolist() == [0, 20, 23]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_parse_buffer_skips_blank_lines(lazy):
+    data = line(0) + b" " * 12 + b"\n" + line(1) + b"\n\t\n" + line(2)
+    df_log, offsets_rejected = parse_buffer(data, offset=100, lazy=lazy)
+    assert df_log["message"].tolist() == ["m0", "m1", "m2"]
+    assert offsets_rejected.tolist() == []
+    if lazy:
+        offsets = [100 + data.index(line(i)) for i in range(3)]
+        assert df_log[COLUMN_LINE_OFFSET].tolist() == offsets
+    else:
+        assert COLUMN_LINE_OFFSET not in df_log.columns
+
+
+def test_parse_buffer_empty():
+    df_log, offsets_rejected = parse_buffer(b" \n\n")
+    assert df_log.shape == (0, 0)
+    assert isinstance(offsets_rejected, np.ndarray)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_parse_buffer_rejects_lines_that_are_not_json_objects(lazy):
+    data = line(0) + b"Traceback (most recent call last):\n" + line(1) + b"[1, 2]\n" + line(2)
+    df_log, offsets_rejected = parse_buffer(data, offset=100, lazy=lazy)
+    assert df_log["message"].tolist() == ["m0", "m1", "m2"]
+    assert offsets_rejected.tolist() == [100 + data.index(b"Traceback"), 100 + data.index(b"[1, 2]")]
+    if lazy:
+        offsets = [100 + data.index(line(i)) for i in range(3)]
+        assert df_log[COLUMN_LINE_OFFSET].tolist() == offsets
+
+
+def test_merge_sorted_interleaves_the_frames():
+    lst_df = [
+        pd.DataFrame({"asctime": [1, 4, 7], "frame": "a"}),
+        pd.DataFrame({"asctime": [2, 5], "frame": "b"}),
+        pd.DataFrame({"asctime": [], "frame": []}),
+        pd.DataFrame({"asctime": [0, 3, 8], "frame": "c"}),
+    ]
+    df_merged = merge_sorted(lst_df, column="asctime")
+    assert df_merged["asctime"].tolist() == [0, 1, 2, 3, 4, 5, 7, 8]
+    assert df_merged["frame"].tolist() == ["c", "a", "b", "c", "a", "b", "a", "c"]
+    assert df_merged.index.tolist() == list(range(8))
+
+
+def test_merge_sorted_keeps_the_order_of_the_frames_for_equal_values():
+    lst_df = [pd.DataFrame({"asctime": [1, 2, 2], "frame": "a"}), pd.DataFrame({"asctime": [1, 2], "frame": "b"})]
+    df_merged = merge_sorted(lst_df, column="asctime")
+    assert df_merged["frame"].tolist() == ["a", "b", "a", "a", "b"]
+
+
+def test_merge_sorted_empty():
+    assert merge_sorted([], column="asctime").shape == (0, 0)
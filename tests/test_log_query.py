@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import log_query
+from log_parser import normalize_dtypes
+from log_query import Clause, QueryCache, QueryError, clause_mask, parse_query
+
+
+@pytest.fixture
+def df_log() -> pd.DataFrame:
+    """A parsed log of 6 entries, with the dtypes LogFile stores"""
+    df_log = pd.DataFrame(
+        {
+            "asctime": [f"2024-01-01 10:00:0{i},000" for i in range(6)],
+            "levelname": ["DEBUG", "INFO", "WARNING", "ERROR", "INFO", None],
+            "module": ["config", "config", "load", "load", "main", "main"],
+            "process": [30000, 30000, 35000, 40000, 45000, 45000],
+            "message": ["Reading config", "Config read", "Slow load", "Load failed", "Done", None],
+        }
+    )
+    return normalize_dtypes(df_log)
+
+
+def rows(mask: np.ndarray) -> list:
+    return np.flatnonzero(mask).tolist()
+
+
+def test_parse_query_fields_and_operators():
+    assert parse_query('levelname>=WARNING module:config message~"not present"') == [
+        Clause(field="levelname", op=">=", value="WARNING"),
+        Clause(field="module", op=":", value="config"),
+        Clause(field="message", op="~", value="not present"),
+    ]
+
+
+def test_parse_query_bare_words_search_the_message():
+    assert parse_query("failed 'load time'") == [
+        Clause(field="message", op=":", value="failed"),
+        Clause(field="message", op=":", value="load time"),
+    ]
+
+
+def test_parse_query_unescapes_quoted_values():
+    assert parse_query(r'message="say \"hi\""') == [Clause(field="message", op="=", value='say "hi"')]
+
+
+def test_parse_query_empty():
+    assert parse_query("  ") == []
+
+
+def test_clause_equal_and_not_equal(df_log):
+    assert rows(clause_mask(df_log, Clause("module", "=", "load"))) == [2, 3]
+    assert rows(clause_mask(df_log, Clause("module", "!=", "load"))) == [0, 1, 4, 5]
+
+
+def test_clause_contains_is_case_insensitive(df_log):
+    assert rows(clause_mask(df_log, Clause("message", ":", "CONFIG"))) == [0, 1]
+    assert rows(clause_mask(df_log, Clause("message", "!:", "config"))) == [2, 3, 4, 5]
+
+
+def test_clause_regular_expression(df_log):
+    assert rows(clause_mask(df_log, Clause("message", "~", "^(?:load|slow)"))) == [2, 3]
+    with pytest.raises(QueryError):
+        clause_mask(df_log, Clause("message", "~", "("))
+
+
+def test_clause_unknown_field(df_log):
+    with pytest.raises(QueryError, match="Unknown field 'thread'"):
+        clause_mask(df_log, Clause("thread", ":", "main"))
+
+
+def test_clause_levels_compare_by_severity(df_log):
+    assert rows(clause_mask(df_log, Clause("levelname", ">=", "warning"))) == [2, 3]
+    assert rows(clause_mask(df_log, Clause("levelname", ":", "INFO..WARNING"))) == [1, 2, 4]
+    with pytest.raises(QueryError, match="Unknown level"):
+        clause_mask(df_log, Clause("levelname", ">", "LOUD"))
+
+
+def test_clause_time_range(df_log):
+    mask = clause_mask(df_log, Clause("asctime", ":", "2024-01-01 10:00:01..2024-01-01 10:00:03"))
+    assert rows(mask) == [1, 2, 3]
+    assert rows(clause_mask(df_log, Clause("asctime", ">", "2024-01-01 10:00:04"))) == [5]
+    with pytest.raises(QueryError, match="Invalid time"):
+        clause_mask(df_log, Clause("asctime", ">", "yesterday"))
+
+
+def test_clause_range_on_categorical_numbers(df_log):
+    assert isinstance(df_log["process"].dtype, pd.CategoricalDtype)
+    mask_range = clause_mask(df_log, Clause("process", ":", "30000..40000"))
+    assert rows(mask_range) == [0, 1, 2, 3]
+    mask_compare = clause_mask(df_log, Clause("process", ">=", "30000")) & clause_mask(
+        df_log, Clause("process", "<=", "40000")
+    )
+    assert rows(mask_range) == rows(mask_compare)
+
+
+def test_clause_open_ranges(df_log):
+    assert rows(clause_mask(df_log, Clause("process", ":", "40000.."))) == [3, 4, 5]
+    assert rows(clause_mask(df_log, Clause("process", ":", "..30000"))) == [0, 1]
+
+
+def test_clause_contains_on_categorical_numbers(df_log):
+    assert rows(clause_mask(df_log, Clause("process", ":", "35"))) == [2]
+
+
+def test_query_cache_matches_all_clauses(df_log):
+    mask = QueryCache().mask(df_log, parse_query("module:load levelname>=ERROR"))
+    assert rows(mask) == [3]
+
+
+def test_query_cache_evaluates_appended_rows(df_log):
+    query_cache = QueryCache()
+    lst_clauses = parse_query("config")
+    assert rows(query_cache.mask(df_log.iloc[:3], lst_clauses)) == [0, 1]
+    assert rows(query_cache.mask(df_log, lst_clauses)) == [0, 1]
+    df_appended = pd.concat([df_log, df_log], ignore_index=True)
+    assert rows(query_cache.mask(df_appended, lst_clauses)) == [0, 1, 6, 7]
+
+
+def test_query_cache_keeps_recent_clauses(df_log):
+    query_cache = QueryCache(max_clauses=2)
+    for query in ["config", "load", "done"]:
+        query_cache.mask(df_log, parse_query(query))
+    assert list(query_cache._masks) == [Clause("message", ":", "load"), Clause("message", ":", "done")]
+
+
+def test_query_cache_reads_lazy_columns_in_chunks(df_log, monkeypatch):
+    monkeypatch.setattr(log_query, "CHUNK_ROWS_LAZY", 4)
+    df_lazy = df_log.drop(columns=["message"])
+    lst_reads = []
+
+    def read_column(field: str, start: int, stop: int):
+        if field != "message":
+            return None
+        lst_reads.append((start, stop))
+        return df_log["message"].iloc[start:stop]
+
+    mask = QueryCache().mask(df_lazy, parse_query("load"), read_column=read_column)
+    assert rows(mask) == [2, 3]
+    assert lst_reads == [(0, 4), (4, 6)]
+    with pytest.raises(QueryError, match="Unknown field 'thread'"):
+        QueryCache().mask(df_lazy, parse_query("thread:main"), read_column=read_column)
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from log_parser import normalize_dtypes
+from run_index import RunIndex
+
+
+def chunk(lst_rows: list) -> pd.DataFrame:
+    """A parsed chunk of entries given as (second, levelname, process)"""
+    df_log = pd.DataFrame(
+        {
+            "asctime": [f"2024-01-01 10:00:{second:02d},000" for second, _, _ in lst_rows],
+            "levelname": [levelname for _, levelname, _ in lst_rows],
+            "process": [process for _, _, process in lst_rows],
+        }
+    )
+    return normalize_dtypes(df_log)
+
+
+def test_runs_are_aggregated_per_process():
+    run_index = RunIndex()
+    run_index.add(chunk([(0, "INFO", 1), (1, "ERROR", 1), (2, "INFO", 2)]), start=0)
+    run_2, run_1 = run_index.runs()
+    assert run_1["process"] == 1
+    assert (run_1["row_first"], run_1["row_last"], run_1["qty_entries"]) == (0, 1, 2)
+    assert run_1["levels"] == {"INFO": 1, "ERROR": 1}
+    assert run_2["process"] == 2
+    assert run_2["levels"] == {"INFO": 1}
+
+
+def test_appended_chunks_are_merged_into_their_runs():
+    run_index = RunIndex()
+    run_index.add(chunk([(0, "INFO", 1), (1, "INFO", 2)]), start=0)
+    run_index.add(chunk([(2, "WARNING", 1), (3, "INFO", 1)]), start=2)
+    run_1, run_2 = run_index.runs()
+    assert run_1["process"] == 1
+    assert (run_1["row_first"], run_1["row_last"], run_1["qty_entries"]) == (0, 3, 3)
+    assert run_1["asctime_last"] == pd.Timestamp("2024-01-01 10:00:03")
+    assert run_1["levels"] == {"INFO": 2, "WARNING": 1}
+    assert run_2["qty_entries"] == 1
+
+
+def test_process_without_levelname_in_a_chunk():
+    run_index = RunIndex()
+    run_index.add(chunk([(0, "INFO", 1), (1, None, 2)]), start=0)
+    run_2, run_1 = run_index.runs()
+    assert run_2["process"] == 2
+    assert run_2["qty_entries"] == 1
+    assert run_2["levels"] == {}
+    assert run_1["levels"] == {"INFO": 1}
+
+
+def test_chunk_without_any_levelname():
+    run_index = RunIndex()
+    run_index.add(chunk([(0, None, 1), (1, None, 1)]), start=0)
+    (run_1,) = run_index.runs()
+    assert run_1["qty_entries"] == 2
+    assert run_1["levels"] == {}
+
+
+def test_clear():
+    run_index = RunIndex()
+    run_index.add(chunk([(0, "INFO", 1)]), start=0)
+    run_index.clear()
+    assert run_index.runs() == []
@@ -0,0 +1,45 @@
+import pandas as pd
+
+from search_index import SearchIndex
+
+
+def test_search_matches_messages_with_all_words():
+    search_index = SearchIndex()
+    search_index.add(pd.Series(["Config read", "Load FAILED: config", "load done", None]), start=0)
+    assert search_index.search("config").tolist() == [0, 1]
+    assert search_index.search("Failed config").tolist() == [1]
+    assert search_index.search("load").tolist() == [1, 2]
+    assert search_index.search("missing config").tolist() == []
+    assert search_index.search("  ").tolist() == []
+
+
+def test_appended_messages_are_searched_by_their_rows():
+    search_index = SearchIndex()
+    search_index.add(pd.Series(["load a", "load b"]), start=0)
+    search_index.add(pd.Series(["load c"]), start=2)
+    assert search_index.search("load").tolist() == [0, 1, 2]
+    assert search_index.search("c").tolist() == [2]
+
+
+def test_segments_are_merged_while_a_newer_one_is_as_large():
+    search_index = SearchIndex()
+    for start in range(0, 8, 2):
+        search_index.add(pd.Series([f"entry {start}", f"entry {start + 1}"]), start=start)
+    # Four segments of equal size merge into one
+    assert len(search_index.segments()) == 1
+    search_index.add(pd.Series(["entry 8"]), start=8)
+    assert len(search_index.segments()) == 2
+    assert search_index.lookup("entry").tolist() == list(range(9))
+    assert search_index.qty_postings == 18
+
+
+def test_loaded_segments_search_like_the_stored_ones():
+    search_index = SearchIndex()
+    search_index.add(pd.Series(["load a", "load b", "main"]), start=0)
+    search_index.add(pd.Series(["load c"]), start=3)
+    search_loaded = SearchIndex()
+    search_loaded.load_segments(search_index.segments())
+    for text in ["load", "b", "main", "load c", "x"]:
+        assert search_loaded.search(text).tolist() == search_index.search(text).tolist()
+    search_loaded.add(pd.Series(["load d"]), start=4)
+    assert search_loaded.search("load").tolist() == [0, 1, 3, 4]